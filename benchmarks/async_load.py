@@ -0,0 +1,90 @@
+"""
+Serves many concurrent dataset requests from an asyncio event loop, the way a web
+server would, and measures the throughput and the latency of the event loop: a
+heartbeat task sleeps for 1ms in a loop and records how late it wakes up.
+
+The requests are first served with blocking RandomAccessBufferReader.getDataset() calls
+made from the coroutines, then with AsyncRandomAccessBuffer, which runs the reads and
+the decompression in a bounded thread pool. With blocking calls the loop is stuck for
+the whole time a dataset is read and decompressed.
+
+Usage:
+    python benchmarks/async_load.py [nb_requests] [max_workers] [output_directory]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+NB_DATASETS = 200
+
+
+async def heartbeat(lags, stop):
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - t0 - 0.001)
+
+
+async def serve(get_dataset, names):
+    lags = []
+    stop = asyncio.Event()
+    beat = asyncio.ensure_future(heartbeat(lags, stop))
+    await asyncio.sleep(0.01)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*[get_dataset(name) for name in names])
+    duration = time.perf_counter() - t0
+
+    stop.set()
+    await beat
+    return (duration, max(lags) if lags else 0.0)
+
+
+async def bench_blocking(filepath, names):
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+
+        async def get_dataset(name):
+            return rabuff.getDataset(name)
+
+        return await serve(get_dataset, names)
+
+
+async def bench_async(filepath, names, max_workers):
+    async with rab.AsyncRandomAccessBuffer(max_workers=max_workers) as rabuff:
+        await rabuff.read(filepath)
+        return await serve(rabuff.getDataset, names)
+
+
+if __name__ == "__main__":
+    nb_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    directory = sys.argv[3] if len(sys.argv) > 3 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_async_load.rab")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(NB_DATASETS):
+            data = np.round(np.random.rand(128, 128), 2)
+            rabuff.addDataset("dataset {}".format(i), data=data, compress="gzip")
+        rabuff.write(filepath, header_format="json")
+
+    names = [
+        "dataset {}".format(random.randrange(NB_DATASETS)) for _ in range(nb_requests)
+    ]
+    for label, bench in [
+        ("blocking", bench_blocking(filepath, names)),
+        ("async", bench_async(filepath, names, max_workers)),
+    ]:
+        (duration, max_lag) = asyncio.run(bench)
+        print(
+            "{} {} requests: {:.3f}s, {:.0f} requests/s, max loop lag {:.1f}ms".format(
+                label, nb_requests, duration, nb_requests / duration, max_lag * 1000
+            )
+        )
+
+    os.remove(filepath)
@@ -0,0 +1,56 @@
+"""
+Measures the time to open a RAB file and read a single dataset out of it, by decoding
+the header or by looking the dataset up in the binary index sidecar.
+
+Usage:
+    python benchmarks/binary_index.py [nb_datasets ...]
+"""
+import os
+import sys
+import time
+import tempfile
+import randomaccessbuffer as rab
+
+SIZES = [1000, 100000, 1000000]
+
+
+def create(filepath, nb_datasets):
+    # all the datasets point to the same small file, nothing is staged
+    small_file = os.path.join(tempfile.gettempdir(), "binary_index_small_file")
+    with open(small_file, "wb") as f:
+        f.write(b"0123456789abcdef")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(nb_datasets):
+            rabuff.addFile("dataset {}".format(i), small_file)
+        rabuff.write(filepath, header_format="json", binary_index=True)
+
+    os.remove(small_file)
+
+
+def bench(filepath, nb_datasets, binary_index):
+    name = "dataset {}".format(nb_datasets // 2)
+    t0 = time.perf_counter()
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath, binary_index=binary_index)
+        rabuff.getDataset(name)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or SIZES
+    filepath = os.path.join(tempfile.gettempdir(), "binary_index.rab")
+
+    print("{:>10} {:>16} {:>18}".format("datasets", "header (ms)", "binary index (ms)"))
+    for nb_datasets in sizes:
+        create(filepath, nb_datasets)
+        print(
+            "{:>10} {:>16.3f} {:>18.3f}".format(
+                nb_datasets,
+                bench(filepath, nb_datasets, False) * 1e3,
+                bench(filepath, nb_datasets, True) * 1e3,
+            )
+        )
+
+    os.remove(filepath)
+    os.remove(filepath + ".rabidx")
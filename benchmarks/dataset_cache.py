@@ -0,0 +1,63 @@
+"""
+Gets the same few compressed datasets (an array, a YAML object and a dataframe) over
+and over, the way a dashboard refreshing its views would, without and with a
+DatasetCache.
+
+Usage:
+    python benchmarks/dataset_cache.py [nb_gets] [output_directory]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+import randomaccessbuffer as rab
+
+NAMES = ["array", "object", "dataframe"]
+
+
+def bench(filepath, nb_gets, cache=None):
+    t0 = time.perf_counter()
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(filepath)
+        for i in range(nb_gets):
+            rabuff.getDataset(NAMES[i % len(NAMES)])
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    nb_gets = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_dataset_cache.rab")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset(
+            "array", data=np.round(np.random.rand(512, 512), 2), compress="gzip"
+        )
+        rabuff.addDataset(
+            "object",
+            data={"values": np.random.rand(2000).tolist(), "name": "object"},
+            compress="gzip",
+        )
+        rabuff.addDataset(
+            "dataframe",
+            data=pd.DataFrame(
+                {
+                    "x": np.arange(20000),
+                    "y": ["row"] * 20000,
+                    "z": np.random.rand(20000),
+                }
+            ),
+            compress="gzip",
+        )
+        rabuff.write(filepath)
+
+    cache = rab.DatasetCache()
+    without_cache = bench(filepath, nb_gets)
+    with_cache = bench(filepath, nb_gets, cache)
+    print("{} gets without cache: {:.3f}s".format(nb_gets, without_cache))
+    print("{} gets with cache: {:.3f}s".format(nb_gets, with_cache))
+    print(cache.getStats())
+
+    os.remove(filepath)
@@ -0,0 +1,78 @@
+"""
+Compares loading many small datasets with one getDataset() call each, in a random order,
+and with a single getDatasets() call that reads them in the order of the file, merging
+neighbouring datasets into a few large reads.
+Drop the page cache between runs (or use a network filesystem) to see the effect of the
+I/O pattern rather than the one of the decoding.
+
+It then compares decoding many compressed YAML object datasets with a thread pool and
+with a process pool (getDatasets(..., executor="process")).
+
+Usage:
+    python benchmarks/get_datasets.py [nb_datasets] [output_directory]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+
+def bench_one_by_one(filepath, names):
+    t0 = time.perf_counter()
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        for name in names:
+            rabuff.getDataset(name)
+    return time.perf_counter() - t0
+
+
+def bench_bulk(filepath, names, executor="thread"):
+    t0 = time.perf_counter()
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        rabuff.getDatasets(names, executor=executor)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    nb_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_get_datasets.rab")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(nb_datasets):
+            data = np.round(np.random.rand(64, 64), 2)
+            rabuff.addDataset("raw {}".format(i), data=data)
+            rabuff.addDataset("gzip {}".format(i), data=data, compress="gzip")
+            rabuff.addDataset(
+                "object {}".format(i),
+                data={"values": data[0].tolist(), "name": "object {}".format(i)},
+                compress="gzip",
+            )
+        rabuff.write(filepath, header_format="json")
+
+    for kind in ["raw", "gzip"]:
+        names = ["{} {}".format(kind, i) for i in range(nb_datasets)]
+        random.shuffle(names)
+        print(
+            "{} {} datasets: getDataset {:.3f}s, getDatasets {:.3f}s".format(
+                nb_datasets,
+                kind,
+                bench_one_by_one(filepath, names),
+                bench_bulk(filepath, names),
+            )
+        )
+
+    names = ["object {}".format(i) for i in range(nb_datasets)]
+    print(
+        "{} object datasets: threads {:.3f}s, processes {:.3f}s".format(
+            nb_datasets,
+            bench_bulk(filepath, names, "thread"),
+            bench_bulk(filepath, names, "process"),
+        )
+    )
+
+    os.remove(filepath)
@@ -0,0 +1,47 @@
+"""
+Reopens the same file many times, the way a service opening a file for each request
+would, with the header decoded every time and with the header cache.
+
+Usage:
+    python benchmarks/header_cache.py [nb_datasets] [nb_reads] [output_directory]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+
+def bench(filepath, nb_reads, header_cache):
+    t0 = time.perf_counter()
+    for _ in range(nb_reads):
+        with rab.RandomAccessBufferReader(header_cache=header_cache) as rabuff:
+            rabuff.read(filepath)
+            rabuff.getDataset("dataset 0")
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    nb_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    nb_reads = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    directory = sys.argv[3] if len(sys.argv) > 3 else tempfile.gettempdir()
+
+    for header_format in ["yaml", "json"]:
+        filepath = os.path.join(directory, "bench_header_cache.rab")
+        with rab.RandomAccessBuffer() as rabuff:
+            for i in range(nb_datasets):
+                rabuff.addDataset(
+                    "dataset {}".format(i), data=np.arange(16), metadata={"i": i}
+                )
+            rabuff.write(filepath, header_format=header_format)
+
+        without_cache = bench(filepath, nb_reads, None)
+        with_cache = bench(filepath, nb_reads, rab.HeaderCache())
+        print(
+            "{} header, {} datasets, {} reads: {:.3f}s without cache, "
+            "{:.3f}s with cache".format(
+                header_format, nb_datasets, nb_reads, without_cache, with_cache
+            )
+        )
+        os.remove(filepath)
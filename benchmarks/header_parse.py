@@ -0,0 +1,76 @@
+"""
+Measures how long it takes to decode a header of 10, 10k and 1M entries, written in
+YAML or in JSON, with the decoder used by read() and with the pure-Python YAML
+loader that was used before.
+The pure-Python loader is skipped above 10k entries, where it takes minutes.
+
+Usage:
+    python benchmarks/header_parse.py [nb_entries ...]
+"""
+import sys
+import time
+import yaml
+import randomaccessbuffer as rab
+
+SIZES = [10, 10000, 1000000]
+SLOW_LOADER_MAX_ENTRIES = 10000
+
+YamlDumper = getattr(yaml, "CDumper", yaml.Dumper)
+
+
+def make_index(nb_entries):
+    return [
+        {
+            "name": "dataset {}".format(i),
+            "metadata": {"description": "some dataset", "index": i},
+            "codecMeta": {
+                "shape": [16, 16],
+                "strides": [16, 1],
+                "byteOrder": "C",
+                "byteOffset": i * 1024,
+                "byteLength": 1024,
+                "type": "float32",
+                "endianness": "little",
+                "compression": None,
+            },
+        }
+        for i in range(nb_entries)
+    ]
+
+
+def timeit(fn):
+    t0 = time.perf_counter()
+    fn()
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    sizes = [int(n) for n in sys.argv[1:]] or SIZES
+    writer = rab.RandomAccessBuffer()
+    reader = rab.RandomAccessBufferReader()
+
+    print(
+        "{:>10} {:>8} {:>12} {:>14} {:>14}".format(
+            "entries", "format", "size (MB)", "read() (s)", "yaml.Loader (s)"
+        )
+    )
+    for nb_entries in sizes:
+        index = make_index(nb_entries)
+        headers = {
+            # the writer uses the pure-Python dumper, which is too slow to build 1M entries
+            "yaml": ("\n" + yaml.dump(index, Dumper=YamlDumper, allow_unicode=True) + "\n"),
+            "json": writer._encodeHeader(index, "json").decode("utf-8"),
+        }
+
+        for header_format, header_str in headers.items():
+            fast = timeit(lambda: reader._decodeHeader(header_str))
+            slow = "skipped"
+            if nb_entries <= SLOW_LOADER_MAX_ENTRIES:
+                slow = "{:.4f}".format(
+                    timeit(lambda: yaml.load(header_str, Loader=yaml.Loader))
+                )
+            print(
+                "{:>10} {:>8} {:>12.1f} {:>14.4f} {:>14}".format(
+                    nb_entries, header_format, len(header_str) / 1e6, fast, slow
+                )
+            )
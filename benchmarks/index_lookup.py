@@ -0,0 +1,46 @@
+"""
+Measures the cost of adding datasets and of looking them up by name as the number
+of datasets in a RandomAccessBuffer grows. Both costs should stay flat: the index
+is backed by a name -> entry dictionary.
+
+Usage:
+    python benchmarks/index_lookup.py
+"""
+import time
+import numpy as np
+import randomaccessbuffer as rab
+
+SIZES = [1000, 10000, 50000]
+NB_LOOKUPS = 10000
+
+
+def bench(nb_datasets):
+    rabuff = rab.RandomAccessBuffer()
+    data = np.arange(4, dtype="int32")
+
+    t0 = time.perf_counter()
+    for i in range(nb_datasets):
+        rabuff.addDataset("dataset {}".format(i), data=data)
+    insert_time = time.perf_counter() - t0
+
+    names = ["dataset {}".format(i) for i in np.random.randint(0, nb_datasets, NB_LOOKUPS)]
+    t0 = time.perf_counter()
+    for name in names:
+        rabuff.hasDataset(name)
+        rabuff.getMetadata(name)
+        rabuff.getDatasetType(name)
+    lookup_time = time.perf_counter() - t0
+
+    rabuff.clean()
+    return (insert_time / nb_datasets, lookup_time / NB_LOOKUPS)
+
+
+if __name__ == "__main__":
+    print("{:>10} {:>18} {:>18}".format("datasets", "insert (µs/op)", "lookup (µs/op)"))
+    for nb_datasets in SIZES:
+        insert_time, lookup_time = bench(nb_datasets)
+        print(
+            "{:>10} {:>18.2f} {:>18.2f}".format(
+                nb_datasets, insert_time * 1e6, lookup_time * 1e6
+            )
+        )
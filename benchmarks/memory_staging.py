@@ -0,0 +1,43 @@
+"""
+Compares the time to write a RAB file made of many small datasets when they are staged
+in one temporary file each (the default) and when they are staged in memory, with a
+budget small enough for part of them to be moved to the scratch file.
+
+Usage:
+    python benchmarks/memory_staging.py [nb_datasets] [output_directory]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+
+def bench(filepath, datasets, memory_budget):
+    t0 = time.perf_counter()
+    with rab.RandomAccessBuffer(memory_budget=memory_budget) as rabuff:
+        for i, data in enumerate(datasets):
+            rabuff.addDataset("dataset {}".format(i), data=data)
+        rabuff.write(filepath)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    nb_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_memory_staging.rab")
+
+    datasets = [np.random.rand(np.random.randint(10, 2000)) for _ in range(nb_datasets)]
+    total_byte_size = sum(d.nbytes for d in datasets)
+
+    for (label, memory_budget) in [
+        ("temporary files", None),
+        ("in memory", total_byte_size),
+        ("half in memory", total_byte_size // 2),
+        ("scratch file only", 0),
+    ]:
+        duration = bench(filepath, datasets, memory_budget)
+        print("{} datasets, {}: {:.2f}s".format(nb_datasets, label, duration))
+
+    os.remove(filepath)
@@ -0,0 +1,50 @@
+"""
+Compares reading the same-shaped numerical datasets one after the other into new arrays
+and into a single array reused with getDataset(out=...).
+
+Usage:
+    python benchmarks/out_buffer.py [nb_timesteps] [output_directory]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+SHAPE = (256, 256, 64)
+
+
+def bench(filepath, nb_timesteps, compress, out):
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        t0 = time.perf_counter()
+        for i in range(nb_timesteps):
+            rabuff.getDataset("{} {}".format(compress, i), out=out)
+        return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    nb_timesteps = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_out_buffer.rab")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(nb_timesteps):
+            data = np.full(SHAPE, i, dtype="float32")
+            rabuff.addDataset("None {}".format(i), data=data)
+            rabuff.addDataset("gzip {}".format(i), data=data, compress="gzip")
+        rabuff.write(filepath)
+
+    out = np.empty(SHAPE, dtype="float32")
+    for compress in [None, "gzip"]:
+        print(
+            "compress={}, {} timesteps: new arrays {:.3f}s, out= {:.3f}s".format(
+                compress,
+                nb_timesteps,
+                bench(filepath, nb_timesteps, compress, None),
+                bench(filepath, nb_timesteps, compress, out),
+            )
+        )
+
+    os.remove(filepath)
@@ -0,0 +1,51 @@
+"""
+Writes an array stored in a np.memmap (compressed or not) into a RAB file and reports
+the time taken and the peak memory allocated while writing it (as traced by
+tracemalloc, the pages of the memmap are not included), which stays far below the
+size of the array since it is written piece by piece.
+
+Usage:
+    python benchmarks/out_of_core.py [array_size_in_GB] [output_directory]
+"""
+import os
+import sys
+import time
+import tracemalloc
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+
+if __name__ == "__main__":
+    size_gb = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    memmap_path = os.path.join(directory, "bench_out_of_core.npy")
+    filepath = os.path.join(directory, "bench_out_of_core.rab")
+
+    nb_rows = max(1, int(size_gb * 1024 ** 3) // (1024 * 4))
+    memmap = np.lib.format.open_memmap(
+        memmap_path, mode="w+", dtype="float32", shape=(nb_rows, 1024)
+    )
+    for start in range(0, nb_rows, 4096):
+        memmap[start : start + 4096] = np.arange(start, min(nb_rows, start + 4096))[
+            :, None
+        ]
+    memmap.flush()
+
+    for compress in [None, "gzip"]:
+        tracemalloc.start()
+        t0 = time.perf_counter()
+        with rab.RandomAccessBufferStreamWriter(filepath) as rabuff:
+            rabuff.addDataset("array", data=memmap, compress=compress)
+        duration = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(
+            "{:.2f} GB, compress={}: {:.2f}s, peak memory {:.1f} MB".format(
+                size_gb, compress, duration, peak / 1024 ** 2
+            )
+        )
+
+    del memmap
+    os.remove(memmap_path)
+    os.remove(filepath)
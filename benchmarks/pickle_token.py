@@ -0,0 +1,65 @@
+"""
+Measures what it costs to send a reader of a file with many datasets to a worker: the
+size of the pickled token, with and without the index, and the time it takes to get a
+first dataset from the unpickled reader, in a process where the header was never
+decoded (the header cache is emptied before each run).
+
+Usage:
+    python benchmarks/pickle_token.py [nb_datasets] [output_directory]
+"""
+import os
+import sys
+import time
+import pickle
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+NB_RUNS = 5
+
+
+def bench(data, load):
+    durations = []
+    for _ in range(NB_RUNS):
+        rab.HEADER_CACHE.invalidate()
+        t0 = time.perf_counter()
+        reader = load(data)
+        reader.getDataset("dataset 0")
+        durations.append(time.perf_counter() - t0)
+        reader.close()
+    return min(durations)
+
+
+def load_token(data):
+    return rab.RandomAccessBufferReader.fromToken(pickle.loads(data))
+
+
+if __name__ == "__main__":
+    nb_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_pickle_token.rab")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(nb_datasets):
+            rabuff.addDataset(
+                "dataset {}".format(i), data=np.arange(16), metadata={"i": i}
+            )
+        rabuff.write(filepath)
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        for label, data, load in [
+            ("reader", pickle.dumps(rabuff), pickle.loads),
+            (
+                "token with index",
+                pickle.dumps(rabuff.getToken(include_index=True)),
+                load_token,
+            ),
+        ]:
+            print(
+                "{} datasets, {}: {} bytes, first dataset in {:.4f}s".format(
+                    nb_datasets, label, len(data), bench(data, load)
+                )
+            )
+
+    os.remove(filepath)
@@ -0,0 +1,73 @@
+"""
+Has several worker processes get the same compressed lookup tables, each with its own
+decoded copy, then with a SharedDatasetCache where the first process to decode a table
+publishes it and the others map it.
+It reports the time taken by each round and the memory the processes allocated for the
+datasets (as seen by tracemalloc).
+
+Usage:
+    python benchmarks/shared_dataset_cache.py [nb_processes] [output_directory]
+"""
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+import randomaccessbuffer as rab
+from concurrent.futures import ProcessPoolExecutor
+
+NB_TABLES = 4
+
+
+def get_tables(filepath, shared):
+    cache = rab.SharedDatasetCache() if shared else None
+    tracemalloc.start()
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(filepath)
+        tables = [rabuff.getDataset("table {}".format(i))[0] for i in range(NB_TABLES)]
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the other workers keep their tables until the end of the round
+    time.sleep(0.5)
+    del tables
+    if cache is not None:
+        cache.close()
+    return allocated
+
+
+def bench(filepath, nb_processes, shared):
+    with ProcessPoolExecutor(nb_processes) as executor:
+        # start the processes before timing
+        list(executor.map(abs, range(nb_processes)))
+        t0 = time.perf_counter()
+        jobs = [
+            executor.submit(get_tables, filepath, shared) for _ in range(nb_processes)
+        ]
+        allocated = sum(job.result() for job in jobs)
+    return (time.perf_counter() - t0, allocated)
+
+
+if __name__ == "__main__":
+    nb_processes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_shared_dataset_cache.rab")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(NB_TABLES):
+            table = np.round(np.random.rand(1024, 1024), 2)
+            rabuff.addDataset("table {}".format(i), data=table, compress="gzip")
+        rabuff.write(filepath)
+
+    for shared in [False, True]:
+        (duration, allocated) = bench(filepath, nb_processes, shared)
+        print(
+            "{} processes, {}: {:.3f}s, {:.1f}MB allocated".format(
+                nb_processes,
+                "shared cache" if shared else "no cache",
+                duration,
+                allocated / 1024 / 1024,
+            )
+        )
+
+    os.remove(filepath)
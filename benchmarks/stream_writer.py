@@ -0,0 +1,50 @@
+"""
+Compares the time to write a multi-GB RAB file with RandomAccessBuffer.write(), which
+stages every dataset in a temporary file before copying it into the output, and with
+RandomAccessBufferStreamWriter, which writes each dataset once, at its final position.
+
+Usage:
+    python benchmarks/stream_writer.py [total_size_in_GB] [output_directory]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+DATASET_BYTE_SIZE = 256 * 1024 * 1024
+
+
+def datasets(total_byte_size):
+    for i in range(max(1, total_byte_size // DATASET_BYTE_SIZE)):
+        yield ("dataset {}".format(i), np.full(DATASET_BYTE_SIZE // 4, i, dtype="float32"))
+
+
+def bench_write(filepath, total_byte_size):
+    t0 = time.perf_counter()
+    with rab.RandomAccessBuffer() as rabuff:
+        for name, data in datasets(total_byte_size):
+            rabuff.addDataset(name, data=data)
+        rabuff.write(filepath)
+    return time.perf_counter() - t0
+
+
+def bench_stream(filepath, total_byte_size):
+    t0 = time.perf_counter()
+    with rab.RandomAccessBufferStreamWriter(filepath) as rabuff:
+        for name, data in datasets(total_byte_size):
+            rabuff.addDataset(name, data=data)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    total_byte_size = int(float(sys.argv[1] if len(sys.argv) > 1 else 2) * 1024 ** 3)
+    directory = sys.argv[2] if len(sys.argv) > 2 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "stream_writer.rab")
+
+    gb = total_byte_size / 1024 ** 3
+    for label, bench in [("write()", bench_write), ("stream writer", bench_stream)]:
+        elapsed = bench(filepath, total_byte_size)
+        print("{:>14}: {:.2f} s ({:.0f} MB/s)".format(label, elapsed, gb * 1024 / elapsed))
+        os.remove(filepath)
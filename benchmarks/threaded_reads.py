@@ -0,0 +1,59 @@
+"""
+Measures the throughput of a single RandomAccessBuffer instance shared by a pool of
+threads, each thread digging random values and reading random planes of a volume.
+Reads are positional (pread), so threads do not need a lock or a reader of their own.
+
+Usage:
+    python benchmarks/threaded_reads.py [path/to/temp/file.rab]
+"""
+import sys
+import os
+import time
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import randomaccessbuffer as rab
+
+SHAPE = (256, 256, 256)
+NB_QUERIES = 20000
+THREADS = [1, 2, 4, 8, 16]
+
+
+def create(filepath):
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("volume", data=np.random.rand(*SHAPE).astype("float32"))
+        rabuff.write(filepath)
+
+
+def bench(rabuff, nb_threads, positions):
+    def query(p):
+        rabuff.digNumericalDataset("volume", p)
+        rabuff.readSlice("volume", (p[0], p[1]))
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=nb_threads) as executor:
+        list(executor.map(query, positions))
+    return len(positions) / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    filepath = (
+        sys.argv[1]
+        if len(sys.argv) > 1
+        else os.path.join(tempfile.gettempdir(), "threaded_reads.rab")
+    )
+    create(filepath)
+
+    positions = np.stack(
+        [np.random.randint(0, size, NB_QUERIES) for size in SHAPE], axis=1
+    ).tolist()
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.read(filepath)
+        print("{:>8} {:>16}".format("threads", "queries/s"))
+        for nb_threads in THREADS:
+            print(
+                "{:>8} {:>16.0f}".format(nb_threads, bench(rabuff, nb_threads, positions))
+            )
+
+    os.remove(filepath)
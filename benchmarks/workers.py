@@ -0,0 +1,52 @@
+"""
+Compares the time to add and write many gzip compressed datasets, encoded on the
+calling thread or in a thread pool with RandomAccessBuffer(workers=N).
+
+Usage:
+    python benchmarks/workers.py [nb_datasets] [max_workers] [output_directory]
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+DATASET_SHAPE = (256, 1024)
+
+
+def bench(filepath, datasets, workers):
+    t0 = time.perf_counter()
+    with rab.RandomAccessBuffer(workers=workers) as rabuff:
+        for i, data in enumerate(datasets):
+            rabuff.addDataset("dataset {}".format(i), data=data, compress="gzip")
+        rabuff.write(filepath)
+    return time.perf_counter() - t0
+
+
+if __name__ == "__main__":
+    nb_datasets = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count()
+    directory = sys.argv[3] if len(sys.argv) > 3 else tempfile.gettempdir()
+    filepath = os.path.join(directory, "bench_workers.rab")
+
+    # noisy but still compressible data
+    datasets = [
+        np.round(np.random.rand(*DATASET_SHAPE), 2).astype("float32")
+        for _ in range(nb_datasets)
+    ]
+
+    reference = bench(filepath, datasets, None)
+    print("{} datasets, no workers: {:.2f}s".format(nb_datasets, reference))
+
+    workers = 1
+    while workers <= max_workers:
+        duration = bench(filepath, datasets, workers)
+        print(
+            "{} workers: {:.2f}s ({:.1f}x)".format(
+                workers, duration, reference / duration
+            )
+        )
+        workers *= 2
+
+    os.remove(filepath)
@@ -0,0 +1,137 @@
+"""
+    The AsyncRandomAccessBuffer module provides an asyncio interface to read RAB files.
+    The reads and the decoding run in a bounded pool of threads so that the event loop
+    is never blocked by disk I/O or by decompression.
+"""
+
+import asyncio
+import functools
+import concurrent.futures
+from randomaccessbuffer.RandomAccessBuffer import RandomAccessBufferReader
+
+
+class AsyncRandomAccessBuffer:
+    """
+    Reads a RAB file from asyncio code. It wraps a RandomAccessBufferReader: the methods
+    that read or decode data are coroutines that run in a thread pool of max_workers
+    threads (or in the executor given), the ones that only look at the header are not.
+
+    Many datasets can be read concurrently, eg. with asyncio.gather(). The pool bounds
+    how many are read at once, the others wait in its queue. A cancelled read that did
+    not start yet never runs, one that did start finishes in its thread but its result
+    is dropped and the cancellation is raised as usual.
+
+    The compressed datasets of getDatasets() are decoded in another pool of max_workers
+    threads, shared by all the calls, so that the number of threads stays bounded
+    however many calls run at once.
+
+    A DatasetCache can be given, see RandomAccessBufferReader.
+    """
+
+    def __init__(self, max_workers=4, executor=None, cache=None):
+        self._reader = RandomAccessBufferReader(cache=cache)
+        self._max_workers = max_workers
+        self._own_executor = executor is None
+        self._executor = executor or concurrent.futures.ThreadPoolExecutor(max_workers)
+        # a job of the executor waiting for other jobs of a full executor would never
+        # end, the datasets are decoded in a pool of their own
+        self._decode_executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self._pending_jobs = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _run(self, fn, *args, **kwargs):
+        """
+        Run fn in the executor and wait for its result without blocking the loop.
+        """
+        job = self._executor.submit(functools.partial(fn, *args, **kwargs))
+        self._pending_jobs.add(job)
+        job.add_done_callback(self._pending_jobs.discard)
+
+        # cancelling the asyncio future cancels the job, if it is not running yet
+        return await asyncio.wrap_future(job)
+
+    async def read(self, filepath, memory_map=False, binary_index=False):
+        """
+        Read from a file, given its path, see RandomAccessBufferReader.read().
+        """
+        await self._run(self._reader.read, filepath, memory_map, binary_index)
+
+    async def readFrom(self, source, memory_map=False):
+        """
+        Read from a buffer or a file object, see RandomAccessBufferReader.readFrom().
+        """
+        await self._run(self._reader.readFrom, source, memory_map)
+
+    async def close(self):
+        """
+        Wait for the reads still running, then close the file and the thread pools
+        created by this instance.
+        """
+        if self._pending_jobs:
+            await asyncio.gather(
+                *[asyncio.wrap_future(job) for job in list(self._pending_jobs)],
+                return_exceptions=True,
+            )
+
+        self._reader.close()
+        self._decode_executor.shutdown(wait=False)
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    def listDatasets(self):
+        return self._reader.listDatasets()
+
+    def hasDataset(self, dataset_name):
+        return self._reader.hasDataset(dataset_name)
+
+    def getMetadata(self, dataset_name):
+        return self._reader.getMetadata(dataset_name)
+
+    def getDatasetType(self, dataset_name):
+        return self._reader.getDatasetType(dataset_name)
+
+    def getTotalByteSize(self):
+        return self._reader.getTotalByteSize()
+
+    async def getDataset(self, dataset_name, out=None):
+        """
+        Get a dataset and its metadata, see RandomAccessBufferReader.getDataset().
+        When out is given and the read is cancelled, out may be partly filled.
+        """
+        return await self._run(self._reader.getDataset, dataset_name, out)
+
+    async def getDatasets(self, dataset_names, max_gap=65536):
+        """
+        Get several datasets at once with coalesced reads, see
+        RandomAccessBufferReader.getDatasets(). The read runs in the executor of this
+        instance and the compressed datasets are decoded in its decoding pool.
+        """
+        return await self._run(
+            self._reader.getDatasets,
+            dataset_names,
+            max_gap=max_gap,
+            executor=self._decode_executor,
+        )
+
+    async def digNumericalDataset(self, dataset_name, position):
+        return await self._run(
+            self._reader.digNumericalDataset, dataset_name, position
+        )
+
+    async def digNumericalDatasetBatch(self, dataset_name, positions, max_gap=4096):
+        return await self._run(
+            self._reader.digNumericalDatasetBatch, dataset_name, positions, max_gap
+        )
+
+    async def readSlice(self, dataset_name, key, max_gap=4096):
+        return await self._run(self._reader.readSlice, dataset_name, key, max_gap)
+
+    async def digInBuffer(self, dataset_name, byte_offset, byte_length):
+        return await self._run(
+            self._reader.digInBuffer, dataset_name, byte_offset, byte_length
+        )
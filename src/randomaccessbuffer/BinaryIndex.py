@@ -0,0 +1,271 @@
+"""
+    The BinaryIndex module reads and writes the optional binary index of a RAB file.
+    It is a sidecar file (the RAB file path followed by ".rabidx") that lets a reader
+    find a single dataset without decoding the whole YAML/JSON header.
+
+    Layout of the sidecar (little endian):
+    - Header: magic number, version, number of entries, size of the RAB file, byte
+      length of its header, inode and modification time of the RAB file (to detect a
+      stale index), then the offsets of the blocks below
+    - Types: JSON list of the dataset types, records refer to a type by its position
+    - Records: one fixed-size record per dataset, sorted by name (utf-8 bytes)
+    - Names: utf-8 dataset names, one after the other
+    - Entries: for each dataset, its JSON encoded codecMeta and metadata
+"""
+
+import os
+import mmap
+import json
+import struct
+from randomaccessbuffer import Tools
+
+MAGIC_NUMBER = b"rabidx"
+VERSION = 2
+SIDECAR_EXTENSION = ".rabidx"
+
+# magic, version, nb entries, RAB file size, RAB header byte length, RAB file inode,
+# RAB file modification time (ns), offsets of the types, records, names and entries
+# blocks
+HEADER = struct.Struct("<6sHQQIQqQQQQ")
+
+# name offset, byte offset, byte length, entry offset, position in the header,
+# name length, entry length, type code
+RECORD = struct.Struct("<QQQQQIIH6x")
+
+
+def getSidecarPath(filepath):
+    """
+    Get the path of the binary index that goes with a RAB file.
+
+    Args:
+        filepath (string): path of the RAB file
+
+    Returns:
+        string
+    """
+    return os.fsdecode(filepath) + SIDECAR_EXTENSION
+
+
+def writeBinaryIndex(filepath, index, rab_file_identity, header_byte_length):
+    """
+    Write the binary index of a RAB file.
+
+    Args:
+        filepath (string): path of the sidecar file to write
+        index (list): the entries of the RAB header, in the order of the header
+        rab_file_identity (tuple): identity of the RAB file once written, as given by
+            Tools.getFileIdentity
+        header_byte_length (int): byte length of the header of the RAB file
+    """
+    (_, _, rab_file_inode, rab_file_size, rab_file_mtime_ns) = rab_file_identity
+    types = []
+    type_codes = {}
+    names = []
+    entries = []
+
+    for entry in index:
+        dataset_type = entry["codecMeta"]["type"]
+        if dataset_type not in type_codes:
+            type_codes[dataset_type] = len(types)
+            types.append(dataset_type)
+
+        names.append(entry["name"].encode("utf-8"))
+        entries.append(
+            json.dumps(
+                {"codecMeta": entry["codecMeta"], "metadata": entry["metadata"]},
+                ensure_ascii=False,
+                cls=Tools.CustomJsonEncoder,
+            ).encode("utf-8")
+        )
+
+    # records are sorted by name so that they can be binary searched
+    sorted_positions = sorted(range(len(index)), key=lambda i: names[i])
+    types_bytes = json.dumps(types).encode("utf-8")
+
+    name_offsets = []
+    entry_offsets = []
+    name_offset = 0
+    entry_offset = 0
+    for i in range(len(index)):
+        name_offsets.append(name_offset)
+        entry_offsets.append(entry_offset)
+        name_offset += len(names[i])
+        entry_offset += len(entries[i])
+
+    types_offset = HEADER.size
+    records_offset = types_offset + len(types_bytes)
+    names_offset = records_offset + RECORD.size * len(index)
+    entries_offset = names_offset + name_offset
+
+    with open(filepath, "wb") as f:
+        f.write(
+            HEADER.pack(
+                MAGIC_NUMBER,
+                VERSION,
+                len(index),
+                rab_file_size,
+                header_byte_length,
+                rab_file_inode,
+                rab_file_mtime_ns,
+                types_offset,
+                records_offset,
+                names_offset,
+                entries_offset,
+            )
+        )
+        f.write(types_bytes)
+
+        f.write(
+            b"".join(
+                RECORD.pack(
+                    name_offsets[i],
+                    index[i]["codecMeta"]["byteOffset"],
+                    index[i]["codecMeta"]["byteLength"],
+                    entry_offsets[i],
+                    i,
+                    len(names[i]),
+                    len(entries[i]),
+                    type_codes[index[i]["codecMeta"]["type"]],
+                )
+                for i in sorted_positions
+            )
+        )
+        f.write(b"".join(names))
+        f.write(b"".join(entries))
+
+
+class BinaryIndex:
+    """
+    Read-only access to the binary index of a RAB file. The sidecar is memory-mapped
+    and a dataset is found by binary search, only its own entry is decoded.
+    """
+
+    def __init__(self, filepath):
+        with open(filepath, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (
+            magic,
+            version,
+            self._nb_entries,
+            self.rab_file_size,
+            self.header_byte_length,
+            self.rab_file_inode,
+            self.rab_file_mtime_ns,
+            types_offset,
+            self._records_offset,
+            self._names_offset,
+            self._entries_offset,
+        ) = HEADER.unpack_from(self._mmap, 0)
+
+        if magic != MAGIC_NUMBER or version != VERSION:
+            self.close()
+            raise ValueError("The file is not a RandomAccessBuffer binary index.")
+
+        self._types = json.loads(self._mmap[types_offset : self._records_offset])
+
+    @classmethod
+    def open(cls, rab_filepath, rab_file_identity, header_byte_length):
+        """
+        Open the binary index of a RAB file, if there is one and if it is up to date:
+        it is written along with the RAB file, which must not have been modified or
+        replaced since.
+
+        Args:
+            rab_filepath (string): path of the RAB file
+            rab_file_identity (tuple): current identity of the RAB file, as given by
+                Tools.getFileIdentity
+            header_byte_length (int): byte length of the header of the RAB file
+
+        Returns:
+            BinaryIndex: or None if there is no valid index for this RAB file
+        """
+        sidecar_path = getSidecarPath(rab_filepath)
+        if not os.path.isfile(sidecar_path):
+            return None
+
+        try:
+            binary_index = cls(sidecar_path)
+        except (ValueError, struct.error):
+            return None
+
+        (_, _, rab_file_inode, rab_file_size, rab_file_mtime_ns) = rab_file_identity
+        if (
+            binary_index.rab_file_size != rab_file_size
+            or binary_index.header_byte_length != header_byte_length
+            or binary_index.rab_file_inode != rab_file_inode
+            or binary_index.rab_file_mtime_ns != rab_file_mtime_ns
+        ):
+            binary_index.close()
+            return None
+
+        return binary_index
+
+    def __len__(self):
+        return self._nb_entries
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def _getRecord(self, i):
+        return RECORD.unpack_from(self._mmap, self._records_offset + i * RECORD.size)
+
+    def _getName(self, record):
+        start = self._names_offset + record[0]
+        return self._mmap[start : start + record[5]]
+
+    def _find(self, dataset_name):
+        """
+        Binary search of a dataset by name, returns its record or None.
+        """
+        name = dataset_name.encode("utf-8")
+        low = 0
+        high = self._nb_entries
+
+        while low < high:
+            middle = (low + high) // 2
+            record = self._getRecord(middle)
+            middle_name = self._getName(record)
+            if middle_name == name:
+                return record
+            elif middle_name < name:
+                low = middle + 1
+            else:
+                high = middle
+
+        return None
+
+    def hasDataset(self, dataset_name):
+        return self._find(dataset_name) is not None
+
+    def getEntry(self, dataset_name):
+        """
+        Get the entry (name, metadata and codecMeta) of a dataset, or None.
+        """
+        record = self._find(dataset_name)
+        if record is None:
+            return None
+
+        start = self._entries_offset + record[3]
+        entry = json.loads(self._mmap[start : start + record[6]])
+        entry["name"] = dataset_name
+        return entry
+
+    def getDatasetType(self, dataset_name):
+        record = self._find(dataset_name)
+        if record is None:
+            return None
+        return self._types[record[7]]
+
+    def listDatasets(self):
+        """
+        Names of all the datasets, in the order of the RAB header.
+        """
+        records = [self._getRecord(i) for i in range(self._nb_entries)]
+        records.sort(key=lambda record: record[4])
+        return [self._getName(record).decode("utf-8") for record in records]
+
+    def getTotalByteSize(self):
+        return sum(self._getRecord(i)[2] for i in range(self._nb_entries))
@@ -0,0 +1,173 @@
+"""
+    The DatasetCache module keeps decoded datasets in memory so that getting the same
+    dataset again does not read, decompress and decode it again.
+"""
+
+import sys
+import copy
+import mmap
+import threading
+import collections
+import numpy as np
+import pandas as pd
+
+
+class DatasetCache:
+    """
+    A least recently used cache of decoded datasets, bounded by their byte size.
+    A cache is given to one or more readers (see RandomAccessBufferReader), a single
+    instance shared by all the readers of a program makes a process-wide cache. Its
+    entries are keyed by the identity of the file (path, inode, size, modification
+    time) and the dataset name, so a file that is rewritten is never served from stale
+    entries.
+
+    Cached data must never be modified: Numpy arrays are returned read-only, bytes and
+    text are immutable, while objects and dataframes are returned as copies, which is
+    still much faster than decoding them again.
+
+    The number of hits, misses and evictions are kept in the attributes of the same
+    names, see also getStats().
+    """
+
+    def __init__(self, max_byte_size=256 * 1024 * 1024):
+        """
+        Args:
+            max_byte_size (int): the cache evicts the least recently used datasets
+                whenever the datasets it holds take more than that. Datasets larger
+                than that are never cached.
+        """
+        self._max_byte_size = max_byte_size
+        self._entries = collections.OrderedDict()  # key -> (data, byte size)
+        self._byte_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def canCache(self, dataset_type):
+        """
+        Tell if the datasets of a type can be cached, they all can.
+        """
+        return True
+
+    def get(self, key):
+        """
+        Get a cached dataset, raise a KeyError when it is not in the cache.
+        """
+        with self._lock:
+            cached = self._entries.get(key, None)
+            if cached is None:
+                self.misses += 1
+                raise KeyError(key)
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        return self._serve(cached[0])
+
+    def put(self, key, data):
+        """
+        Add a dataset to the cache, evicting the least recently used ones if needed.
+        Returns what the caller should use instead of data: a read-only array, a copy
+        of an object...
+        An array that is a view of a larger buffer is copied, so that the cache does not
+        keep the whole buffer alive without counting it.
+        """
+        if isinstance(data, np.ndarray):
+            if isViewOfLargerBuffer(data):
+                data = data.copy()
+            data.flags.writeable = False
+        byte_size = getByteSize(data)
+
+        with self._lock:
+            if key in self._entries:
+                self._byte_size -= self._entries.pop(key)[1]
+
+            if byte_size <= self._max_byte_size:
+                self._entries[key] = (data, byte_size)
+                self._byte_size += byte_size
+
+            while self._byte_size > self._max_byte_size:
+                (_, (_, evicted_byte_size)) = self._entries.popitem(last=False)
+                self._byte_size -= evicted_byte_size
+                self.evictions += 1
+
+        return self._serve(data)
+
+    def invalidate(self, file_identity=None):
+        """
+        Remove the datasets of a file from the cache (file_identity as given by
+        Tools.getFileIdentity), or all of them.
+        """
+        with self._lock:
+            if file_identity is None:
+                self._entries.clear()
+                self._byte_size = 0
+                return
+
+            for key in [key for key in self._entries if key[0] == file_identity]:
+                self._byte_size -= self._entries.pop(key)[1]
+
+    def getStats(self):
+        """
+        Get the counters of the cache, as a dictionary.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "nbDatasets": len(self._entries),
+                "byteSize": self._byte_size,
+                "maxByteSize": self._max_byte_size,
+            }
+
+    def _serve(self, data):
+        """
+        Get what is returned for cached data: mutable objects are copied.
+        """
+        if isinstance(data, pd.DataFrame):
+            return data.copy(deep=True)
+        if isinstance(data, (dict, list)):
+            return copy.deepcopy(data)
+        return data
+
+
+def isViewOfLargerBuffer(arr):
+    """
+    Tell if an array is a view of a buffer larger than itself, such as a slice of a
+    read that covers several datasets. Views of memory-mapped files do not count, their
+    memory is the page cache.
+    """
+    base = arr
+    while isinstance(base, np.ndarray) and base.base is not None:
+        base = base.base
+    while isinstance(base, memoryview):
+        base = base.obj
+
+    if base is arr or isinstance(base, mmap.mmap):
+        return False
+
+    try:
+        return memoryview(base).nbytes > arr.nbytes
+    except TypeError:
+        return False
+
+
+def getByteSize(data):
+    """
+    Get the approximate memory footprint of decoded data, in bytes.
+    """
+    if isinstance(data, np.ndarray):
+        return data.nbytes
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return memoryview(data).nbytes
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=True, deep=True).sum())
+    if isinstance(data, dict):
+        return sys.getsizeof(data) + sum(
+            getByteSize(key) + getByteSize(value) for key, value in data.items()
+        )
+    if isinstance(data, (list, tuple)):
+        return sys.getsizeof(data) + sum(getByteSize(value) for value in data)
+    return sys.getsizeof(data)
@@ -0,0 +1,99 @@
+"""
+    The HeaderCache module keeps the decoded headers of RAB files in memory, so that
+    reading the same file again does not decode its header again.
+"""
+
+import os
+import threading
+import collections
+
+
+class HeaderCache:
+    """
+    A least recently used cache of decoded headers, shared by the readers of a process
+    (see HEADER_CACHE). A header is cached along with the identity of its file (see
+    Tools.getFileIdentity): when the file is rewritten or replaced, its identity
+    changes and the cached header is dropped instead of being used.
+
+    The cache is bounded by a number of headers and by the total byte length of the
+    encoded headers, which is roughly proportional to the memory taken once decoded.
+    """
+
+    def __init__(self, max_nb_headers=256, max_byte_size=256 * 1024 * 1024):
+        self._max_nb_headers = max_nb_headers
+        self._max_byte_size = max_byte_size
+        # path -> (file identity, header, header byte length)
+        self._headers = collections.OrderedDict()
+        self._byte_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, file_identity):
+        """
+        Get the header cached for a file, or None.
+        """
+        path = file_identity[0]
+        with self._lock:
+            cached = self._headers.get(path, None)
+            if cached is None or cached[0] != file_identity:
+                # the file was rewritten since
+                if cached is not None:
+                    self._remove(path)
+                self.misses += 1
+                return None
+
+            self._headers.move_to_end(path)
+            self.hits += 1
+            return cached[1]
+
+    def put(self, file_identity, header, header_byte_length):
+        """
+        Cache the header of a file, evicting the least recently used ones if needed.
+        """
+        path = file_identity[0]
+        with self._lock:
+            if path in self._headers:
+                self._remove(path)
+
+            if header_byte_length > self._max_byte_size:
+                return
+
+            self._headers[path] = (file_identity, header, header_byte_length)
+            self._byte_size += header_byte_length
+
+            while (
+                len(self._headers) > self._max_nb_headers
+                or self._byte_size > self._max_byte_size
+            ):
+                self._remove(next(iter(self._headers)))
+
+    def invalidate(self, filepath=None):
+        """
+        Remove the header of a file from the cache, or all of them.
+        """
+        with self._lock:
+            if filepath is None:
+                self._headers.clear()
+                self._byte_size = 0
+            elif os.path.abspath(filepath) in self._headers:
+                self._remove(os.path.abspath(filepath))
+
+    def getStats(self):
+        """
+        Get the counters of the cache, as a dictionary.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "nbHeaders": len(self._headers),
+                "byteSize": self._byte_size,
+            }
+
+    def _remove(self, path):
+        self._byte_size -= self._headers.pop(path)[2]
+
+
+# The cache used by default by all the readers of the process
+HEADER_CACHE = HeaderCache()
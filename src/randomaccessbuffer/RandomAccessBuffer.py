@@ -4,21 +4,35 @@
     fit in memory
 """
 
+import io
 import os
+import mmap
 import zlib
 import shutil
 import json
 import yaml
+import pickle
 import numpy as np
 import pandas as pd
-import copy
 import struct
+import itertools
+import threading
+import concurrent.futures
 from randomaccessbuffer import Tools
+from randomaccessbuffer import BinaryIndex
+from randomaccessbuffer.HeaderCache import HEADER_CACHE
 from randomaccessbuffer.Dotdict import Dotdict
 from randomaccessbuffer.__version__ import __version__
 
 MAGIC_NUMBER = "rab"
 
+# The header can be written in YAML (default) or in JSON, which is also valid YAML 1.2
+# and much faster to parse
+HEADER_FORMATS = ["yaml", "json"]
+
+# The C implementation of the YAML loader (libyaml) is much faster, when available
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 TYPES = Dotdict(
     {
         "BUFFER": "bytes",
@@ -47,7 +61,7 @@ TYPES = Dotdict(
 
 SHORT_NUMERICAL_TYPES = Dotdict(
     {
-        "bool": "b",
+        "bool": "b1",
         "int8": "i1",
         "uint8": "u1",
         "int16": "i2",
@@ -85,72 +99,565 @@ UNPACK_TYPES = Dotdict(
 
 NO_ENDIANESS = "na"
 
+# Numerical datasets split into N-dimensional chunks that are compressed separately
+CHUNKED_LAYOUT = "chunked"
+
+# readSlice never reads more than that at once to skip the gaps between the values of a
+# slice, larger slices are read in several parts
+SLICE_READ_BYTE_LENGTH = 16 * 1024 * 1024
+
+# properties of the index entries that only exist while writing
+STAGING_KEYS = ["filePath", "scratchOffset"]
+
 SHORT_ENDIANNESS = Dotdict(
     {"little": "<", "big": ">", NO_ENDIANESS: "<"}  # this is used for int8 and uint8
 )
 
 
-class RandomAccessBuffer:
-    def __init__(self):
-        # print("version", __version__)
-        self._working_dir = Tools.createWorkingDir()
-        # print("working dir", self._working_dir)
+def _decodeDatasetsInProcess(filepath, data_byte_offset, codec_metas):
+    """
+    Decode some datasets of a RAB file in a worker process (see getDatasets). The file
+    is opened again and the datasets are read with positional reads, so that only their
+    codecMeta are sent to the worker and only the decoded datasets are sent back.
+    """
+    with RandomAccessBufferReader() as reader:
+        reader._setFile(open(filepath, "rb"))
+        reader._filepath = filepath
+        reader._data_byte_offset = data_byte_offset
+        return [reader._decodeDataset(codec_meta) for codec_meta in codec_metas]
+
+
+def _decodeRawDatasetInProcess(codec_meta, raw):
+    """
+    Decode a dataset in a worker process from its stored bytes, for the RAB that are
+    not read from a file the worker could open (see getDatasets).
+    """
+    with RandomAccessBufferReader() as reader:
+        return reader._decodeDataset(codec_meta, raw=raw)
+
+
+class RandomAccessBufferReader:
+    """
+    Read-only access to a RAB file. Contrary to RandomAccessBuffer, a reader does
+    not create any temporary resource (working dir) and is cheap to instantiate.
+
+    With a cache (see DatasetCache, or SharedDatasetCache to share the datasets
+    between processes), the datasets returned by getDataset and getDatasets are kept
+    once decoded, and served from the cache the next times.
+
+    The decoded headers are kept in header_cache (by default, the one shared by the
+    whole process) so that reading a file again only costs a stat, as long as it was
+    not modified. None disables it.
+    """
+
+    def __init__(self, cache=None, header_cache=HEADER_CACHE):
         self._rab_index = []
+        # name -> entry, kept in sync with self._rab_index for constant time lookups
+        self._rab_index_by_name = {}
         self._data_byte_offset = None
-        self._filepath = None  # for reading
-        self._onDone = None
-
-    def onDone(self, fn):
-        self._onDone = fn
+        self._filepath = None
+        self._file_identity = None  # identifies the file in the cache
+        self._cache = cache
+        self._header_cache = header_cache
+        self._file = None  # kept open from read() until close()
+        self._owns_file = True  # False for a file object given to readFrom()
+        self._file_fd = None  # when positional reads can be made on the file
+        # when the file is memory-mapped, or a read-only memoryview of the RAB when it
+        # is read from a buffer
+        self._mmap = None
+        self._binary_index = None  # when the entries are looked up in a .rabidx sidecar
+        # only used where positional reads are not available (Windows)
+        self._file_lock = threading.Lock()
+        # the token of an unpickled reader, until the file is opened (see getToken)
+        self._token = None
+        self._token_lock = threading.RLock()
+        self._opening_token = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Leaving a with block closes the file being read
+        """
+        self.close()
 
     def __del__(self):
+        self.close()
+
+    def __reduce__(self):
         """
-        When the destructor is called, we delete the working dir and its content
+        A reader is pickled as its token with the index, see getToken(). When the
+        entries are looked up in a .rabidx sidecar, the workers read it as well and
+        the index is left out. A reader whose token is not opened yet is pickled as
+        this token.
         """
-        self.clean()
+        token = self._token
+        if token is None:
+            token = self.getToken(include_index=self._binary_index is None)
+        return (RandomAccessBufferReader.fromToken, (token,))
 
-        if self._onDone:
-            self._onDone()
+    def getToken(self, include_index=False):
+        """
+        Get a small picklable token of the file being read, to send to other processes
+        (eg. multiprocessing or dask workers) rather than the reader itself. The token
+        holds the path and the identity of the file (see Tools.getFileIdentity) and,
+        with include_index, the whole index in a compact binary form, so that the
+        header never has to be decoded again. Pickling a reader pickles its token with
+        the index. The token without the index is much smaller, the header is then
+        decoded once per process at most thanks to the header cache: send it rather
+        than the reader when the workers only read a few datasets. See fromToken().
+        """
+        if self._token is not None and (not include_index or self._token["index"]):
+            return self._token
+        self._openToken()
+
+        if self._filepath is None:
+            raise ValueError("Only a reader of a file can be turned into a token.")
+
+        index = None
+        if include_index:
+            entries = [self._getEntry(name) for name in self.listDatasets()]
+            index = zlib.compress(pickle.dumps(entries, pickle.HIGHEST_PROTOCOL))
+
+        return {
+            "fileIdentity": self._file_identity,
+            "memoryMap": self._mmap is not None,
+            "binaryIndex": self._binary_index is not None,
+            "dataByteOffset": self._data_byte_offset,
+            "index": index,
+        }
+
+    @classmethod
+    def fromToken(cls, token, cache=None):
+        """
+        Create a reader from a token (see getToken). The file is only opened, and its
+        index loaded, when the reader is first used. A ValueError is raised then if
+        the file was modified since the token was created.
+        """
+        reader = RandomAccessBufferReader(cache=cache)
+        reader._token = token
+        return reader
+
+    def _openToken(self):
+        """
+        Open the file of the token the reader was created from, if not done yet.
+        """
+        if self._token is None:
+            return
+
+        # the other threads wait until the file is open and the index is loaded, the
+        # thread opening it goes through here again when reading the header
+        with self._token_lock:
+            if self._token is None or self._opening_token:
+                return
+            token = self._token
+            filepath = token["fileIdentity"][0]
+
+            self._opening_token = True
+            try:
+                if token["index"] is None:
+                    self._read(filepath, token["memoryMap"], token["binaryIndex"])
+                else:
+                    self._openIndexedToken(token)
+            finally:
+                self._opening_token = False
+
+            if tuple(self._file_identity) != tuple(token["fileIdentity"]):
+                self.close()
+                raise ValueError(
+                    "The file {} was modified since the token was created.".format(
+                        filepath
+                    )
+                )
+            self._token = None
+
+    def _openIndexedToken(self, token):
+        """
+        Open the file of a token that holds the index, which is used as is.
+        """
+        filepath = token["fileIdentity"][0]
+        self.close()
+        self._setFile(open(filepath, "rb"))
+        self._filepath = filepath
+        self._file_identity = Tools.getFileIdentity(filepath, self._file)
+        self._setIndex(pickle.loads(zlib.decompress(token["index"])))
+        self._data_byte_offset = token["dataByteOffset"]
+        if token["memoryMap"]:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
 
     def listDatasets(self):
+        self._openToken()
+        if self._binary_index is not None:
+            return self._binary_index.listDatasets()
+
         names = []
         for entry in self._rab_index:
             names.append(entry["name"])
         return names
 
-    def _getDatasetAsByte(self, codec_meta):
+    def _getDatasetAsByte(self, codec_meta, zero_copy=False, raw=None):
         """
         Extract a dataset buffer (bytes) in an agnostic way, returns it.
+        With zero_copy, an uncompressed dataset of a memory-mapped file is returned as
+        a read-only memoryview of the mapping rather than as bytes.
         """
-        byte_offset = self._data_byte_offset + codec_meta["byteOffset"]
-        f = open(self._filepath, "rb")
-        f.seek(byte_offset)
-        buffer = f.read(codec_meta["byteLength"])
-        f.close()
+        buffer = self._readDatasetView(codec_meta, 0, codec_meta["byteLength"], raw)
 
         # decompress the buffer if necessary
         if "compression" in codec_meta and codec_meta["compression"] == "gzip":
             buffer = zlib.decompress(buffer)
+        elif isinstance(buffer, memoryview) and not (
+            zero_copy and self._mmap is not None
+        ):
+            buffer = buffer.tobytes()
         return buffer
 
-    def _getNumericalDataset(self, codec_meta):
-        buffer = self._getDatasetAsByte(codec_meta)
-        # The short type can be prepended with a < or > to add endianness info
-        short_type = (
-            SHORT_ENDIANNESS[codec_meta["endianness"]]
-            + SHORT_NUMERICAL_TYPES[codec_meta["type"]]
+    def _readDatasetView(self, codec_meta, start, byte_length, raw=None):
+        """
+        Get byte_length bytes of a dataset as it is stored, from start (relative to the
+        dataset). They are sliced from raw, the whole stored dataset, when it was
+        already fetched (see getDatasets), and read from the file otherwise.
+        """
+        if raw is not None:
+            return raw[start : start + byte_length]
+
+        byte_offset = self._data_byte_offset + codec_meta["byteOffset"] + start
+        return self._readView(byte_offset, byte_length)
+
+    def _readBytes(self, byte_offset, byte_length):
+        """
+        Read byte_length bytes of the file, starting at byte_offset from the very
+        begining of the file.
+        Reads are positional and do not move a shared file cursor, so a single instance
+        can be read from multiple threads at once.
+        """
+        if self._mmap is not None:
+            return bytes(self._mmap[byte_offset : byte_offset + byte_length])
+
+        f = self._getFile()
+
+        if self._file_fd is None:
+            # seek and read must not be interleaved between threads
+            with self._file_lock:
+                f.seek(byte_offset)
+                return f.read(byte_length)
+
+        return Tools.pread(self._file_fd, byte_offset, byte_length)
+
+    def _readView(self, byte_offset, byte_length):
+        """
+        Same as _readBytes but when the file is memory-mapped, the result is a read-only
+        memoryview of the mapping and no copy is made.
+        """
+        if self._mmap is not None:
+            return memoryview(self._mmap)[byte_offset : byte_offset + byte_length]
+
+        return self._readBytes(byte_offset, byte_length)
+
+    def _readInto(self, byte_offset, out):
+        """
+        Same as _readBytes, but the bytes are read into out, a writable buffer that is
+        filled completely, without allocating anything.
+        """
+        out = memoryview(out).cast("B")
+
+        if self._mmap is not None:
+            view = memoryview(self._mmap)[byte_offset : byte_offset + len(out)]
+            read_length = len(view)
+            out[:read_length] = view
+            view.release()
+        else:
+            read_length = self._readFileInto(byte_offset, out)
+
+        if read_length != len(out):
+            raise ValueError("The file ends before the end of the dataset.")
+
+    def _readFileInto(self, byte_offset, out):
+        """
+        Read the file into out, a memoryview, until it is full or the file ends.
+        Returns the number of bytes read.
+        """
+        f = self._getFile()
+        if Tools.HAS_PREADV and self._file_fd is not None:
+            return Tools.preadInto(self._file_fd, byte_offset, out)
+
+        # seek and read must not be interleaved between threads
+        with self._file_lock:
+            f.seek(byte_offset)
+            read_length = 0
+            while read_length < len(out):
+                n = f.readinto(out[read_length:])
+                if not n:
+                    break
+                read_length += n
+        return read_length
+
+    def _getFile(self):
+        """
+        Get the handle of the file being read.
+        """
+        self._openToken()
+        if self._file is None:
+            raise ValueError("No file is open for reading, call read() first.")
+        return self._file
+
+    def _setFile(self, f, owns_file=True):
+        """
+        Set the file being read. Positional reads are made on its file descriptor when
+        it is a regular file, so that it can be read from several threads at once. A
+        file not owned by the reader is not closed with it.
+        """
+        self._file = f
+        self._owns_file = owns_file
+        self._file_fd = None
+        if Tools.HAS_PREAD and isinstance(getattr(f, "raw", f), io.FileIO):
+            self._file_fd = f.fileno()
+
+    def _closeMemoryMap(self):
+        """
+        Release the memory map of the file, if any. Arrays and memoryviews returned
+        earlier keep the mapping alive until they are garbage collected.
+        """
+        if self._mmap is None:
+            return
+
+        # a buffer given to read() is left to the garbage collector
+        if isinstance(self._mmap, mmap.mmap):
+            try:
+                self._mmap.close()
+            except BufferError:
+                # some views are still exported, the mapping is released with the last
+                pass
+        self._mmap = None
+
+    def _getNumericalDataset(self, codec_meta, out=None, raw=None):
+        if out is not None:
+            self._checkOutArray(codec_meta, out)
+
+        if codec_meta.get("layout", None) == CHUNKED_LAYOUT:
+            return self._getChunkedNumericalDataset(codec_meta, out, raw)
+
+        # out is C-contiguous, the values stored in F order are copied there in C order
+        order = codec_meta.get("byteOrder", "C")
+        if out is not None and order == "F" and len(codec_meta["shape"]) > 1:
+            out.reshape(codec_meta["shape"])[...] = self._getNumericalDataset(
+                codec_meta, raw=raw
+            )
+            return out
+
+        if codec_meta.get("compression", None) == "gzip":
+            # decompressed piece by piece right into the array, rather than next to it
+            arr = out
+            if arr is None:
+                arr = np.empty(
+                    codec_meta["shape"],
+                    dtype=self._getNumpyDtype(codec_meta),
+                    order=order,
+                )
+            self._decompressInto(codec_meta, arr.reshape(-1, order="A"), raw)
+            return arr
+
+        if out is not None:
+            self._readInto(self._data_byte_offset + codec_meta["byteOffset"], out)
+            return out
+
+        buffer = self._readDatasetView(codec_meta, 0, codec_meta["byteLength"], raw)
+        arr = np.frombuffer(buffer, dtype=self._getNumpyDtype(codec_meta))
+        return arr.reshape(codec_meta["shape"], order=order)
+
+    def _checkOutArray(self, codec_meta, out):
+        """
+        Check that an array can receive a whole numerical dataset: it must have the
+        same dtype and number of elements, and be writable and C-contiguous.
+        """
+        dtype = self._getNumpyDtype(codec_meta)
+        size = int(np.prod(codec_meta["shape"]))
+
+        if not isinstance(out, np.ndarray):
+            raise ValueError("The output of a numerical dataset must be a Numpy array.")
+
+        if out.dtype != dtype:
+            raise ValueError(
+                "The output array must be of dtype {}, not {}.".format(
+                    dtype.str, out.dtype.str
+                )
+            )
+
+        if out.size != size:
+            raise ValueError(
+                "The output array must have {} elements, not {}.".format(size, out.size)
+            )
+
+        if not out.flags.writeable or not out.flags.c_contiguous:
+            raise ValueError("The output array must be writable and C-contiguous.")
+
+    def _getBuffer(self, codec_meta, out):
+        """
+        Read a bytes dataset into out, a writable buffer (bytearray, uint8 array...) of
+        the size of the dataset, once decompressed.
+        """
+        try:
+            view = memoryview(out)
+        except TypeError:
+            raise ValueError("The output of a bytes dataset must be a writable buffer.")
+
+        if view.readonly or not view.c_contiguous:
+            raise ValueError("The output buffer must be writable and contiguous.")
+
+        if codec_meta.get("compression", None) == "gzip":
+            # the size is checked as the dataset is decompressed
+            self._decompressInto(codec_meta, out)
+            return out
+
+        if view.nbytes != codec_meta["byteLength"]:
+            raise ValueError(
+                "The output buffer must be of {} bytes, not {}.".format(
+                    codec_meta["byteLength"], view.nbytes
+                )
+            )
+
+        self._readInto(self._data_byte_offset + codec_meta["byteOffset"], out)
+        return out
+
+    def _decompressInto(self, codec_meta, out, raw=None):
+        """
+        Read a compressed dataset a block at a time and decompress it straight into
+        out, a writable buffer of the size of the decompressed dataset.
+        """
+        byte_length = codec_meta["byteLength"]
+        block_size = Tools.DECOMPRESS_BLOCK_SIZE
+
+        pieces = (
+            self._readDatasetView(
+                codec_meta, start, min(block_size, byte_length - start), raw
+            )
+            for start in range(0, byte_length, block_size)
+        )
+        return Tools.decompressInto(pieces, out)
+
+    def _getChunkGridShape(self, codec_meta):
+        """
+        Number of chunks along each dimension of a chunked numerical dataset.
+        """
+        return [
+            -(-size // chunk_size)
+            for size, chunk_size in zip(codec_meta["shape"], codec_meta["chunks"])
+        ]
+
+    def _getChunk(self, codec_meta, chunk_coords, raw=None):
+        """
+        Read and decompress a single chunk of a chunked numerical dataset.
+        Chunks on the upper edges of the dataset can be smaller than the chunk shape.
+        """
+        chunk_index = int(
+            np.ravel_multi_index(chunk_coords, self._getChunkGridShape(codec_meta))
+        )
+        buffer = zlib.decompress(
+            self._readDatasetView(
+                codec_meta,
+                codec_meta["chunkByteOffsets"][chunk_index],
+                codec_meta["chunkByteLengths"][chunk_index],
+                raw,
+            )
+        )
+
+        chunk_shape = [
+            min(chunk_size, size - c * chunk_size)
+            for c, chunk_size, size in zip(
+                chunk_coords, codec_meta["chunks"], codec_meta["shape"]
+            )
+        ]
+        return np.frombuffer(buffer, dtype=self._getNumpyDtype(codec_meta)).reshape(
+            chunk_shape, order=codec_meta["byteOrder"]
+        )
+
+    def _getChunkedNumericalDataset(self, codec_meta, out=None, raw=None):
+        """
+        Assemble a whole chunked numerical dataset, one chunk at a time, in a new array
+        or in out.
+        """
+        if out is None:
+            arr = np.empty(codec_meta["shape"], dtype=self._getNumpyDtype(codec_meta))
+        else:
+            arr = out.reshape(codec_meta["shape"])
+        chunks = codec_meta["chunks"]
+
+        for chunk_coords in np.ndindex(*self._getChunkGridShape(codec_meta)):
+            region = tuple(
+                slice(c * chunk_size, (c + 1) * chunk_size)
+                for c, chunk_size in zip(chunk_coords, chunks)
+            )
+            arr[region] = self._getChunk(codec_meta, chunk_coords, raw)
+
+        return arr if out is None else out
+
+    def _gatherChunkedElements(self, codec_meta, positions):
+        """
+        Fetch the elements of a chunked numerical dataset at the given (N, ndim)
+        positions. Each chunk containing at least one position is decompressed once.
+        """
+        chunks = np.array(codec_meta["chunks"], dtype=np.int64)
+        values = np.empty(len(positions), dtype=self._getNumpyDtype(codec_meta))
+
+        chunk_positions = positions // chunks
+        chunk_ids = np.ravel_multi_index(
+            tuple(chunk_positions.T), self._getChunkGridShape(codec_meta)
+        )
+        order = np.argsort(chunk_ids, kind="stable")
+        sorted_ids = chunk_ids[order]
+        boundaries = np.nonzero(np.diff(sorted_ids))[0] + 1
+
+        for selection in np.split(order, boundaries):
+            if len(selection) == 0:
+                continue
+            chunk_coords = chunk_positions[selection[0]]
+            chunk = self._getChunk(codec_meta, tuple(chunk_coords))
+            local_positions = positions[selection] - chunk_coords * chunks
+            values[selection] = chunk[tuple(local_positions.T)]
+
+        return values
+
+    def _readChunkedSlice(self, codec_meta, indices):
+        """
+        Read the hyperslab described by one array of indices per dimension from a
+        chunked numerical dataset. Only the chunks the hyperslab touches are decompressed.
+        """
+        chunks = codec_meta["chunks"]
+        out = np.empty(
+            [len(axis_indices) for axis_indices in indices],
+            dtype=self._getNumpyDtype(codec_meta),
         )
-        arr = np.frombuffer(buffer, dtype=short_type)
-        arr.shape = codec_meta["shape"]
-        return arr
 
-    def _getText(self, codec_meta):
-        buffer = self._getDatasetAsByte(codec_meta)
+        if out.size == 0:
+            return out
+
+        chunk_of_indices = [
+            axis_indices // chunk_size
+            for axis_indices, chunk_size in zip(indices, chunks)
+        ]
+        touched_chunks = [np.unique(c) for c in chunk_of_indices]
+
+        for chunk_coords in itertools.product(*touched_chunks):
+            out_selection = []
+            chunk_selection = []
+            for d, c in enumerate(chunk_coords):
+                in_chunk = np.nonzero(chunk_of_indices[d] == c)[0]
+                out_selection.append(in_chunk)
+                chunk_selection.append(indices[d][in_chunk] - c * chunks[d])
+
+            chunk = self._getChunk(codec_meta, chunk_coords)
+            out[np.ix_(*out_selection)] = chunk[np.ix_(*chunk_selection)]
+
+        return out
+
+    def _getText(self, codec_meta, raw=None):
+        buffer = self._getDatasetAsByte(codec_meta, raw=raw)
         text = buffer.decode("utf-8", "strict")
         return text
 
-    def _getObject(self, codec_meta):
-        buffer = self._getDatasetAsByte(codec_meta)
+    def _getObject(self, codec_meta, raw=None):
+        buffer = self._getDatasetAsByte(codec_meta, raw=raw)
         object_str = buffer.decode("utf-8", "strict")
 
         # Try load it with YAML then if fails, try with json
@@ -162,8 +669,8 @@ class RandomAccessBuffer:
             object = json.loads(object_str)
         return object
 
-    def _getDataframe(self, codec_meta):
-        buffer = self._getDatasetAsByte(codec_meta)
+    def _getDataframe(self, codec_meta, raw=None):
+        buffer = self._getDatasetAsByte(codec_meta, raw=raw)
         nb_row = codec_meta["rows"]
         nb_col = codec_meta["columns"]
         column_info = codec_meta["columnInfo"]
@@ -233,35 +740,292 @@ class RandomAccessBuffer:
         df = pd.DataFrame(df_columns)
         return df
 
-    def getDataset(self, dataset_name):
+    def getDataset(self, dataset_name, out=None):
+        """
+        Get a dataset and its metadata, as a tuple.
+        For numerical and bytes datasets, out can be an existing array or buffer that
+        the dataset is read into (and that is returned) instead of a new one. For a
+        numerical dataset, it must be a writable C-contiguous array of the same dtype
+        and size, that receives the values in C order even if the dataset is stored in
+        F order. For a bytes dataset, it must be a writable buffer of the same size.
+        """
         entry = self._getEntry(dataset_name)
         if not entry:
             print("No dataset with name {}".format(dataset_name))
             return None
 
         codec_meta = entry["codecMeta"]
+        if out is not None or not self._isCacheable(codec_meta):
+            return (self._decodeDataset(codec_meta, out), entry["metadata"])
+
+        key = (self._file_identity, dataset_name)
+        try:
+            data = self._cache.get(key)
+        except KeyError:
+            data = self._cache.put(key, self._decodeDataset(codec_meta))
+
+        return (data, entry["metadata"])
+
+    def _isCacheable(self, codec_meta):
+        """
+        Tell if a decoded dataset goes to the cache. Uncompressed numerical and bytes
+        datasets of a memory-mapped file are views of the mapping, which cost nothing
+        to get again.
+        """
+        if self._cache is None or not self._cache.canCache(codec_meta["type"]):
+            return False
+
+        # a RAB that is not read from a file cannot be told apart from others
+        if self._file_identity is None:
+            return False
+
+        is_view = (
+            self._mmap is not None
+            and codec_meta.get("compression", None) is None
+            and (
+                codec_meta["type"] in TYPES.NUMERICALS
+                or codec_meta["type"] == TYPES.BUFFER
+            )
+        )
+        return not is_view
+
+    def getDatasets(
+        self, dataset_names, max_gap=65536, workers=None, executor="thread"
+    ):
+        """
+        Get several datasets at once.
+
+        Args:
+            dataset_names (list): names of the datasets
+            max_gap (int): datasets that are no further than max_gap bytes apart in the
+                file are fetched with a single read
+            workers (int): number of workers decoding the datasets, by default as many
+                as the executors of Python would use
+            executor (string): "thread" to decode the compressed datasets in a thread
+                pool, or "process" to decode the compressed, object and dataframe
+                datasets in a process pool, which is not limited by the GIL. The
+                processes read the datasets themselves and only send back the decoded
+                data (when the RAB is not read from a path, the stored bytes of the
+                datasets are sent to them instead). An existing concurrent.futures
+                executor can also be given.
+
+        Returns:
+            dict: (data, metadata) tuples by dataset name, in the order of dataset_names
+        """
+        entries = {}
+        for dataset_name in dataset_names:
+            entry = self._getEntry(dataset_name)
+            if not entry:
+                raise KeyError("The dataset {} does not exist.".format(dataset_name))
+            entries[dataset_name] = entry
+
+        # the datasets found in the cache are not read at all
+        data = {}
+        for dataset_name, entry in entries.items():
+            if self._isCacheable(entry["codecMeta"]):
+                try:
+                    data[dataset_name] = self._cache.get(
+                        (self._file_identity, dataset_name)
+                    )
+                except KeyError:
+                    pass
+
+        if executor == "thread":
+            pool_class = concurrent.futures.ThreadPoolExecutor
+        elif executor == "process":
+            pool_class = concurrent.futures.ProcessPoolExecutor
+        elif isinstance(executor, concurrent.futures.Executor):
+            pool_class = None
+        else:
+            raise ValueError(
+                'The executor must be "thread", "process" or a concurrent.futures executor.'
+            )
+
+        in_processes = executor == "process" or isinstance(
+            executor, concurrent.futures.ProcessPoolExecutor
+        )
+        pool = None if pool_class else executor
+
+        # the datasets are fetched in the order of the file
+        sorted_entries = sorted(
+            [entry for entry in entries.values() if entry["name"] not in data],
+            key=lambda entry: entry["codecMeta"]["byteOffset"],
+        )
+        cached_names = set(data)
+
+        # the processes read the datasets themselves when they can open the file
+        remote_entries = []
+        if in_processes and self._filepath is not None:
+            remote_entries = [
+                entry
+                for entry in sorted_entries
+                if self._isCostlyToDecode(entry["codecMeta"])
+            ]
+            sorted_entries = [
+                entry
+                for entry in sorted_entries
+                if not self._isCostlyToDecode(entry["codecMeta"])
+            ]
+
+        decoding = []
+        try:
+            if remote_entries:
+                if pool is None:
+                    pool = pool_class(workers)
+                nb_batches = 4 * (workers or os.cpu_count() or 1)
+                for batch in self._splitInBatches(remote_entries, nb_batches):
+                    job = pool.submit(
+                        _decodeDatasetsInProcess,
+                        self._filepath,
+                        self._data_byte_offset,
+                        [entry["codecMeta"] for entry in batch],
+                    )
+                    decoding.append(([entry["name"] for entry in batch], job, True))
+
+            starts = [entry["codecMeta"]["byteOffset"] for entry in sorted_entries]
+            ends = [
+                entry["codecMeta"]["byteOffset"] + entry["codecMeta"]["byteLength"]
+                for entry in sorted_entries
+            ]
+
+            for start, end, first, last in Tools.coalesceRanges(starts, ends, max_gap):
+                run = memoryview(
+                    self._readView(self._data_byte_offset + start, end - start)
+                )
+
+                for i in range(first, last):
+                    entry = sorted_entries[i]
+                    codec_meta = entry["codecMeta"]
+                    raw = run[starts[i] - start : ends[i] - start]
+
+                    # the compressed datasets are decoded while the next ones are read
+                    is_remote = in_processes and self._isCostlyToDecode(codec_meta)
+                    if codec_meta.get("compression", None) is None and not is_remote:
+                        # arrays and bytes are views of what was read: a dataset
+                        # kept by the caller must not keep the whole run alive
+                        if (
+                            self._mmap is None
+                            and last - first > 1
+                            and codec_meta["type"] in TYPES.NUMERICALS + [TYPES.BUFFER]
+                        ):
+                            raw = bytes(raw)
+                        data[entry["name"]] = self._decodeDataset(codec_meta, raw=raw)
+                        continue
+
+                    if pool is None:
+                        pool = pool_class(workers)
+                    if is_remote:
+                        job = pool.submit(
+                            _decodeRawDatasetInProcess, codec_meta, bytes(raw)
+                        )
+                    else:
+                        job = pool.submit(self._decodeDataset, codec_meta, None, raw)
+                    decoding.append(([entry["name"]], job, False))
+
+            # a batch of datasets decoded in a process comes back as a list
+            for (names, job, is_batch) in decoding:
+                data.update(zip(names, job.result() if is_batch else [job.result()]))
+        finally:
+            if pool_class is not None and pool is not None:
+                # after an error, the jobs that did not start are not run (the
+                # cancel_futures of shutdown() needs Python 3.9)
+                for (_, job, _) in decoding:
+                    job.cancel()
+                pool.shutdown(wait=True)
+
+        for dataset_name, entry in entries.items():
+            if dataset_name not in cached_names and self._isCacheable(
+                entry["codecMeta"]
+            ):
+                data[dataset_name] = self._cache.put(
+                    (self._file_identity, dataset_name), data[dataset_name]
+                )
+
+        return {
+            dataset_name: (data[dataset_name], entry["metadata"])
+            for dataset_name, entry in entries.items()
+        }
+
+    def _isCostlyToDecode(self, codec_meta):
+        """
+        Tell if decoding a dataset takes significant CPU time: decompressing it or
+        parsing it with Python code.
+        """
+        if codec_meta.get("compression", None) is not None:
+            return True
+        return codec_meta["type"] in [TYPES.OBJECT, TYPES.DATAFRAME]
+
+    def _splitInBatches(self, entries, nb_batches):
+        """
+        Split a list of entries into about nb_batches batches of consecutive entries,
+        with roughly the same byte size.
+        """
+        total_byte_length = sum(entry["codecMeta"]["byteLength"] for entry in entries)
+        batch_byte_length = max(1, total_byte_length // nb_batches)
+        batch = []
+        byte_length = 0
+
+        for entry in entries:
+            batch.append(entry)
+            byte_length += entry["codecMeta"]["byteLength"]
+            if byte_length >= batch_byte_length:
+                yield batch
+                batch = []
+                byte_length = 0
+
+        if batch:
+            yield batch
+
+    def _decodeDataset(self, codec_meta, out=None, raw=None):
+        """
+        Decode a dataset, read from the file or from raw when its stored bytes were
+        already fetched.
+        """
         data = None
         if codec_meta["type"] in TYPES.NUMERICALS:
-            data = self._getNumericalDataset(codec_meta)
+            data = self._getNumericalDataset(codec_meta, out, raw)
+        elif codec_meta["type"] == TYPES.BUFFER and out is not None:
+            data = self._getBuffer(codec_meta, out)
         elif codec_meta["type"] == TYPES.BUFFER:
-            data = self._getDatasetAsByte(codec_meta)
+            data = self._getDatasetAsByte(codec_meta, zero_copy=True, raw=raw)
+        elif out is not None:
+            raise ValueError(
+                "Only numerical and bytes datasets can be read into an output buffer."
+            )
         elif codec_meta["type"] == TYPES.TEXT:
-            data = self._getText(codec_meta)
+            data = self._getText(codec_meta, raw)
         elif codec_meta["type"] == TYPES.OBJECT:
-            data = self._getObject(codec_meta)
+            data = self._getObject(codec_meta, raw)
         elif codec_meta["type"] == TYPES.DATAFRAME:
-            data = self._getDataframe(codec_meta)
+            data = self._getDataframe(codec_meta, raw)
 
-        return (data, entry["metadata"])
+        return data
 
     def _getEntry(self, dataset_name):
         """
         Get the entry for a given dataset. Including metadata and codecMeta
         """
-        for entry in self._rab_index:
-            if entry["name"] == dataset_name:
-                return entry
-        return None
+        self._openToken()
+        entry = self._rab_index_by_name.get(dataset_name, None)
+
+        # entries of a binary index are decoded on demand, then kept
+        if entry is None and self._binary_index is not None:
+            entry = self._binary_index.getEntry(dataset_name)
+            if entry is not None:
+                self._rab_index_by_name[dataset_name] = entry
+
+        return entry
+
+    def _setIndex(self, rab_index, rab_index_by_name=None):
+        """
+        Replace the whole index (eg. after reading a header) and rebuild the lookup
+        table, unless it is given.
+        """
+        self._closeBinaryIndex()
+        self._rab_index = rab_index
+        if rab_index_by_name is None:
+            rab_index_by_name = {entry["name"]: entry for entry in rab_index}
+        self._rab_index_by_name = rab_index_by_name
 
     def getMetadata(self, dataset_name):
         """
@@ -276,21 +1040,900 @@ class RandomAccessBuffer:
         """
         Get the total byte size based on the metadata
         """
+        self._openToken()
+        if self._binary_index is not None:
+            return self._binary_index.getTotalByteSize()
+
         total = 0
         for entry in self._rab_index:
             total += entry["codecMeta"]["byteLength"]
 
-        return total
+        return total
+
+    def getDatasetType(self, dataset_name):
+        entry = self._getEntry(dataset_name)
+        if not entry:
+            raise KeyError("The dataset {} does not exists.".format(dataset_name))
+
+        return entry["codecMeta"]["type"]
+
+    def _getDiggableCodecMeta(self, dataset_name):
+        """
+        Get the codecMeta of a numerical dataset that can be dug into, or raise.
+        """
+        entry = self._getEntry(dataset_name)
+
+        if not entry:
+            raise KeyError("The dataset {} does not exist.".format(dataset_name))
+
+        codec_meta = entry["codecMeta"]
+
+        if codec_meta["type"] not in TYPES.NUMERICALS:
+            raise ValueError("Only numerical datasets can be dug in.")
+
+        is_chunked = codec_meta.get("layout", None) == CHUNKED_LAYOUT
+        if (
+            "compression" in codec_meta
+            and codec_meta["compression"] != None
+            and not is_chunked
+        ):
+            raise ValueError(
+                "The dataset is compressed, digging is not possible. You can use .getDataset() and then use it as Numpy array."
+            )
+
+        # computing strides in case they were missing
+        if "strides" not in codec_meta:
+            codec_meta["strides"] = self._computeStrides(codec_meta)
+
+        return codec_meta
+
+    def _getNumpyDtype(self, codec_meta):
+        """
+        Get the Numpy dtype (including endianness) of a numerical dataset.
+        """
+        # The short type can be prepended with a < or > to add endianness info
+        return np.dtype(
+            SHORT_ENDIANNESS[codec_meta["endianness"]]
+            + SHORT_NUMERICAL_TYPES[codec_meta["type"]]
+        )
+
+    def digNumericalDataset(self, dataset_name, position):
+        """
+        Dig into a numerical dataset to find a single value in a random access fashion,
+        without loading the whole dataset.
+        """
+        codec_meta = self._getDiggableCodecMeta(dataset_name)
+
+        # transform position into a list for consistency
+        if type(position) == int or type(position) == float:
+            position = [position]
+
+        strides = codec_meta["strides"]
+        shape = codec_meta["shape"]
+        nb_dimensions = len(shape)
+        if len(position) != nb_dimensions:
+            raise IndexError(
+                "The dataset is {}-dimensional, the position must also have {} dimensions.".format(
+                    nb_dimensions, nb_dimensions
+                )
+            )
+
+        dtype = self._getNumpyDtype(codec_meta)
+        bytes_per_elem = dtype.itemsize
+        elements_to_jump = 0
+
+        for d in range(0, nb_dimensions):
+            if position[d] < 0 or position[d] >= shape[d]:
+                raise IndexError(
+                    "The position {} is out of range. This axis range is [0, {}]".format(
+                        position[d], shape[d] - 1
+                    )
+                )
+            elements_to_jump += strides[d] * position[d]
+
+        if codec_meta.get("layout", None) == CHUNKED_LAYOUT:
+            values = self._gatherChunkedElements(
+                codec_meta, np.array([position], dtype=np.int64)
+            )
+            return values[0].item()
+
+        byte_offset_from_dataset_start = int(bytes_per_elem) * elements_to_jump
+        byte_offset = (
+            self._data_byte_offset
+            + codec_meta["byteOffset"]
+            + byte_offset_from_dataset_start
+        )
+
+        buffer = self._readBytes(byte_offset, bytes_per_elem)
+
+        # Numpy decodes every numerical type, including float16 and complex
+        # numbers that have no struct equivalent
+        return np.frombuffer(buffer, dtype=dtype)[0].item()
+
+    def digNumericalDatasetBatch(self, dataset_name, positions, max_gap=4096):
+        """
+        Dig into a numerical dataset to find many values at once, without loading
+        the whole dataset.
+
+        Args:
+            dataset_name (string): name of a numerical dataset, uncompressed or chunked
+            positions (array-like): N positions as an (N, ndim) array of integers.
+                A 1D dataset also accepts a flat list of N indices.
+            max_gap (int): positions whose bytes are no further than max_gap bytes
+                apart are fetched with a single read
+
+        Returns:
+            np.ndarray: the N values, with the type and endianness of the dataset
+        """
+        codec_meta = self._getDiggableCodecMeta(dataset_name)
+        strides = np.array(codec_meta["strides"], dtype=np.int64)
+        shape = np.array(codec_meta["shape"], dtype=np.int64)
+        nb_dimensions = len(shape)
+
+        positions = np.asarray(positions)
+        if positions.ndim == 1 and nb_dimensions == 1:
+            positions = positions.reshape(-1, 1)
+
+        if positions.ndim != 2 or positions.shape[1] != nb_dimensions:
+            raise IndexError(
+                "The dataset is {}-dimensional, the positions must be of shape (N, {}).".format(
+                    nb_dimensions, nb_dimensions
+                )
+            )
+
+        if not np.issubdtype(positions.dtype, np.integer):
+            raise IndexError("The positions must be integers.")
+
+        positions = positions.astype(np.int64, copy=False)
+        is_out_of_range = ((positions < 0) | (positions >= shape)).any(axis=1)
+        out_of_range = np.nonzero(is_out_of_range)[0]
+        if len(out_of_range):
+            raise IndexError(
+                "The position {} is out of range. The dataset shape is {}".format(
+                    positions[out_of_range[0]].tolist(), shape.tolist()
+                )
+            )
+
+        if codec_meta.get("layout", None) == CHUNKED_LAYOUT:
+            return self._gatherChunkedElements(codec_meta, positions)
+
+        element_offsets = positions @ strides
+        return self._gatherElements(codec_meta, element_offsets, max_gap)
+
+    def _gatherElements(self, codec_meta, element_offsets, max_gap=0):
+        """
+        Fetch the elements of an uncompressed numerical dataset located at the given
+        offsets (in number of elements from the dataset start). The offsets are sorted
+        so that neighbours are fetched with a single read. Returns the values in the
+        order of element_offsets, as a flat array.
+        """
+        dtype = self._getNumpyDtype(codec_meta)
+        bytes_per_elem = dtype.itemsize
+        byte_offsets = (
+            np.asarray(element_offsets, dtype=np.int64).ravel() * bytes_per_elem
+        )
+        values = np.empty(len(byte_offsets), dtype=dtype)
+
+        order = np.argsort(byte_offsets, kind="stable")
+        sorted_offsets = byte_offsets[order]
+        dataset_start = self._data_byte_offset + codec_meta["byteOffset"]
+
+        runs = Tools.coalesceRanges(
+            sorted_offsets, sorted_offsets + bytes_per_elem, max_gap
+        )
+
+        if self._mmap is not None:
+            # a single view over the dataset, no read is needed
+            dataset = np.frombuffer(
+                self._readView(dataset_start, codec_meta["byteLength"]), dtype=np.uint8
+            )
+
+        for start, end, first, last in runs:
+            if self._mmap is not None:
+                run = dataset[start:end].view(dtype)
+            else:
+                run = np.frombuffer(
+                    self._readBytes(dataset_start + start, end - start), dtype=dtype
+                )
+            values[order[first:last]] = run[
+                (sorted_offsets[first:last] - start) // bytes_per_elem
+            ]
+
+        return values
+
+    def _getSliceIndices(self, key, shape):
+        """
+        Turn a Numpy-like key (int, slice, Ellipsis or a tuple of those) into one
+        array of indices per dimension. Also returns the shape of the result, where
+        dimensions indexed by an integer are dropped.
+        """
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        nb_dimensions = len(shape)
+        nb_ellipsis = sum(1 for k in key if k is Ellipsis)
+        if nb_ellipsis > 1:
+            raise IndexError("An index can only have a single ellipsis ('...').")
+
+        if nb_ellipsis:
+            e = key.index(Ellipsis)
+            key = key[:e] + (slice(None),) * (nb_dimensions - len(key) + 1) + key[e + 1 :]
+
+        if len(key) > nb_dimensions:
+            raise IndexError(
+                "Too many indices: the dataset is {}-dimensional.".format(nb_dimensions)
+            )
+
+        key = key + (slice(None),) * (nb_dimensions - len(key))
+        indices = []
+        out_shape = []
+
+        for d, k in enumerate(key):
+            if isinstance(k, slice):
+                axis_indices = np.arange(*k.indices(shape[d]), dtype=np.int64)
+                out_shape.append(len(axis_indices))
+            elif isinstance(k, (int, np.integer)):
+                position = k + shape[d] if k < 0 else k
+                if position < 0 or position >= shape[d]:
+                    raise IndexError(
+                        "The position {} is out of range. This axis range is [0, {}]".format(
+                            k, shape[d] - 1
+                        )
+                    )
+                axis_indices = np.array([position], dtype=np.int64)
+            else:
+                raise IndexError(
+                    "Only integers, slices and ellipsis are valid indices, got {}.".format(
+                        type(k)
+                    )
+                )
+            indices.append(axis_indices)
+
+        return (indices, out_shape)
+
+    def readSlice(self, dataset_name, key, max_gap=4096):
+        """
+        Read a hyperslab of a numerical dataset, without loading the whole dataset.
+        The slice is read as runs of contiguous bytes, found from the shape and the
+        strides of the dataset, and each run is read straight into the result when
+        its layout allows it.
+
+        Args:
+            dataset_name (string): name of a numerical dataset, uncompressed or chunked
+            key: a Numpy-like index made of integers, slices and ellipsis,
+                for instance (slice(10, 50), slice(None), 7)
+            max_gap (int): runs separated by no more than max_gap bytes are fetched
+                with a single read. Raising it means fewer but larger reads, eg. a
+                plane across the innermost axis is read at once rather than value by
+                value.
+
+        Returns:
+            np.ndarray: the values, with the type and endianness of the dataset
+        """
+        codec_meta = self._getDiggableCodecMeta(dataset_name)
+        (indices, out_shape) = self._getSliceIndices(key, codec_meta["shape"])
+
+        if codec_meta.get("layout", None) == CHUNKED_LAYOUT:
+            return self._readChunkedSlice(codec_meta, indices).reshape(out_shape)
+
+        return self._readUncompressedSlice(codec_meta, indices, max_gap).reshape(
+            out_shape
+        )
+
+    def _readUncompressedSlice(self, codec_meta, indices, max_gap):
+        """
+        Read the hyperslab described by one array of indices per dimension (regularly
+        spaced, as given by _getSliceIndices) from an uncompressed numerical dataset.
+
+        The innermost axes, in the order of the strides, are read together as long as
+        the bytes skipped between their values are no more than max_gap, and a read is
+        made for each position along the other axes.
+        """
+        dtype = self._getNumpyDtype(codec_meta)
+        bytes_per_elem = dtype.itemsize
+        strides = codec_meta["strides"]
+        nb_dimensions = len(indices)
+        counts = [len(axis_indices) for axis_indices in indices]
+        out = np.empty(counts, dtype=dtype)
+
+        if out.size == 0:
+            return out
+
+        # each axis is read with a positive step, reversed axes are flipped in out
+        starts = [int(axis_indices.min()) for axis_indices in indices]
+        steps = [
+            abs(int(axis_indices[1] - axis_indices[0])) if len(axis_indices) > 1 else 1
+            for axis_indices in indices
+        ]
+        target = out[
+            tuple(
+                slice(None, None, -1) if count > 1 and axis_indices[1] < axis_indices[0]
+                else slice(None)
+                for axis_indices, count in zip(indices, counts)
+            )
+        ]
+        byte_strides = [stride * bytes_per_elem for stride in strides]
+        dataset_start = self._data_byte_offset + codec_meta["byteOffset"]
+
+        if self._mmap is not None:
+            # a strided view of the dataset, no read is needed
+            dataset = np.ndarray(
+                codec_meta["shape"],
+                dtype=dtype,
+                buffer=self._readView(dataset_start, codec_meta["byteLength"]),
+                strides=byte_strides,
+            )
+            target[...] = dataset[
+                tuple(
+                    slice(start, start + step * (count - 1) + 1, step)
+                    for start, step, count in zip(starts, steps, counts)
+                )
+            ]
+            return out
+
+        # grow the run from the innermost axis, as long as the gaps are small enough
+        run_length = 1  # in number of elements
+        inner_axes = []
+        for d in sorted(range(nb_dimensions), key=lambda d: strides[d]):
+            if counts[d] > 1:
+                step = steps[d] * strides[d]
+                gap_byte_length = (step - run_length) * bytes_per_elem
+                extended_run_length = run_length + (counts[d] - 1) * step
+                if gap_byte_length > max_gap or (
+                    gap_byte_length > 0
+                    and extended_run_length * bytes_per_elem > SLICE_READ_BYTE_LENGTH
+                ):
+                    break
+                run_length = extended_run_length
+            inner_axes.append(d)
+
+        outer_axes = [d for d in range(nb_dimensions) if d not in inner_axes]
+
+        # the values of a run, as a strided view of the bytes read
+        run_shape = [counts[d] if d in inner_axes else 1 for d in range(nb_dimensions)]
+        run_strides = [
+            steps[d] * byte_strides[d] if d in inner_axes else 0
+            for d in range(nb_dimensions)
+        ]
+        run = None
+
+        # the run can be read straight into the result when it has no gap and its
+        # values are in the order of the result
+        is_run_contiguous = run_length == int(np.prod(run_shape))
+        contiguous_stride = bytes_per_elem
+        for size, stride in reversed(list(zip(run_shape, run_strides))):
+            if size > 1 and stride != contiguous_stride:
+                is_run_contiguous = False
+            contiguous_stride *= size
+
+        first_element = sum(start * stride for start, stride in zip(starts, strides))
+        outer_positions = itertools.product(*[range(counts[d]) for d in outer_axes])
+        for outer_position in outer_positions:
+            element = first_element
+            selection = [slice(None)] * nb_dimensions
+            for d, p in zip(outer_axes, outer_position):
+                element += p * steps[d] * strides[d]
+                selection[d] = slice(p, p + 1)
+
+            destination = target[tuple(selection)]
+            byte_offset = dataset_start + element * bytes_per_elem
+            if is_run_contiguous and destination.flags.c_contiguous:
+                self._readInto(byte_offset, destination.reshape(-1).view(np.uint8))
+                continue
+
+            if run is None:
+                run_buffer = np.empty(run_length * bytes_per_elem, dtype=np.uint8)
+                run = np.ndarray(
+                    run_shape, dtype=dtype, buffer=run_buffer, strides=run_strides
+                )
+            self._readInto(byte_offset, run_buffer)
+            destination[...] = run
+
+        return out
+
+    def digInBuffer(self, dataset_name, byte_offset, byte_length):
+        """
+        There is no restriction of the type of dataset that it originally is,
+        hence any dataset (buffer, but also object, text and numerical) can be dug this
+        way. It's to the discretion of the user to know if it makes sense.
+        position is in number of byte from the begining of the {dataset_name} dataset
+        """
+        entry = self._getEntry(dataset_name)
+
+        if not entry:
+            raise KeyError("The dataset {} does not exist.".format(dataset_name))
+
+        codec_meta = entry["codecMeta"]
+
+        if byte_offset < 0 or (byte_offset + byte_length) > codec_meta["byteLength"]:
+            raise IndexError("The byte offset and byte length are out of range")
+
+        total_byte_offset = (
+            self._data_byte_offset + codec_meta["byteOffset"] + byte_offset
+        )
+
+        return self._readBytes(total_byte_offset, byte_length)
+
+    def _computeStrides(self, codec_meta):
+        """
+        Computes the strides if by any encoding mistake they were not part of the
+        metadata. They describe the layout the data is written in, given by its
+        byteOrder (C if missing).
+        """
+        shape = codec_meta["shape"]
+        is_fortran = codec_meta.get("byteOrder", "C") == "F"
+        if is_fortran:
+            shape = list(reversed(shape))
+        nb_dimensions = len(shape)
+        strides = [1]
+
+        # compute the strides
+        for d in range(1, nb_dimensions):
+            strides.append(strides[-1] * shape[-d])
+
+        if not is_fortran:
+            strides.reverse()  # the strides are now in the same order as the shape
+        return strides
+
+    def hasDataset(self, dataset_name):
+        """
+        Check if a dataset exists in the index
+        """
+        self._openToken()
+        if dataset_name in self._rab_index_by_name:
+            return True
+
+        return self._binary_index is not None and self._binary_index.hasDataset(
+            dataset_name
+        )
+
+    def read(self, filepath, memory_map=False, binary_index=False):
+        """
+        Read from a file, given its path (str, bytes or path-like object). To read a
+        RAB from memory, see readFrom().
+
+        With memory_map, the file is mapped in memory once and for all: getDataset then
+        returns read-only Numpy arrays (uncompressed numerical datasets) and memoryviews
+        (uncompressed bytes datasets) that are views of the mapping. Pages are loaded
+        lazily and shared across processes by the page cache.
+
+        With binary_index, the binary index written alongside the file (see write()) is
+        used instead of the header, if it is up to date. The header is then not decoded
+        at all and each entry is only decoded when its dataset is accessed.
+        Otherwise, the header of a file that was already read is taken from the header
+        cache (see HeaderCache) when the file did not change since.
+
+        The file stays open until close() is called, or until the end of the with block
+        when the instance is used as a context manager.
+        """
+        if not isinstance(filepath, (str, bytes, os.PathLike)):
+            raise TypeError(
+                "A RAB is read from a path, use readFrom() to read it from memory."
+            )
+        if isinstance(filepath, bytes):
+            filepath = os.fsdecode(filepath)
+
+        self._token = None
+        self._read(filepath, memory_map, binary_index)
+
+    def readFrom(self, source, memory_map=False):
+        """
+        Read a RAB from memory, given as a buffer (bytes, bytearray, memoryview,
+        mmap...) or as a seekable binary file object (io.BytesIO, an open file...),
+        where it starts at byte 0:
+        - A buffer is not copied: uncompressed datasets are read-only views of it, as
+          with memory_map. It must not be modified while it is read.
+        - A file object is not closed by close(). Reads move its position, and are
+          serialized between threads unless it is a regular file. With memory_map, a
+          regular file is mapped in memory, see read().
+        The header cache, the binary index and tokens (see getToken) are only available
+        when reading from a path.
+        """
+        self._token = None
+        self.close()
+        self._filepath = None
+        self._file_identity = None
+
+        if Tools.isBuffer(source):
+            self._mmap = memoryview(source).cast("B").toreadonly()
+        elif hasattr(source, "read") and hasattr(source, "seek"):
+            self._setFile(source, owns_file=False)
+            if memory_map and self._file_fd is not None:
+                self._mmap = mmap.mmap(self._file_fd, 0, access=mmap.ACCESS_READ)
+        else:
+            raise ValueError(
+                "A RAB is read from a buffer or from a seekable binary file object."
+            )
+
+        if self._readBytes(0, len(MAGIC_NUMBER)) != MAGIC_NUMBER.encode():
+            self.close()
+            raise ValueError("The file is not a RandomAccessBuffer.")
+
+        self._readHeader(binary_index=False)
+
+    def _read(self, filepath, memory_map, binary_index):
+        """
+        Same as read(), but the token the reader was created from is left untouched.
+        """
+        self.close()
+        self._filepath = None
+        self._file_identity = None
+
+        f = open(filepath, "rb")
+        file_identity = Tools.getFileIdentity(filepath, f)
+
+        # the binary index is only used when asked for, it is already cheap to open
+        cached_header = None
+        if self._header_cache is not None and not binary_index:
+            cached_header = self._header_cache.get(file_identity)
+
+        if cached_header is None:
+            magic = f.read(3).decode()
+            if magic != MAGIC_NUMBER:
+                f.close()
+                raise ValueError("The file is not a RandomAccessBuffer.")
+
+        self._filepath = filepath
+        self._setFile(f)
+        self._file_identity = file_identity
+
+        if cached_header is not None:
+            (rab_index, rab_index_by_name, self._data_byte_offset) = cached_header
+            self._setIndex(rab_index, rab_index_by_name)
+        else:
+            self._readHeader(binary_index)
+
+        if memory_map:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _readHeader(self, binary_index):
+        """
+        Read the index, from the header right after the magic number or from the binary
+        index, then cache the header when it was decoded.
+        """
+        header_bytelength = struct.unpack("I", self._readBytes(3, 4))[0]
+
+        sidecar = None
+        if binary_index:
+            sidecar = BinaryIndex.BinaryIndex.open(
+                self._filepath, self._file_identity, header_bytelength
+            )
+
+        # the byte offset of the very first dataset
+        self._data_byte_offset = 7 + header_bytelength
+
+        if sidecar is not None:
+            self._setIndex([])
+            self._binary_index = sidecar
+            return
+
+        header_str = self._readBytes(7, header_bytelength).decode("utf-8", "strict")
+        self._setIndex(self._decodeHeader(header_str))
+
+        # readers share the cached index, they never modify it
+        if self._header_cache is not None and self._file_identity is not None:
+            self._header_cache.put(
+                self._file_identity,
+                (self._rab_index, self._rab_index_by_name, self._data_byte_offset),
+                header_bytelength,
+            )
+
+    def _decodeHeader(self, header_str):
+        """
+        Decode the header into the list of entries.
+        JSON (as the spec of RAB was originally using json) is tried first because it
+        is much faster to parse and fails right away on a YAML header, which is then
+        decoded with the fastest YAML loader available.
+        """
+        try:
+            return json.loads(header_str)
+        except json.JSONDecodeError:
+            pass
+
+        try:
+            return yaml.load(header_str, Loader=YamlLoader)
+        except yaml.constructor.ConstructorError:
+            # Some older files have Python-specific tags (eg. Numpy objects in the
+            # metadata) that only the full loader understands
+            return yaml.load(header_str, Loader=yaml.Loader)
+
+    def close(self):
+        """
+        Close the file being read, if any. Datasets that were already extracted remain
+        valid.
+        """
+        self._closeMemoryMap()
+        self._closeBinaryIndex()
+        if self._file is not None:
+            if self._owns_file:
+                self._file.close()
+            self._file = None
+            self._file_fd = None
+
+    def _closeBinaryIndex(self):
+        if self._binary_index is not None:
+            self._binary_index.close()
+            self._binary_index = None
+
+
+class RandomAccessBuffer(RandomAccessBufferReader):
+    def __init__(self, workers=None, memory_budget=None):
+        """
+        With workers (a number of threads), datasets are encoded and compressed in a
+        thread pool: the add methods return as soon as the job is submitted and
+        write() waits for all of them. The data passed to an add method must then not
+        be modified until write() is called, and encoding errors are raised by write().
+
+        By default, each encoded dataset is staged in its own temporary file. With a
+        memory_budget (in bytes), they are kept in memory instead and, whenever they
+        take more than the budget, the largest ones are moved to a single scratch file.
+        """
+        # the index of a RandomAccessBuffer is modified, it cannot be shared
+        super().__init__(header_cache=None)
+        # print("version", __version__)
+        # the working dir is only created when a dataset needs to be staged
+        self._working_dir = None
+        self._staging_lock = threading.RLock()
+        self._memory_budget = memory_budget
+        self._staged_in_memory = {}  # dataset name -> (entry, encoded bytes)
+        self._staged_byte_length = 0  # byte length of what is in memory
+        self._scratch_file = None
+        self._scratch_byte_length = 0
+        self._workers = workers
+        self._executor = None
+        self._pending_jobs = []
+        self._onDone = None
+
+    def onDone(self, fn):
+        self._onDone = fn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """
+        Leaving a with block closes the file being read and deletes the working dir
+        """
+        try:
+            self.close()
+        finally:
+            self.clean()
+
+    def __del__(self):
+        """
+        When the destructor is called, we close the file (which finishes the file of a
+        stream writer) then delete the working dir and its content.
+        The jobs of the thread pool hold the instance, so the destructor only runs once
+        they are all done, possibly in a thread of the pool: the pool is shut down
+        without being joined, a thread cannot join itself.
+        """
+        try:
+            self.close()
+        finally:
+            self._shutdownWorkers(wait=False)
+            self.clean()
+
+        if self._onDone:
+            self._onDone()
+
+    def _getWorkingDir(self):
+        """
+        Get the working dir where datasets are staged before writing, create it if
+        it does not exist yet.
+        """
+        with self._staging_lock:
+            if self._working_dir is None:
+                self._working_dir = Tools.createWorkingDir()
+        return self._working_dir
+
+    def _getExecutor(self):
+        """
+        Get the thread pool encoding the datasets, create it if it does not exist yet.
+        """
+        if self._executor is None:
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=self._workers
+            )
+        return self._executor
+
+    def _submitDataset(self, dataset_meta, encode, stage=None):
+        """
+        Encode a dataset with encode(), which returns its bytes and completes its
+        codecMeta, then stage it with stage (by default _stageDataset). With workers,
+        this happens in the thread pool and the entry is added to the index right away
+        so that it keeps its position.
+        """
+        stage = stage or self._stageDataset
+        if not self._workers:
+            stage(dataset_meta, encode())
+            self._addEntry(dataset_meta)
+            return
+
+        self._addEntry(dataset_meta)
+        job = self._getExecutor().submit(lambda: stage(dataset_meta, encode()))
+        self._pending_jobs.append((dataset_meta, job))
+
+    def _waitForJobs(self):
+        """
+        Wait for all the datasets being encoded in the thread pool. The datasets that
+        failed are removed from the index and the first error is raised.
+        """
+        (jobs, self._pending_jobs) = (self._pending_jobs, [])
+        error = None
+        for (dataset_meta, job) in jobs:
+            try:
+                job.result()
+            except Exception as e:
+                self._rab_index_by_name.pop(dataset_meta["name"], None)
+                self._rab_index.remove(dataset_meta)
+                error = error or e
+
+        if error is not None:
+            raise error
+
+    def _shutdownWorkers(self, wait=True):
+        """
+        Shut the thread pool down, cancelling the datasets that are not being encoded
+        yet. These are removed from the index like the ones that failed, so that they
+        are never written without their data.
+        """
+        if self._executor is None:
+            return
+
+        # the cancel_futures of shutdown() needs Python 3.9
+        for (_, job) in self._pending_jobs:
+            job.cancel()
+        self._executor.shutdown(wait=wait)
+        self._executor = None
+        try:
+            self._waitForJobs()
+        except Exception:
+            pass
+
+    def _stageDataset(self, dataset_meta, data):
+        """
+        Keep the encoded bytes of a dataset until the whole file is written.
+        They are written in a temporary file of the working dir, named after a hash
+        of the dataset name, or kept in memory if there is a memory budget.
+        """
+        if self._memory_budget is not None:
+            with self._staging_lock:
+                self._staged_in_memory[dataset_meta["name"]] = (dataset_meta, data)
+                self._staged_byte_length += len(data)
+                self._spillToScratchFile()
+            return
+
+        file_path = os.path.join(
+            self._getWorkingDir(), Tools.hashText(dataset_meta["name"])
+        )
+        with open(file_path, "w+b") as f:
+            f.write(data)
+        dataset_meta["filePath"] = file_path
+
+    def _stagePieces(self, dataset_meta, pieces):
+        """
+        Same as _stageDataset, for a dataset encoded piece by piece that may not fit in
+        memory, such as a large array. Its byteLength is set once all the pieces are
+        staged. With a memory budget, the pieces are kept in memory until they exceed
+        the budget, the rest goes straight to the scratch file.
+        """
+        if self._memory_budget is None:
+            file_path = os.path.join(
+                self._getWorkingDir(), Tools.hashText(dataset_meta["name"])
+            )
+            with open(file_path, "w+b") as f:
+                byte_length = Tools.writePieces(f, pieces)
+            dataset_meta["filePath"] = file_path
+            dataset_meta["codecMeta"]["byteLength"] = byte_length
+            return
+
+        pieces = iter(pieces)
+        data = bytearray()
+        for piece in pieces:
+            data += memoryview(piece)
+            if len(data) > self._memory_budget:
+                break
+        else:
+            dataset_meta["codecMeta"]["byteLength"] = len(data)
+            self._stageDataset(dataset_meta, data)
+            return
+
+        with self._staging_lock:
+            scratch_file = self._getScratchFile()
+            byte_length = Tools.writePieces(
+                scratch_file, itertools.chain([data], pieces)
+            )
+            scratch_file.flush()
+            dataset_meta["scratchOffset"] = self._scratch_byte_length
+            dataset_meta["codecMeta"]["byteLength"] = byte_length
+            self._scratch_byte_length += byte_length
+
+    def _getScratchFile(self):
+        """
+        Get the scratch file, positioned at its end, create it if it does not exist yet.
+        """
+        if self._scratch_file is None:
+            self._scratch_file = open(
+                os.path.join(self._getWorkingDir(), "scratch"), "w+b"
+            )
+
+        # copies from the scratch file may have moved its position, and they read
+        # its descriptor directly: it must be flushed after being written
+        self._scratch_file.seek(self._scratch_byte_length)
+        return self._scratch_file
+
+    def _spillToScratchFile(self):
+        """
+        Move the largest datasets staged in memory to the end of the scratch file,
+        until the ones left fit in the memory budget.
+        """
+        while self._staged_byte_length > self._memory_budget:
+            (name, (dataset_meta, data)) = max(
+                self._staged_in_memory.items(), key=lambda item: len(item[1][1])
+            )
+
+            scratch_file = self._getScratchFile()
+            scratch_file.write(data)
+            scratch_file.flush()
+            dataset_meta["scratchOffset"] = self._scratch_byte_length
+            self._scratch_byte_length += len(data)
+
+            del self._staged_in_memory[name]
+            self._staged_byte_length -= len(data)
+
+    def _writeStagedDataset(self, dataset_meta, out_file):
+        """
+        Write a staged dataset (or an added file) at the current position of out_file,
+        from wherever it is kept.
+        """
+        name = dataset_meta["name"]
+        byte_length = dataset_meta["codecMeta"]["byteLength"]
+
+        if name in self._staged_in_memory:
+            out_file.write(self._staged_in_memory[name][1])
+        elif "scratchOffset" in dataset_meta:
+            Tools.copyFileContent(
+                self._scratch_file,
+                out_file,
+                byte_length,
+                dataset_meta["scratchOffset"],
+            )
+        else:
+            # the staged datasets and the added files are copied by the OS when
+            # possible, without going through Python
+            with open(dataset_meta["filePath"], "rb") as dataset_file:
+                Tools.copyFileContent(dataset_file, out_file, byte_length)
+
+    def _stageFile(self, dataset_meta, filepath):
+        """
+        Keep track of a file to add as a dataset. It is not copied, its content is
+        fetched when the whole file is written.
+        """
+        dataset_meta["filePath"] = filepath
+
+    def _addEntry(self, dataset_meta):
+        """
+        Append an entry to the index, keeping the lookup table in sync.
+        """
+        self._rab_index.append(dataset_meta)
+        self._rab_index_by_name[dataset_meta["name"]] = dataset_meta
 
     def deleteDataset(self, dataset_name):
-        pass
+        """
+        Remove a dataset from the index. If the dataset was staged in the working dir,
+        its temporary file is deleted as well.
+        """
+        self._waitForJobs()
+        entry = self._rab_index_by_name.pop(dataset_name, None)
+        if not entry:
+            raise KeyError("The dataset {} does not exist.".format(dataset_name))
 
-    def getDatasetType(self, dataset_name):
-        if not self.hasDataset(dataset_name):
-            raise KeyError("The dataset {} does not exists.".format(dataset_name))
+        self._rab_index.remove(entry)
 
-        entry = self._getEntry(dataset_name)
-        return entry["codecMeta"]["type"]
+        # the space taken in the scratch file is not reclaimed
+        (_, data) = self._staged_in_memory.pop(dataset_name, (None, b""))
+        self._staged_byte_length -= len(data)
+
+        file_path = entry.get("filePath", None)
+        if file_path and os.path.dirname(file_path) == self._working_dir:
+            os.remove(file_path)
 
     def addObject(self, dataset_name, data, metadata={}, compress=None):
         """
@@ -311,44 +1954,35 @@ class RandomAccessBuffer:
         # by converting nmpy arrays to list
         safe_meta = Tools.make_safe_object(metadata)
 
-        # Make sure we can create a data object that can be understood by another language (JS)
-        # by converting nmpy arrays to list
-        safe_data = Tools.make_safe_object(data)
-
-        yaml_encoded = yaml.dump(safe_data, Dumper=yaml.Dumper, allow_unicode=True)
-        bytes = yaml_encoded.encode("utf-8", "strict")
-
-        # create a hash name for this array and a path on disk to write it temporarily
-        hashedName = Tools.hashText(dataset_name)
-        file_path = os.path.join(self._working_dir, hashedName)
-
-        # If compressing is enabled, we must do it before metadata because we need
-        # bytelength of the compressed buffer
-        byte_length = len(bytes)
-        if compress == "gzip":
-            bytes = zlib.compress(bytes)
-            byte_length = len(bytes)
-
         # Create the metadata entry
         dataset_meta = {
             "name": dataset_name,
-            "filePath": file_path,
             "metadata": safe_meta,
             "codecMeta": {
                 "byteOffset": None,  # computed at write time
-                "byteLength": byte_length,
+                "byteLength": None,  # computed when encoding
                 "type": TYPES.OBJECT,
                 "compression": compress,
             },
         }
 
-        self._rab_index.append(dataset_meta)
+        def encode():
+            # Make sure we can create a data object that can be understood by another language (JS)
+            # by converting nmpy arrays to list
+            safe_data = Tools.make_safe_object(data)
+
+            yaml_encoded = yaml.dump(safe_data, Dumper=yaml.Dumper, allow_unicode=True)
+            bytes = yaml_encoded.encode("utf-8", "strict")
 
-        # write the file in the temps dir.
+            if compress == "gzip":
+                bytes = zlib.compress(bytes)
+
+            dataset_meta["codecMeta"]["byteLength"] = len(bytes)
+            return bytes
+
+        # stage the dataset (in the temps dir, by default).
         # We'll fetch this one when we write the whole file
-        f = open(file_path, "w+b")
-        f.write(bytes)
-        f.close()
+        self._submitDataset(dataset_meta, encode)
 
     def addFile(self, dataset_name, filepath, metadata={}):
         """
@@ -372,7 +2006,6 @@ class RandomAccessBuffer:
         # Create the metadata entry
         dataset_meta = {
             "name": dataset_name,
-            "filePath": filepath,
             "metadata": safe_meta,
             "codecMeta": {
                 "byteOffset": None,  # computed at write time
@@ -380,13 +2013,31 @@ class RandomAccessBuffer:
                 "type": TYPES.BUFFER,
             },
         }
-        self._rab_index.append(dataset_meta)
+        self._stageFile(dataset_meta, filepath)
+        self._addEntry(dataset_meta)
 
     def addNumericalDataset(
-        self, dataset_name, data, metadata={}, compress=None, order="C"
+        self,
+        dataset_name,
+        data,
+        metadata={},
+        compress=None,
+        order="C",
+        chunks=None,
+        shape=None,
+        dtype=None,
     ):
         """
-        Add a Numpy array/ndarray
+        Add a Numpy array/ndarray.
+        With compress="gzip", providing a chunk shape (a tuple with one size per
+        dimension, or a single int for all of them) splits the array in chunks that are
+        compressed separately. Such datasets can still be dug into and sliced,
+        decompressing only the chunks involved.
+
+        The data can also be a np.memmap, any object supporting the buffer protocol or,
+        along with the shape and the dtype of the whole array, an iterable of pieces of
+        the array along its first axis. The array is written (and compressed) piece by
+        piece, so that it does not have to fit in memory.
         """
         if self.hasDataset(dataset_name):
             raise KeyError("The dataset {} already exists.".format(dataset_name))
@@ -400,50 +2051,183 @@ class RandomAccessBuffer:
         # by converting nmpy arrays to list
         safe_meta = Tools.make_safe_object(metadata)
 
-        # create a hash name for this array and a path on disk to write it temporarily
-        hashedName = Tools.hashText(dataset_name)
-        file_path = os.path.join(self._working_dir, hashedName)
+        if chunks is not None and compress != "gzip":
+            raise ValueError("A chunked layout is only available with compression.")
+
+        if not isinstance(data, np.ndarray) and shape is None:
+            try:
+                data = np.asarray(memoryview(data))
+            except TypeError:
+                raise ValueError(
+                    "The dataset must be an array, a buffer or pieces of an array along with its shape and dtype."
+                )
+
+        if isinstance(data, np.ndarray):
+            shape = data.shape
+            dtype = data.dtype
+            arrays = [data]
+        else:
+            if dtype is None:
+                raise ValueError("The dtype of an array given by pieces is missing.")
+
+            shape = tuple(int(size) for size in shape)
+            dtype = np.dtype(dtype)
+            if order != "C" and len(shape) > 1 and chunks is None:
+                raise ValueError(
+                    "An array given by pieces can only be written in C order."
+                )
 
-        # If compressing is enabled, we must do it before metadata because we need
-        # bytelength of the compressed buffer
-        byte_length = data.nbytes
-        bytes = data.tobytes(order=order)
-        if compress == "gzip":
-            bytes = zlib.compress(bytes)
-            byte_length = len(bytes)
+            arrays = self._iterArrayPieces(data, shape, dtype)
 
         # the strides could be computed but it's more efficient to have it
         # rather than re-computing it at every dig.
-        # Note: Numpy gives the strides in bytes but here we want the strides in
-        # number or elements because it's jsut more convenient for want we do here.
-        strides = [int(i / data.dtype.itemsize) for i in data.strides]
+        # Note: the strides are those of the bytes written, in the given order, and not
+        # those of the array in memory (a transposed view, a strided memmap...). They
+        # are in number of elements because it's just more convenient here.
+        strides = self._computeStrides({"shape": shape, "byteOrder": order})
+
+        endianness = Tools.getNumpyArrayEndianness(np.empty(0, dtype=dtype))
+
+        if chunks is not None:
+            chunks = self._getChunkShape(chunks, shape)
 
         # Create the metadata entry
         dataset_meta = {
             "name": dataset_name,
-            "filePath": file_path,
             "metadata": safe_meta,
             "codecMeta": {
                 "shape": list(
-                    data.shape
+                    shape
                 ),  # rather than using dimension. Even with array 1D, shape is a list (eg. [2, 2], or [12], etc.)
                 "strides": strides,
                 "byteOrder": order,  # not relevant if "dimensions" is 1
                 "byteOffset": None,  # computed at write time
-                "byteLength": byte_length,
-                "type": data.dtype.name,
-                "endianness": Tools.getNumpyArrayEndianness(data),
+                "byteLength": None,  # computed when staging
+                "type": dtype.name,
+                "endianness": endianness,
                 "compression": compress,
             },
         }
 
-        self._rab_index.append(dataset_meta)
+        def encode():
+            if chunks is not None:
+                return self._compressChunks(
+                    arrays, chunks, order, dataset_meta["codecMeta"]
+                )
+
+            pieces = (
+                piece for arr in arrays for piece in Tools.iterArrayPieces(arr, order)
+            )
+            if compress == "gzip":
+                pieces = Tools.compressPieces(pieces)
+            return pieces
 
-        # write the file in the temps dir.
+        # stage the dataset (in the temps dir, by default), piece by piece.
         # We'll fetch this one when we write the whole file
-        f = open(file_path, "w+b")
-        f.write(bytes)
-        f.close()
+        self._submitDataset(dataset_meta, encode, self._stagePieces)
+
+    def _iterArrayPieces(self, pieces, shape, dtype):
+        """
+        Check the pieces of an array along its first axis as they come.
+        """
+        nb_rows = 0
+        for piece in pieces:
+            piece = np.asarray(piece, dtype=dtype)
+            if piece.ndim == 0 or piece.shape[1:] != shape[1:]:
+                raise ValueError(
+                    "A piece of shape {} does not fit in an array of shape {}.".format(
+                        piece.shape, shape
+                    )
+                )
+
+            nb_rows += piece.shape[0]
+            if nb_rows > shape[0]:
+                raise ValueError(
+                    "The pieces have more than the {} rows expected.".format(shape[0])
+                )
+            yield piece
+
+        if nb_rows != shape[0]:
+            raise ValueError(
+                "The pieces have {} rows, {} were expected.".format(nb_rows, shape[0])
+            )
+
+    def _getChunkShape(self, chunks, shape):
+        """
+        Check the chunk shape (a tuple with one size per dimension, or a single int for
+        all of them) and clip it to the shape of the dataset.
+        """
+        if len(shape) == 0:
+            raise ValueError("A chunked layout needs at least one dimension.")
+
+        if isinstance(chunks, (int, np.integer)):
+            chunks = [chunks] * len(shape)
+
+        if len(chunks) != len(shape):
+            raise ValueError(
+                "The chunk shape must have {} dimensions.".format(len(shape))
+            )
+
+        if any(int(c) < 1 for c in chunks):
+            raise ValueError("The chunk sizes must be strictly positive.")
+
+        # a chunk is never larger than the dataset itself
+        return [max(1, min(int(c), size)) for c, size in zip(chunks, shape)]
+
+    def _compressChunks(self, arrays, chunks, order, codec_meta):
+        """
+        Split an array, given in pieces along its first axis, into N-dimensional chunks
+        (in C order of the chunk grid) and compress each of them separately. The
+        compressed chunks are yielded one after the other and the codecMeta properties
+        describing the layout are added to codec_meta as they go.
+        """
+        chunk_byte_offsets = []
+        chunk_byte_lengths = []
+        codec_meta.update(
+            {
+                "layout": CHUNKED_LAYOUT,
+                "chunks": chunks,
+                "chunkByteOffsets": chunk_byte_offsets,
+                "chunkByteLengths": chunk_byte_lengths,
+            }
+        )
+        offset = 0
+
+        # a band is a full row of chunks along the first axis
+        for band in self._iterBands(arrays, chunks[0]):
+            grid_shape = [-(-size // c) for size, c in zip(band.shape[1:], chunks[1:])]
+            for chunk_coords in np.ndindex(*grid_shape):
+                region = (slice(None),) + tuple(
+                    slice(c * chunk_size, (c + 1) * chunk_size)
+                    for c, chunk_size in zip(chunk_coords, chunks[1:])
+                )
+                compressed = zlib.compress(band[region].tobytes(order=order))
+                chunk_byte_offsets.append(offset)
+                chunk_byte_lengths.append(len(compressed))
+                offset += len(compressed)
+                yield compressed
+
+    def _iterBands(self, arrays, nb_rows):
+        """
+        Regroup pieces of an array along its first axis into bands of nb_rows rows
+        (except the last one, that can be smaller).
+        """
+        band = []
+        band_rows = 0
+        for arr in arrays:
+            while arr.shape[0]:
+                taken = arr[: nb_rows - band_rows]
+                arr = arr[taken.shape[0] :]
+                band.append(taken)
+                band_rows += taken.shape[0]
+
+                if band_rows == nb_rows:
+                    yield band[0] if len(band) == 1 else np.concatenate(band)
+                    band = []
+                    band_rows = 0
+
+        if band:
+            yield band[0] if len(band) == 1 else np.concatenate(band)
 
     def addBuffer(self, dataset_name, data, metadata={}, compress=None):
         """
@@ -461,38 +2245,29 @@ class RandomAccessBuffer:
         # by converting nmpy arrays to list
         safe_meta = Tools.make_safe_object(metadata)
 
-        # create a hash name for this array and a path on disk to write it temporarily
-        hashedName = Tools.hashText(dataset_name)
-        file_path = os.path.join(self._working_dir, hashedName)
-
-        # If compressing is enabled, we must do it before metadata because we need
-        # bytelength of the compressed buffer
-        byte_length = len(data)
-        bytes = data
-        if compress == "gzip":
-            bytes = zlib.compress(bytes)
-            byte_length = len(bytes)
-
         # Create the metadata entry
         dataset_meta = {
             "name": dataset_name,
-            "filePath": file_path,
             "metadata": safe_meta,
             "codecMeta": {
                 "byteOffset": None,  # computed at write time
-                "byteLength": byte_length,
+                "byteLength": len(data),  # updated when compressing
                 "type": TYPES.BUFFER,
                 "compression": compress,
             },
         }
 
-        self._rab_index.append(dataset_meta)
+        def encode():
+            bytes = data
+            if compress == "gzip":
+                bytes = zlib.compress(bytes)
 
-        # write the file in the temps dir.
+            dataset_meta["codecMeta"]["byteLength"] = len(bytes)
+            return bytes
+
+        # stage the dataset (in the temps dir, by default).
         # We'll fetch this one when we write the whole file
-        f = open(file_path, "w+b")
-        f.write(bytes)
-        f.close()
+        self._submitDataset(dataset_meta, encode)
 
     def addText(self, dataset_name, data, metadata={}, compress=None):
         if self.hasDataset(dataset_name):
@@ -510,40 +2285,30 @@ class RandomAccessBuffer:
         # by converting nmpy arrays to list
         safe_meta = Tools.make_safe_object(metadata)
 
-        # create a hash name for this array and a path on disk to write it temporarily
-        hashedName = Tools.hashText(dataset_name)
-        file_path = os.path.join(self._working_dir, hashedName)
-
-        # converting into a binary string
-        bytes = data.encode("utf-8", "strict")
-
-        # If compressing is enabled, we must do it before metadata because we need
-        # bytelength of the compressed buffer
-        byte_length = len(bytes)
-        if compress == "gzip":
-            bytes = zlib.compress(bytes)
-            byte_length = len(bytes)
-
         # Create the metadata entry
         dataset_meta = {
             "name": dataset_name,
-            "filePath": file_path,
             "metadata": safe_meta,
             "codecMeta": {
                 "byteOffset": None,  # computed at write time
-                "byteLength": byte_length,
+                "byteLength": None,  # computed when encoding
                 "type": TYPES.TEXT,
                 "compression": compress,
             },
         }
 
-        self._rab_index.append(dataset_meta)
+        def encode():
+            # converting into a binary string
+            bytes = data.encode("utf-8", "strict")
+            if compress == "gzip":
+                bytes = zlib.compress(bytes)
+
+            dataset_meta["codecMeta"]["byteLength"] = len(bytes)
+            return bytes
 
-        # write the file in the temps dir.
+        # stage the dataset (in the temps dir, by default).
         # We'll fetch this one when we write the whole file
-        f = open(file_path, "w+b")
-        f.write(bytes)
-        f.close()
+        self._submitDataset(dataset_meta, encode)
 
     def addDataframe(
         self,
@@ -568,10 +2333,6 @@ class RandomAccessBuffer:
         # by converting nmpy arrays to list
         safe_meta = Tools.make_safe_object(metadata)
 
-        # create a hash name for this array and a path on disk to write it temporarily
-        hashedName = Tools.hashText(dataset_name)
-        file_path = os.path.join(self._working_dir, hashedName)
-
         # Make a deep copy in case the original needs to be kept as is.
         # Also, convert to better types (dtypes of string will no longer be 'object' but 'string')
         df = data.copy()
@@ -584,107 +2345,104 @@ class RandomAccessBuffer:
 
         column_info = []
 
-        # This is holding all the bytes
-        byte_arr = b""
-
-        # For each column (by their name), we test what is the type being used
-        # and replace the 64 bit data by 32 bits counterparts
-        for col_name in df:
-            data = df[col_name].to_numpy()
-            item = {
-                "key": col_name,
-            }
-
-            # special case for strings: we check which one is the longest (in bytes within the )
-            if data.dtype == object:
-                item["endianess"] = Tools.getNumpyArrayEndianness(data)
-                item["originalType"] = "text"
-                item["encodingType"] = "text"
-                data = data.tolist()
-                test_str_arr = data
-                # get the bytesize of the longest string
-                max_byte_size = (
-                    df[col_name].str.encode(encoding="utf-8").str.len().max()
-                )
-                item["maxByteSize"] = int(
-                    max_byte_size
-                )  # avod having single numbers being left as numpy int64
-                # expand each string to the same max size
-                for i in range(0, len(data)):
-                    s = data[i]
-                    s_byte_size = len(s.encode("utf-8"))
-                    data[i] = s + (max_byte_size - s_byte_size) * "\0"
-                    byte_arr += data[i].encode("utf-8")
-
-            # special case for booleans: saved as uint8
-            elif data.dtype == bool:
-                item["endianess"] = Tools.getNumpyArrayEndianness(data)
-                data = data.astype(np.uint8)
-                item["originalType"] = np.dtype(bool).name
-                item["encodingType"] = np.dtype(np.uint8).name
-                byte_arr += data.tobytes()
-
-            # interesting read about Numpy type hierarchy:
-            # https://numpy.org/doc/stable/reference/arrays.scalars.html
-
-            # Special case for floating point column
-            elif np.issubdtype(data.dtype, np.floating):
-                item["endianess"] = Tools.getNumpyArrayEndianness(data)
-                # this means all the float64 are being converted into float32
-                if force_type_compatibility:
-                    data = data.astype(np.float32)
-
-                item["originalType"] = np.dtype(data.dtype).name
-                item["encodingType"] = np.dtype(data.dtype).name
-                byte_arr += data.tobytes()
-
-            # Special case for integer column
-            elif np.issubdtype(data.dtype, np.integer):
-                item["endianess"] = Tools.getNumpyArrayEndianness(data)
-                # change integer types to a smaller one to gain some encoding room (non destructive)
-                smaller_int_dtype = Tools.get_smallest_integer_dtype(data)
-                item["originalType"] = np.dtype(data.dtype).name
-                item["encodingType"] = np.dtype(smaller_int_dtype).name
-                data = data.astype(smaller_int_dtype)
-
-                byte_arr += data.tobytes()
-
-            # Data is of an unsupported type
-            else:
-                raise ValueError(
-                    f"Column {col_name} is of an unsupported type: {np.dtype(data.dtype).name}"
-                )
-
-            column_info.append(item)
-
-        byte_length = len(byte_arr)
-        if compress == "gzip":
-            byte_arr = zlib.compress(byte_arr)
-            byte_length = len(byte_arr)
-
         # Create the metadata entry
         dataset_meta = {
             "name": dataset_name,
-            "filePath": file_path,
             "metadata": safe_meta,
             "codecMeta": {
                 "byteOffset": None,  # computed at write time
-                "byteLength": byte_length,
+                "byteLength": None,  # computed when encoding
                 "type": TYPES.DATAFRAME,
                 "compression": compress,
                 "rows": nb_row,
                 "columns": nb_col,
-                "columnInfo": column_info,
+                "columnInfo": column_info,  # filled when encoding
             },
         }
 
-        self._rab_index.append(dataset_meta)
+        def encode():
+            # This is holding all the bytes
+            byte_arr = b""
+
+            # For each column (by their name), we test what is the type being used
+            # and replace the 64 bit data by 32 bits counterparts
+            for col_name in df:
+                data = df[col_name].to_numpy()
+                item = {
+                    "key": col_name,
+                }
+
+                # special case for strings: we check which one is the longest (in bytes within the )
+                if data.dtype == object:
+                    item["endianess"] = Tools.getNumpyArrayEndianness(data)
+                    item["originalType"] = "text"
+                    item["encodingType"] = "text"
+                    data = data.tolist()
+                    test_str_arr = data
+                    # get the bytesize of the longest string
+                    max_byte_size = (
+                        df[col_name].str.encode(encoding="utf-8").str.len().max()
+                    )
+                    item["maxByteSize"] = int(
+                        max_byte_size
+                    )  # avod having single numbers being left as numpy int64
+                    # expand each string to the same max size
+                    for i in range(0, len(data)):
+                        s = data[i]
+                        s_byte_size = len(s.encode("utf-8"))
+                        data[i] = s + (max_byte_size - s_byte_size) * "\0"
+                        byte_arr += data[i].encode("utf-8")
+
+                # special case for booleans: saved as uint8
+                elif data.dtype == bool:
+                    item["endianess"] = Tools.getNumpyArrayEndianness(data)
+                    data = data.astype(np.uint8)
+                    item["originalType"] = np.dtype(bool).name
+                    item["encodingType"] = np.dtype(np.uint8).name
+                    byte_arr += data.tobytes()
+
+                # interesting read about Numpy type hierarchy:
+                # https://numpy.org/doc/stable/reference/arrays.scalars.html
+
+                # Special case for floating point column
+                elif np.issubdtype(data.dtype, np.floating):
+                    item["endianess"] = Tools.getNumpyArrayEndianness(data)
+                    # this means all the float64 are being converted into float32
+                    if force_type_compatibility:
+                        data = data.astype(np.float32)
+
+                    item["originalType"] = np.dtype(data.dtype).name
+                    item["encodingType"] = np.dtype(data.dtype).name
+                    byte_arr += data.tobytes()
+
+                # Special case for integer column
+                elif np.issubdtype(data.dtype, np.integer):
+                    item["endianess"] = Tools.getNumpyArrayEndianness(data)
+                    # change integer types to a smaller one to gain some encoding room (non destructive)
+                    smaller_int_dtype = Tools.get_smallest_integer_dtype(data)
+                    item["originalType"] = np.dtype(data.dtype).name
+                    item["encodingType"] = np.dtype(smaller_int_dtype).name
+                    data = data.astype(smaller_int_dtype)
+
+                    byte_arr += data.tobytes()
+
+                # Data is of an unsupported type
+                else:
+                    raise ValueError(
+                        f"Column {col_name} is of an unsupported type: {np.dtype(data.dtype).name}"
+                    )
+
+                column_info.append(item)
+
+            if compress == "gzip":
+                byte_arr = zlib.compress(byte_arr)
 
-        # write the file in the temps dir.
+            dataset_meta["codecMeta"]["byteLength"] = len(byte_arr)
+            return byte_arr
+
+        # stage the dataset (in the temps dir, by default).
         # We'll fetch this one when we write the whole file
-        f = open(file_path, "w+b")
-        f.write(byte_arr)
-        f.close()
+        self._submitDataset(dataset_meta, encode)
 
     def addDataset(
         self,
@@ -695,24 +2453,33 @@ class RandomAccessBuffer:
         compress=None,
         order="C",
         force_type_compatibility=True,
+        chunks=None,
+        shape=None,
+        dtype=None,
     ):
         """
         One add method to rule them all.
         Things happen in the following order:
-        - If 'data' is a Numpy Array, it routes the method to addNumericalDataset
+        - If 'data' is a Numpy Array (or a memmap), or pieces of an array along with its
+          'shape' and 'dtype', it routes the method to addNumericalDataset
         - If 'data' is a text, it routes the method to addText
         - If 'data' is some bytes, it routes the method to addBuffer
         - If 'data' is an object, it routes the method to addObject
+        - If 'data' is another buffer (memoryview, array.array...), it routes the method
+          to addNumericalDataset
         - If 'data' is None and filepath is an existing file, it routes the method to addFile
         """
 
-        if type(data) == np.ndarray:
+        if isinstance(data, np.ndarray) or shape is not None:
             return self.addNumericalDataset(
                 dataset_name=dataset_name,
                 data=data,
                 metadata=metadata,
                 compress=compress,
                 order=order,
+                chunks=chunks,
+                shape=shape,
+                dtype=dtype,
             )
         elif isinstance(data, pd.DataFrame):
             return self.addDataframe(
@@ -729,7 +2496,7 @@ class RandomAccessBuffer:
                 metadata=metadata,
                 compress=compress,
             )
-        elif type(data) == bytes:
+        elif isinstance(data, (bytes, bytearray)):
             return self.addBuffer(
                 dataset_name=dataset_name,
                 data=data,
@@ -743,6 +2510,15 @@ class RandomAccessBuffer:
                 metadata=metadata,
                 compress=compress,
             )
+        elif data is not None and Tools.isBuffer(data):
+            return self.addNumericalDataset(
+                dataset_name=dataset_name,
+                data=data,
+                metadata=metadata,
+                compress=compress,
+                order=order,
+                chunks=chunks,
+            )
         elif data == None and isinstance(filepath, str):
             return self.addFile(
                 dataset_name=dataset_name, filepath=filepath, metadata=metadata
@@ -752,246 +2528,255 @@ class RandomAccessBuffer:
                 "The type of dataset could not be determined: ", type(data)
             )
 
-    def digNumericalDataset(self, dataset_name, position):
+    def _updateOffsets(self):
         """
-        Dig into a numerical dataset to find a single value in a random access fashion,
-        without
+        Updates the offsets based on the order of the datasets
         """
-        entry = self._getEntry(dataset_name)
-
-        if not entry:
-            raise KeyError("The dataset {} does not exist.".format(dataset_name))
-
-        codec_meta = entry["codecMeta"]
-
-        if codec_meta["type"] not in TYPES.NUMERICALS:
-            raise ValueError("Only numerical datasets can be dug in.")
+        offset = 0
+        for entry in self._rab_index:
+            entry["codecMeta"]["byteOffset"] = offset
+            offset += entry["codecMeta"]["byteLength"]
 
-        if "compression" in codec_meta and codec_meta["compression"] != None:
+    def _encodeHeader(self, index, header_format="yaml"):
+        """
+        Create a binary version of the header, in YAML or in JSON.
+        Note: the header is padded with a new line and a new line char is also
+        added at the end (before encoding) to ensure better readability of the
+        header with CLIs such as less/more
+        """
+        if header_format == "yaml":
+            header_str = yaml.dump(index, Dumper=yaml.Dumper, allow_unicode=True)
+        elif header_format == "json":
+            # one dataset per line, for readability
+            header_str = (
+                "[\n"
+                + ",\n".join(json.dumps(entry, ensure_ascii=False) for entry in index)
+                + "\n]"
+            )
+        else:
             raise ValueError(
-                "The dataset is compressed, digging is not possible. You can use .getDataset() and then use it as Numpy array."
+                "The header format must be one of {}.".format(HEADER_FORMATS)
             )
 
-        # transform position into a list for consistency
-        if type(position) == int or type(position) == float:
-            position = [position]
-
-        # computing strides in case they were missing
-        if "strides" not in codec_meta:
-            codec_meta["strides"] = self._computeStrides(codec_meta)
+        return ("\n" + header_str + "\n").encode("utf-8", "strict")
 
-        print("computed strides", self._computeStrides(codec_meta))
+    def write(self, filepath, header_format="yaml", binary_index=False):
+        """
+        Write all the datasets into a RAB file.
+        The header is written in YAML, unless header_format is "json". A JSON header
+        is still valid YAML 1.2 and is much faster to write and to parse.
+        With binary_index, a compact index sorted by dataset name is also written in a
+        sidecar file (filepath + ".rabidx") so that a reader can find a dataset without
+        decoding the header, see read().
+        """
+        self._waitForJobs()
+        self._updateOffsets()
 
-        strides = codec_meta["strides"]
-        shape = codec_meta["shape"]
-        nb_dimensions = len(shape)
-        if len(position) != nb_dimensions:
-            raise IndexError(
-                "The dataset is {}-dimensional, the position must also have {} dimensions.".format(
-                    nb_dimensions, nb_dimensions
-                )
+        # the filePath and scratchOffset props were just a temporary thing to help
+        # but we dont want them for the production file
+        index_copy = []
+        for entry in self._rab_index:
+            index_copy.append(
+                {k: v for k, v in entry.items() if k not in STAGING_KEYS}
             )
 
-        bytes_per_elem = np.dtype(codec_meta["type"]).itemsize
-        elements_to_jump = 0
-
-        for d in range(0, nb_dimensions):
-            if position[d] < 0 or position[d] >= shape[d]:
-                raise IndexError(
-                    "The position {} is out of range. This axis range is [0, {}]".format(
-                        position[d], shape[d] - 1
-                    )
-                )
-            elements_to_jump += strides[d] * position[d]
-
-        byte_offset_from_dataset_start = int(bytes_per_elem) * elements_to_jump
-        byte_offset = (
-            self._data_byte_offset
-            + codec_meta["byteOffset"]
-            + byte_offset_from_dataset_start
-        )
+        byte_metadata = self._encodeHeader(index_copy, header_format)
+        metadata_byte_length = len(byte_metadata)
 
-        f = open(self._filepath, "rb")
-        f.seek(byte_offset)
-        buffer = f.read(bytes_per_elem)
-        f.close()
+        with open(filepath, "w+b") as out_file:
+            out_file.write(MAGIC_NUMBER.encode())
+            out_file.write(struct.pack("I", metadata_byte_length))
+            out_file.write(byte_metadata)
 
-        unpack_seq = (
-            SHORT_ENDIANNESS[codec_meta["endianness"]]
-            + UNPACK_TYPES[codec_meta["type"]]
-        )
+            for entry in self._rab_index:
+                self._writeStagedDataset(entry, out_file)
 
-        value = struct.unpack(unpack_seq, buffer)
-        # if codec_meta["byteOrder"] == 'C'
+        # in case the file is rewritten too fast for its modification time to change
+        HEADER_CACHE.invalidate(filepath)
+        self._writeBinaryIndex(filepath, index_copy, metadata_byte_length, binary_index)
 
-        return value[0]
+    def _writeBinaryIndex(self, filepath, index, header_byte_length, binary_index):
+        """
+        Write the binary index sidecar of a RAB file that was just written or, if it is
+        not wanted, remove the one left by a previous version of the file as it would
+        not match anymore.
+        """
+        sidecar_path = BinaryIndex.getSidecarPath(filepath)
+        if binary_index:
+            with open(filepath, "rb") as f:
+                file_identity = Tools.getFileIdentity(filepath, f)
+            BinaryIndex.writeBinaryIndex(
+                sidecar_path, index, file_identity, header_byte_length
+            )
+        elif os.path.exists(sidecar_path):
+            os.remove(sidecar_path)
 
-    def digInBuffer(self, dataset_name, byte_offset, byte_length):
+    def clean(self):
         """
-        There is no restriction of the type of dataset that it originally is,
-        hence any dataset (buffer, but also object, text and numerical) can be dug this
-        way. It's to the discretion of the user to know if it makes sense.
-        position is in number of byte from the begining of the {dataset_name} dataset
+        Clean all the temporary files
         """
-        entry = self._getEntry(dataset_name)
+        self._shutdownWorkers()
+        self._staged_in_memory = {}
+        self._staged_byte_length = 0
+        if self._scratch_file is not None:
+            self._scratch_file.close()
+            self._scratch_file = None
+            self._scratch_byte_length = 0
 
-        if not entry:
-            raise KeyError("The dataset {} does not exist.".format(dataset_name))
+        if self._working_dir is None:
+            return
 
-        codec_meta = entry["codecMeta"]
+        shutil.rmtree(self._working_dir, ignore_errors=True)
+        self._working_dir = None
 
-        if byte_offset < 0 or (byte_offset + byte_length) > codec_meta["byteLength"]:
-            raise IndexError("The byte offset and byte length are out of range")
 
-        total_byte_offset = (
-            self._data_byte_offset + codec_meta["byteOffset"] + byte_offset
-        )
+class RandomAccessBufferStreamWriter(RandomAccessBuffer):
+    """
+    Writes a RAB file directly, without staging the datasets in temporary files.
+    Each dataset is written at its final position as soon as it is added, after some
+    space reserved for the header. The header is written in that space by close().
 
-        f = open(self._filepath, "rb")
-        f.seek(total_byte_offset)
-        buffer = f.read(byte_length)
-        f.close()
+    If the header turns out to be larger than the reserved space, close() has to move
+    all the datasets to make room for it, which costs a copy of the whole file. For
+    files with many datasets, reserve more space with header_reserve (in bytes).
 
-        return buffer
+    With workers, datasets are encoded in a thread pool, as with RandomAccessBuffer,
+    and written in the order their encoding ends.
+    """
 
-    def _computeStrides(self, codec_meta):
-        """
-        Computes the strides if by any encoding mistake they were not part of the
-        metadata.
-        """
-        shape = codec_meta["shape"]
-        nb_dimensions = len(shape)
-        strides = [1]
+    def __init__(
+        self,
+        filepath,
+        header_reserve=65536,
+        header_format="json",
+        binary_index=False,
+        workers=None,
+    ):
+        super().__init__(workers=workers)
+        if header_format not in HEADER_FORMATS:
+            raise ValueError(
+                "The header format must be one of {}.".format(HEADER_FORMATS)
+            )
 
-        # compute the strides
-        for d in range(1, nb_dimensions):
-            strides.append(strides[-1] * shape[-d])
+        self._out_filepath = filepath
+        self._header_reserve = header_reserve
+        self._header_format = header_format
+        self._binary_index_wanted = binary_index
+        self._data_byte_length = 0  # bytes written after the reserved header space
 
-        strides.reverse()  # the strides are now in the same order as the shape
-        return strides
+        self._out_file = open(filepath, "w+b")
+        self._out_file.write(MAGIC_NUMBER.encode())
+        self._out_file.write(struct.pack("I", header_reserve))
+        self._out_file.write(b" " * header_reserve)
 
-    def hasDataset(self, dataset_name):
+    def _stageDataset(self, dataset_meta, data):
         """
-        Check if a dataset exists in the index
+        Write the dataset straight at the end of the output file.
         """
-        for entry in self._rab_index:
-            if entry["name"] == dataset_name:
-                return True
-        return False
+        with self._staging_lock:
+            self._getOutFile().write(data)
+            dataset_meta["codecMeta"]["byteOffset"] = self._data_byte_length
+            self._data_byte_length += dataset_meta["codecMeta"]["byteLength"]
 
-    def read(self, filepath):
+    def _stagePieces(self, dataset_meta, pieces):
         """
-        Read from a file
+        Write the pieces of a dataset straight at the end of the output file.
         """
-        f = open(filepath, "rb")
-        self._filepath = filepath
-        magic = f.read(3).decode()
-
-        if magic != MAGIC_NUMBER:
-            raise ValueError("The file is not a RandomAccessBuffer.")
-
-        # reading the index
-        header_bytelength = struct.unpack("I", f.read(4))[0]
-
-        # Try decoding in yaml, if fails, back to json (as the spec of RAB was originally using json)
-        header_str = f.read(header_bytelength).decode("utf-8", "strict")
-        try:
-            self._rab_index = yaml.load(header_str, Loader=yaml.Loader)
-        except yaml.scanner.ScannerError as e:
-            self._rab_index = json.loads(header_str)
-
-        # the byte offset of the very first dataset
-        self._data_byte_offset = 7 + header_bytelength
-
-        f.close()
-
-    def _updateOffsets(self):
+        with self._staging_lock:
+            out_file = self._getOutFile()
+            try:
+                byte_length = Tools.writePieces(out_file, pieces)
+            except Exception:
+                # the output file is left as it was before this dataset
+                out_file.seek(self._getDataStart() + self._data_byte_length)
+                out_file.truncate()
+                raise
+
+            dataset_meta["codecMeta"]["byteOffset"] = self._data_byte_length
+            dataset_meta["codecMeta"]["byteLength"] = byte_length
+            self._data_byte_length += byte_length
+
+    def _getDataStart(self):
         """
-        Updates the offsets based on the order of the datasets
+        Position of the first dataset in the output file, after the reserved header.
         """
-        offset = 0
-        for entry in self._rab_index:
-            entry["codecMeta"]["byteOffset"] = offset
-            offset += entry["codecMeta"]["byteLength"]
-
-    def write(self, filepath):
-        self._updateOffsets()
-
-        index_copy = copy.deepcopy(self._rab_index)
-
-        # gather all files to write
-        metadata_tmp_file = os.path.join(self._working_dir, "metadata")
-        files_to_add = [metadata_tmp_file]
-
-        # the filePath prop was just a temporary thing to help
-        # but we dont want it for the production file
-        for entry in index_copy:
-            files_to_add.append(entry["filePath"])
-            del entry["filePath"]
-
-        # Create a binary version of the yaml header.
-        # Note: the header is padded with a new line and a new line char is also
-        # added at the end (before encoding) to ensure better readability of the
-        # header with CLIs such as less/more
-        byte_metadata = (
-            "\n" + yaml.dump(index_copy, Dumper=yaml.Dumper, allow_unicode=True) + "\n"
-        ).encode("utf-8", "strict")
-        metadata_byte_length = len(byte_metadata)
-
-        # write the metadata file
-        meta_file = open(metadata_tmp_file, "w+b")
-        meta_file.write(byte_metadata)
-        meta_file.close()
-
-        # initialise the final file with the magic number and the metadata byte length
-        # out_file = open(filepath, "w+b")
-        # out_file.write(MAGIC_NUMBER.encode())
-        # out_file.write(struct.pack('I', metadata_byte_length))
-        #
-        # # writing all the files by block
-        # for tempfile_path in files_to_add:
-        #     tempfile = open(tempfile_path, "rb")
-        #     while True:
-        #         data = tempfile.read(65536)
-        #         if data:
-        #             out_file.write(data)
-        #         else:
-        #             break
-        #
-        # out_file.close()
-
-        with open(filepath, "w+b") as out_file:
-            out_file.write(MAGIC_NUMBER.encode())
-            out_file.write(struct.pack("I", metadata_byte_length))
-
-            # writing all the files by block
-            for tempfile_path in files_to_add:
-                tempfile = open(tempfile_path, "rb")
-                while True:
-                    data = tempfile.read(65536)
-                    if data:
-                        out_file.write(data)
-                    else:
-                        break
+        return len(MAGIC_NUMBER) + 4 + self._header_reserve
 
-    def clean(self):
+    def _stageFile(self, dataset_meta, filepath):
         """
-        Clean all the temporary files
+        Copy the content of the file straight at the end of the output file.
         """
-        shutil.rmtree(self._working_dir, ignore_errors=True)
+        byte_length = dataset_meta["codecMeta"]["byteLength"]
+        with self._staging_lock, open(filepath, "rb") as f:
+            Tools.copyFileContent(f, self._getOutFile(), byte_length)
+            dataset_meta["codecMeta"]["byteOffset"] = self._data_byte_length
+            self._data_byte_length += byte_length
+
+    def _getOutFile(self):
+        if self._out_file is None:
+            raise ValueError("The file {} is closed.".format(self._out_filepath))
+        return self._out_file
+
+    def write(self, filepath=None, header_format=None, binary_index=None):
+        raise ValueError(
+            "A stream writer writes {} as datasets are added, call close() to finish it.".format(
+                self._out_filepath
+            )
+        )
 
+    def close(self):
+        """
+        Write the header and close the output file.
+        """
+        super().close()
+        if getattr(self, "_out_file", None) is None:
+            return
 
-"""
-Write piece by piece: https://stackoverflow.com/questions/5509872/python-append-multiple-files-in-given-order-to-one-big-file/18277956
-
-# for text file
-# tempfiles is an ordered list of temp files (open for reading)
-f = open("bigfile.txt", "w")
-for tempfile in tempfiles:
-    while True:
-        data = tempfile.read(65536)
-        if data:
-            f.write(data)
+        # the datasets that could not be encoded are left out of the header, so that
+        # the file remains readable, and the error is raised once it is closed
+        error = None
+        try:
+            self._waitForJobs()
+        except Exception as e:
+            error = e
+
+        out_file = self._out_file
+        self._out_file = None
+        index = [
+            {k: v for k, v in entry.items() if k not in STAGING_KEYS}
+            for entry in self._rab_index
+        ]
+        byte_metadata = self._encodeHeader(index, self._header_format)
+
+        if len(byte_metadata) <= self._header_reserve:
+            # white spaces at the end of the header are ignored by YAML and JSON
+            out_file.seek(len(MAGIC_NUMBER))
+            out_file.write(struct.pack("I", self._header_reserve))
+            out_file.write(byte_metadata)
+            out_file.write(b" " * (self._header_reserve - len(byte_metadata)))
+            out_file.close()
+            header_byte_length = self._header_reserve
         else:
-            break
-"""
+            # the datasets are moved after the header, in a new file
+            tmp_filepath = self._out_filepath + ".tmp"
+            with open(tmp_filepath, "w+b") as tmp_file:
+                tmp_file.write(MAGIC_NUMBER.encode())
+                tmp_file.write(struct.pack("I", len(byte_metadata)))
+                tmp_file.write(byte_metadata)
+                Tools.copyFileContent(
+                    out_file,
+                    tmp_file,
+                    self._data_byte_length,
+                    self._getDataStart(),
+                )
+            out_file.close()
+            os.replace(tmp_filepath, self._out_filepath)
+            header_byte_length = len(byte_metadata)
+
+        HEADER_CACHE.invalidate(self._out_filepath)
+        self._writeBinaryIndex(
+            self._out_filepath, index, header_byte_length, self._binary_index_wanted
+        )
+
+        if error is not None:
+            raise error
@@ -0,0 +1,462 @@
+"""
+    The SharedDatasetCache module shares decoded datasets between the processes of a
+    machine with shared memory, so that a dataset is decoded by a single process and
+    takes memory only once.
+"""
+
+import os
+import mmap
+import json
+import time
+import struct
+import weakref
+import tempfile
+import threading
+import contextlib
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from randomaccessbuffer import Tools
+
+try:
+    import fcntl
+except ImportError:
+    # on Windows, the OS frees a shared memory block once no process uses it anymore
+    fcntl = None
+
+# ready flag, reference count, byte length of the JSON description
+BLOCK_HEADER = struct.Struct("<III")
+
+# pid of the process creating the block and creation time, so that a block which is
+# never made ready (its process was killed...) can be freed by the others
+BLOCK_CREATOR = struct.Struct("<Id")
+
+# the JSON description of the data follows the headers
+DESCRIPTION_OFFSET = BLOCK_HEADER.size + BLOCK_CREATOR.size
+
+# the data starts at an offset aligned for any dtype
+DATA_ALIGNMENT = 64
+
+# how long to wait for a dataset that another process is publishing, in seconds
+PUBLISH_TIMEOUT = 1.0
+
+# a block that is still not ready after that long is freed, even if the process that
+# created it is alive, in seconds
+STALE_TIMEOUT = 60.0
+
+# blocks are created with mode 0600, they are only shared between the processes of a
+# user: their names and the lock are per user
+USER_ID = os.getuid() if hasattr(os, "getuid") else 0
+
+# serializes the reference count updates between the processes
+LOCK_FILEPATH = os.path.join(
+    tempfile.gettempdir(), "randomaccessbuffer_shm_{}.lock".format(USER_ID)
+)
+
+
+class SharedDatasetCache:
+    """
+    A cache of decoded numerical and bytes datasets, shared by the processes of a
+    user on a machine. It is given to readers as any cache (see
+    RandomAccessBufferReader).
+
+    The first process that decodes a dataset publishes it in a shared memory block
+    named after the identity of the file and the name of the dataset. The other
+    processes map this block instead of decoding the dataset: numerical datasets are
+    returned as read-only Numpy arrays and bytes datasets as read-only memoryviews,
+    without any copy.
+
+    Each process using a block holds a reference to it, released by close() (or when
+    the process exits normally), and the block is freed once the last process released
+    it. The arrays and memoryviews obtained from the cache remain valid until they are
+    garbage collected. Blocks of processes that were killed are not freed, except the
+    ones they were publishing, freed by the next process that needs them.
+
+    A dataset that cannot be published (another process takes too long to publish it,
+    a block or the lock file belongs to another user...) is kept in the memory of the
+    process, so that it is not decoded again.
+
+    Shared memory blocks are used through the private attributes _fd and _name of
+    multiprocessing.shared_memory.SharedMemory, checked with Python 3.8.18 and 3.11.7.
+    """
+
+    def __init__(self):
+        # key -> (block name, decoded data), the block name is None for private data
+        self._datasets = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.publications = 0
+        self._finalizer = weakref.finalize(self, _releaseBlocks, self._datasets)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def canCache(self, dataset_type):
+        """
+        Tell if the datasets of a type can be cached.
+        """
+        return dataset_type == "bytes" or dataset_type in NUMERICAL_TYPES
+
+    def get(self, key):
+        """
+        Get a cached dataset, raise a KeyError when no process published it.
+        """
+        with self._lock:
+            if key in self._datasets:
+                self.hits += 1
+                return self._datasets[key][1]
+
+            name = getBlockName(key)
+            try:
+                block = _attachBlock(name)
+            except PermissionError:
+                # the block or the lock file belongs to another user
+                block = None
+
+            if block is None:
+                self.misses += 1
+                raise KeyError(key)
+
+            data = _mapBlock(block)
+            self._datasets[key] = (name, data)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """
+        Publish a dataset for the other processes. Returns the shared version of data,
+        or data itself when it could not be published (unsupported type, published by
+        another process at the same time...).
+        """
+        if isinstance(data, np.ndarray) and not data.dtype.hasobject:
+            description = {
+                "dtype": data.dtype.str,
+                "shape": list(data.shape),
+                "order": _getArrayOrder(data),
+            }
+            byte_length = data.nbytes
+        elif isinstance(data, (bytes, bytearray, memoryview)):
+            byte_length = memoryview(data).nbytes
+            description = {"dtype": None, "byteLength": byte_length}
+        else:
+            return data
+
+        with self._lock:
+            if key in self._datasets:
+                return self._datasets[key][1]
+
+            name = getBlockName(key)
+            block = None
+            try:
+                for timeout in [PUBLISH_TIMEOUT, 0]:
+                    block = _createBlock(name, description, byte_length)
+                    if block is not None:
+                        _fillBlock(block, data)
+                        self.publications += 1
+                        break
+
+                    # another process is publishing it, or just did. A block it
+                    # abandoned is freed, then published again
+                    block = _attachBlock(name, timeout)
+                    if block is not None:
+                        break
+            except PermissionError:
+                # the block or the lock file belongs to another user
+                block = None
+
+            if block is None:
+                # another process takes too long to publish it, or it cannot be
+                # published: it is not decoded again
+                self._datasets[key] = (None, data)
+                return data
+
+            shared_data = _mapBlock(block)
+            self._datasets[key] = (name, shared_data)
+            return shared_data
+
+    def close(self):
+        """
+        Release all the blocks used by this process. A block is freed when the last
+        process using it releases it.
+        """
+        self._finalizer()
+
+    def getStats(self):
+        """
+        Get the counters of the cache, as a dictionary.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "publications": self.publications,
+                "nbDatasets": len(self._datasets),
+            }
+
+
+# same as TYPES.NUMERICALS, the RandomAccessBuffer module cannot be imported from here
+NUMERICAL_TYPES = [
+    "bool",
+    "int8",
+    "uint8",
+    "int16",
+    "uint16",
+    "int32",
+    "uint32",
+    "int64",
+    "uint64",
+    "float16",
+    "float32",
+    "float64",
+    "complex64",
+    "complex128",
+]
+
+
+def getBlockName(key):
+    """
+    Get the name of the shared memory block of a cache key, for the current user. It
+    is short enough for every platform (31 characters on macOS).
+    """
+    return "rab_" + Tools.hashText("{} {}".format(USER_ID, key))[:24]
+
+
+@contextlib.contextmanager
+def _processLock():
+    """
+    Lock the reference counts of the blocks against the other processes.
+    """
+    if fcntl is None:
+        yield
+        return
+
+    with open(LOCK_FILEPATH, "a") as lock_file:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+def _openBlock(name, create=False, size=0):
+    """
+    Open a shared memory block, out of the resource tracker of Python, which would
+    free it when this process exits even though other processes are using it.
+    Reference counting takes care of it instead.
+    """
+    block = shared_memory.SharedMemory(name, create=create, size=size)
+    if fcntl is not None:
+        resource_tracker.unregister(block._name, "shared_memory")
+    return block
+
+
+def _createBlock(name, description, byte_length):
+    """
+    Create a block for byte_length bytes of data, or return None if it exists already.
+    It is not ready to be used by other processes until it is filled.
+    """
+    description = json.dumps(description).encode()
+    data_byte_offset = _getDataByteOffset(len(description))
+    try:
+        block = _openBlock(name, create=True, size=data_byte_offset + byte_length)
+    except FileExistsError:
+        return None
+
+    BLOCK_HEADER.pack_into(block.buf, 0, 0, 0, len(description))
+    BLOCK_CREATOR.pack_into(block.buf, BLOCK_HEADER.size, os.getpid(), time.time())
+    block.buf[DESCRIPTION_OFFSET : DESCRIPTION_OFFSET + len(description)] = description
+    return block
+
+
+def _fillBlock(block, data):
+    """
+    Copy the data into a block created by this process and make it ready. The block is
+    freed if it cannot be filled.
+    """
+    (_, _, description_length) = BLOCK_HEADER.unpack_from(block.buf, 0)
+    data_byte_offset = _getDataByteOffset(description_length)
+
+    try:
+        if isinstance(data, np.ndarray):
+            shared = np.ndarray(
+                data.shape,
+                dtype=data.dtype,
+                buffer=block.buf,
+                offset=data_byte_offset,
+                order=_getArrayOrder(data),
+            )
+            np.copyto(shared, data)
+            del shared
+        else:
+            view = memoryview(data).cast("B")
+            block.buf[data_byte_offset : data_byte_offset + len(view)] = view
+
+        with _processLock():
+            BLOCK_HEADER.pack_into(block.buf, 0, 1, 1, description_length)
+    except BaseException:
+        # no process uses a block that is not ready, the lock is not needed
+        _unlinkBlock(block)
+        block.close()
+        raise
+
+
+def _attachBlock(name, timeout=0):
+    """
+    Attach a block published by a process and take a reference to it. Returns None if
+    it does not exist, is being freed or is still not ready after timeout seconds.
+    A block abandoned by the process creating it is freed.
+    """
+    block = None
+    deadline = time.monotonic() + timeout
+    while True:
+        if block is None:
+            try:
+                block = _openBlock(name)
+            except FileNotFoundError:
+                return None
+            except ValueError:
+                # the process creating it did not give it its size yet
+                pass
+
+        if block is not None:
+            with _processLock():
+                (ready, ref_count, description_length) = BLOCK_HEADER.unpack_from(
+                    block.buf, 0
+                )
+                if ready and ref_count > 0:
+                    BLOCK_HEADER.pack_into(
+                        block.buf, 0, ready, ref_count + 1, description_length
+                    )
+                    return block
+
+                if not ready and _isAbandoned(block):
+                    _unlinkBlock(block)
+                    break
+
+            if ready:
+                break
+
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(0.001)
+
+    if block is not None:
+        block.close()
+    return None
+
+
+def _mapBlock(block):
+    """
+    Get the data of a block, as a read-only Numpy array or memoryview, then close the
+    block. The data is a view of its own read-only mapping of the block, which lives as
+    long as the data.
+    """
+    (_, _, description_length) = BLOCK_HEADER.unpack_from(block.buf, 0)
+    description = json.loads(
+        bytes(block.buf[DESCRIPTION_OFFSET : DESCRIPTION_OFFSET + description_length])
+    )
+    data_byte_offset = _getDataByteOffset(description_length)
+
+    if fcntl is None:
+        mapping = mmap.mmap(-1, block.size, tagname=block.name, access=mmap.ACCESS_READ)
+    else:
+        mapping = mmap.mmap(block._fd, block.size, access=mmap.ACCESS_READ)
+    block.close()
+
+    if description["dtype"] is None:
+        byte_length = description["byteLength"]
+        return memoryview(mapping)[data_byte_offset : data_byte_offset + byte_length]
+
+    return np.ndarray(
+        description["shape"],
+        dtype=np.dtype(description["dtype"]),
+        buffer=mapping,
+        offset=data_byte_offset,
+        order=description["order"],
+    )
+
+
+def _getArrayOrder(arr):
+    """
+    Get the order an array is stored in, in the block: Fortran arrays stay Fortran.
+    """
+    return "F" if arr.flags.f_contiguous and not arr.flags.c_contiguous else "C"
+
+
+def _getDataByteOffset(description_length):
+    header_length = DESCRIPTION_OFFSET + description_length
+    return -(-header_length // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+def _releaseBlocks(datasets):
+    """
+    Release the blocks used by a process, freeing the ones no other process uses.
+    """
+    for (name, _) in datasets.values():
+        # on Windows, the OS frees the blocks by itself
+        if fcntl is None or name is None:
+            continue
+        try:
+            block = _openBlock(name)
+        except FileNotFoundError:
+            continue
+
+        with _processLock():
+            (ready, ref_count, description_length) = BLOCK_HEADER.unpack_from(
+                block.buf, 0
+            )
+            ref_count = max(0, ref_count - 1)
+            BLOCK_HEADER.pack_into(block.buf, 0, ready, ref_count, description_length)
+            if ref_count == 0:
+                _unlinkBlock(block)
+        block.close()
+
+    datasets.clear()
+
+
+def _unlinkBlock(block):
+    """
+    Free a block, once the processes that opened it closed it. Must be called under
+    the process lock, unless the block is not ready.
+    """
+    if fcntl is None:
+        return
+
+    # unlink() takes it out of the resource tracker, it must be in it
+    resource_tracker.register(block._name, "shared_memory")
+    try:
+        block.unlink()
+    except FileNotFoundError:
+        # freed by another process in the meantime
+        pass
+
+
+def _isAbandoned(block):
+    """
+    Check if a block that is not ready will never be: the process creating it is gone
+    or it was created too long ago.
+    """
+    # on Windows, the OS frees the blocks by itself (and os.kill() would terminate the
+    # process)
+    if fcntl is None:
+        return False
+
+    (pid, creation_time) = BLOCK_CREATOR.unpack_from(block.buf, BLOCK_HEADER.size)
+    if pid == 0:
+        # the process creating it did not write its headers yet
+        return False
+
+    if time.time() - creation_time > STALE_TIMEOUT:
+        return True
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        # the process exists, it belongs to another user
+        pass
+    return False
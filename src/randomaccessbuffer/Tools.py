@@ -10,8 +10,22 @@ import tempfile
 import os
 import hashlib
 import json
+import zlib
 import numpy as np
 
+# Positional reads (pread) are not available on every platform (eg. Windows)
+HAS_PREAD = hasattr(os, "pread")
+HAS_PREADV = hasattr(os, "preadv")
+
+# Size of the blocks used to copy files when the OS cannot do it by itself
+COPY_BLOCK_SIZE = 65536
+
+# Approximate size of the pieces large arrays are written (and compressed) in
+PIECE_BYTE_SIZE = 16 * 1024 * 1024
+
+# Size of the pieces compressed datasets are read and decompressed in
+DECOMPRESS_BLOCK_SIZE = 1024 * 1024
+
 
 def randomString(stringLength=10):
     """
@@ -33,6 +47,85 @@ def createWorkingDir():
     return work_dir_path
 
 
+def pread(fd, byte_offset, byte_length):
+    """
+    Read byte_length bytes from a file descriptor, starting at byte_offset, without
+    moving the file cursor. This is safe to call from multiple threads sharing the
+    same descriptor.
+
+    Args:
+        fd (int): a file descriptor open for reading
+        byte_offset (int): where to start reading, from the begining of the file
+        byte_length (int): number of bytes to read
+
+    Returns:
+        bytes: shorter than byte_length only if the end of the file is reached
+    """
+    buffer = os.pread(fd, byte_length, byte_offset)
+
+    # a single call is capped by the OS (about 2GB on Linux)
+    if len(buffer) == byte_length or len(buffer) == 0:
+        return buffer
+
+    pieces = [buffer]
+    read_length = len(buffer)
+    while read_length < byte_length:
+        piece = os.pread(fd, byte_length - read_length, byte_offset + read_length)
+        if not piece:
+            break
+        pieces.append(piece)
+        read_length += len(piece)
+
+    return b"".join(pieces)
+
+
+def preadInto(fd, byte_offset, out):
+    """
+    Same as pread, but the bytes are read into an existing writable buffer rather than
+    into a new bytes object.
+
+    Args:
+        fd (int): a file descriptor open for reading
+        byte_offset (int): where to start reading, from the begining of the file
+        out (memoryview): a writable byte buffer, filled from its start
+
+    Returns:
+        int: number of bytes read, lower than the size of out only if the end of the
+            file is reached
+    """
+    read_length = 0
+    while read_length < len(out):
+        n = os.preadv(fd, [out[read_length:]], byte_offset + read_length)
+        if n == 0:
+            break
+        read_length += n
+
+    return read_length
+
+
+def getFileIdentity(filepath, f):
+    """
+    Get what identifies the content of an open file: its absolute path, device, inode,
+    size and modification time. The identity changes when the file is rewritten or
+    replaced. It only takes a single stat of the open file.
+
+    Args:
+        filepath (string): path the file was opened from
+        f (file): the open file
+
+    Returns:
+        tuple
+    """
+    stat = os.fstat(f.fileno())
+    return (
+        os.path.abspath(filepath),
+        stat.st_dev,
+        stat.st_ino,
+        stat.st_size,
+        stat.st_mtime_ns,
+    )
+
+
 def isValidDatasetName(name):
     """
     Checks if the given dataset name is valid.
@@ -125,3 +218,235 @@ def get_smallest_integer_dtype(arr):
 
     # Worst case scenario, just stay as it already is
     return arr.dtype
+
+
+def coalesceRanges(starts, ends, max_gap=0):
+    """
+    Merge byte ranges that overlap, touch or are separated by at most max_gap bytes,
+    so that they can be fetched with as few reads as possible.
+
+    Args:
+        starts (array-like): start of each range, sorted in ascending order
+        ends (array-like): end (exclusive) of each range
+        max_gap (int): largest number of unrequested bytes allowed between two ranges
+            merged together
+
+    Returns:
+        list: tuples (start, end, first, last) where [start, end) is the merged range
+        and [first, last) are the indices of the ranges it covers
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    if len(starts) == 0:
+        return []
+
+    running_ends = np.maximum.accumulate(ends)
+    breaks = np.nonzero(starts[1:] - running_ends[:-1] > max_gap)[0] + 1
+    firsts = np.concatenate(([0], breaks))
+    lasts = np.concatenate((breaks, [len(starts)]))
+
+    return [
+        (int(starts[first]), int(running_ends[last - 1]), int(first), int(last))
+        for first, last in zip(firsts, lasts)
+    ]
+
+
+def isBuffer(obj):
+    """
+    Check if an object supports the buffer protocol.
+
+    Args:
+        obj: any object
+
+    Returns:
+        bool
+    """
+    try:
+        memoryview(obj)
+        return True
+    except TypeError:
+        return False
+
+
+def iterArrayPieces(arr, order="C", piece_byte_size=PIECE_BYTE_SIZE):
+    """
+    Iterate over the bytes of an array, as tobytes(order) would give them, in pieces
+    of about piece_byte_size bytes. The pieces are slices along the first axis that
+    are not copied when they are contiguous, so that a memmap is read as it goes.
+
+    Args:
+        arr (np.ndarray): the array
+        order (string): "C" or "F"
+        piece_byte_size (int): approximate byte size of the pieces
+
+    Returns:
+        generator: of uint8 arrays
+    """
+    # the bytes of an array in F order are the bytes of its transpose in C order
+    if order == "F":
+        arr = arr.T
+
+    if arr.ndim == 0 or arr.shape[0] == 0:
+        yield np.ascontiguousarray(arr).reshape(-1).view(np.uint8)
+        return
+
+    row_byte_size = max(1, arr.nbytes // arr.shape[0])
+    rows_per_piece = max(1, piece_byte_size // row_byte_size)
+    for start in range(0, arr.shape[0], rows_per_piece):
+        piece = np.ascontiguousarray(arr[start : start + rows_per_piece])
+        yield piece.reshape(-1).view(np.uint8)
+
+
+def compressPieces(pieces):
+    """
+    Compress with zlib a stream of bytes given in pieces. The concatenation of the
+    compressed pieces is a regular zlib stream, zlib.decompress() reads it as usual.
+
+    Args:
+        pieces (iterable): bytes-like objects
+
+    Returns:
+        generator: of bytes
+    """
+    compressor = zlib.compressobj()
+    for piece in pieces:
+        compressed = compressor.compress(piece)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def decompressInto(pieces, out, block_size=DECOMPRESS_BLOCK_SIZE):
+    """
+    Decompress a zlib stream given in pieces straight into a buffer that has the size
+    of the decompressed data. The data is decompressed block_size bytes at a time, so
+    that no more than that is allocated on top of the buffer.
+
+    Args:
+        pieces (iterable): bytes-like objects, the compressed stream
+        out (buffer): a writable buffer such as a bytearray or a contiguous ndarray
+        block_size (int): maximum byte size of a decompressed block
+
+    Returns:
+        int: the number of bytes written in out
+    """
+    out = memoryview(out).cast("B")
+    decompressor = zlib.decompressobj()
+    position = 0
+
+    def append(decompressed):
+        end = position + len(decompressed)
+        if end > len(out):
+            raise ValueError(
+                "The decompressed data is larger than the {} bytes expected.".format(
+                    len(out)
+                )
+            )
+        out[position:end] = decompressed
+        return end
+
+    for piece in pieces:
+        while piece:
+            position = append(decompressor.decompress(piece, block_size))
+            piece = decompressor.unconsumed_tail
+
+    position = append(decompressor.flush())
+    if position != len(out) or not decompressor.eof:
+        raise ValueError(
+            "The decompressed data is {} bytes, {} were expected.".format(
+                position, len(out)
+            )
+        )
+    return position
+
+
+def writePieces(f, pieces):
+    """
+    Write some pieces one after the other in a file.
+
+    Args:
+        f (file): a file open for writing
+        pieces (iterable): bytes-like objects
+
+    Returns:
+        int: the number of bytes written
+    """
+    byte_length = 0
+    for piece in pieces:
+        f.write(piece)
+        byte_length += memoryview(piece).nbytes
+    return byte_length
+
+
+def copyFileContent(src_file, dst_file, byte_length=None, src_offset=0):
+    """
+    Copy the content of a file at the current position of another one, without
+    moving the data through Python when possible: os.copy_file_range is tried first,
+    then os.sendfile and eventually a regular read/write loop.
+
+    Args:
+        src_file (file): binary file object to copy from
+        dst_file (file): binary file object to copy into, at its current position
+        byte_length (int): number of bytes to copy, until the end of src_file if None
+        src_offset (int): where to start copying from, in src_file
+
+    Returns:
+        int: the number of bytes copied
+    """
+    src_fd = src_file.fileno()
+    dst_fd = dst_file.fileno()
+
+    # the data is copied under the Python buffers, they must be flushed first: what
+    # was written to src_file may still be in its buffer, eg. the output file of a
+    # stream writer
+    src_file.flush()
+    dst_file.flush()
+    dst_offset = dst_file.tell()
+
+    if byte_length is None:
+        byte_length = os.fstat(src_fd).st_size - src_offset
+    copied = 0
+
+    if hasattr(os, "copy_file_range"):
+        try:
+            while copied < byte_length:
+                n = os.copy_file_range(
+                    src_fd,
+                    dst_fd,
+                    byte_length - copied,
+                    src_offset + copied,
+                    dst_offset + copied,
+                )
+                if n == 0:
+                    break
+                copied += n
+        except OSError:
+            # eg. not supported by the file system or across file systems
+            pass
+
+    if copied < byte_length and hasattr(os, "sendfile"):
+        try:
+            os.lseek(dst_fd, dst_offset + copied, os.SEEK_SET)
+            while copied < byte_length:
+                n = os.sendfile(dst_fd, src_fd, src_offset + copied, byte_length - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError:
+            pass
+
+    if copied < byte_length:
+        src_file.seek(src_offset + copied)
+        dst_file.seek(dst_offset + copied)
+        while copied < byte_length:
+            data = src_file.read(min(COPY_BLOCK_SIZE, byte_length - copied))
+            if not data:
+                break
+            dst_file.write(data)
+            copied += len(data)
+        dst_file.flush()
+
+    # move the position of dst_file after the copied content
+    dst_file.seek(dst_offset + copied)
+    return copied
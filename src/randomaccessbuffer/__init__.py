@@ -1,3 +1,10 @@
+from randomaccessbuffer.AsyncRandomAccessBuffer import AsyncRandomAccessBuffer
+from randomaccessbuffer.DatasetCache import DatasetCache
+from randomaccessbuffer.HeaderCache import HeaderCache
+from randomaccessbuffer.HeaderCache import HEADER_CACHE
 from randomaccessbuffer.RandomAccessBuffer import RandomAccessBuffer
+from randomaccessbuffer.RandomAccessBuffer import RandomAccessBufferReader
+from randomaccessbuffer.RandomAccessBuffer import RandomAccessBufferStreamWriter
 from randomaccessbuffer.RandomAccessBuffer import TYPES
 from randomaccessbuffer.RandomAccessBuffer import __version__
+from randomaccessbuffer.SharedDatasetCache import SharedDatasetCache
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+
+def write(filepath):
+    arrays = [np.random.rand(30, 40) for _ in range(20)]
+    with rab.RandomAccessBuffer() as rabuff:
+        for i, arr in enumerate(arrays):
+            compress = "gzip" if i % 2 else None
+            rabuff.addDataset(
+                "array {}".format(i), data=arr, metadata={"i": i}, compress=compress
+            )
+        rabuff.addDataset("chunked", data=arrays[0], compress="gzip", chunks=(8, 8))
+        rabuff.addDataset("bytes", data=b"hello there")
+        rabuff.write(filepath)
+    return arrays
+
+
+def test():
+    filepath = "./tests/temp/async.rab"
+    arrays = write(filepath)
+
+    async def main():
+        async with rab.AsyncRandomAccessBuffer(max_workers=3) as rabuff:
+            await rabuff.read(filepath)
+            assert rabuff.hasDataset("chunked")
+            assert rabuff.getMetadata("array 3") == {"i": 3}
+
+            # many concurrent requests
+            names = ["array {}".format(i) for i in range(20)] * 5
+            results = await asyncio.gather(*[rabuff.getDataset(n) for n in names])
+            for name, (data, meta) in zip(names, results):
+                assert (data == arrays[meta["i"]]).all()
+
+            datasets = await rabuff.getDatasets(names[:20])
+            for i in range(20):
+                assert (datasets["array {}".format(i)][0] == arrays[i]).all()
+
+            out = np.empty((30, 40))
+            (data, _) = await rabuff.getDataset("array 1", out=out)
+            assert data is out and (out == arrays[1]).all()
+
+            value = await rabuff.digNumericalDataset("chunked", [9, 9])
+            assert value == arrays[0][9, 9]
+            values = await rabuff.digNumericalDatasetBatch("array 0", [[1, 2], [3, 4]])
+            assert list(values) == [arrays[0][1, 2], arrays[0][3, 4]]
+            sliced = await rabuff.readSlice("chunked", (slice(5, 20), 3))
+            assert (sliced == arrays[0][5:20, 3]).all()
+            assert await rabuff.digInBuffer("bytes", 6, 5) == b"there"
+
+            assert await rabuff.getDataset("nope") is None
+            with pytest.raises(KeyError):
+                await rabuff.getDatasets(["array 0", "nope"])
+
+    asyncio.run(main())
+
+
+def test_cancel():
+    filepath = "./tests/temp/async_cancel.rab"
+    write(filepath)
+
+    async def main():
+        release = threading.Event()
+        with ThreadPoolExecutor(1) as executor:
+            rabuff = rab.AsyncRandomAccessBuffer(executor=executor)
+            await rabuff.read(filepath)
+
+            # keep the only worker busy so that the reads stay queued
+            blocker = asyncio.wrap_future(executor.submit(release.wait))
+            tasks = [
+                asyncio.ensure_future(rabuff.getDataset("array {}".format(i)))
+                for i in range(5)
+            ]
+            await asyncio.sleep(0.05)
+            for task in tasks:
+                task.cancel()
+            release.set()
+            await blocker
+
+            for task in tasks:
+                with pytest.raises(asyncio.CancelledError):
+                    await task
+            # the cancelled reads never ran
+            assert len(rabuff._pending_jobs) == 0
+
+            (data, _) = await rabuff.getDataset("array 0")
+            assert data.shape == (30, 40)
+            await rabuff.close()
+
+            # the executor given is not shut down
+            assert executor.submit(abs, -1).result() == 1
+
+    asyncio.run(main())
+
+
+def test_decoding_threads():
+    filepath = "./tests/temp/async_decoding_threads.rab"
+    arrays = write(filepath)
+    names = ["array {}".format(i) for i in range(20)]
+
+    async def main():
+        async with rab.AsyncRandomAccessBuffer(max_workers=2) as rabuff:
+            await rabuff.read(filepath)
+
+            # the threads decoding the datasets
+            decode = rabuff._reader._decodeDataset
+            decoding_threads = set()
+
+            def spy(*args, **kwargs):
+                decoding_threads.add(threading.current_thread().name)
+                return decode(*args, **kwargs)
+
+            rabuff._reader._decodeDataset = spy
+            results = await asyncio.gather(
+                *[rabuff.getDatasets(names) for _ in range(8)]
+            )
+            for datasets in results:
+                for i in range(20):
+                    assert (datasets["array {}".format(i)][0] == arrays[i]).all()
+
+            # the calls share the same decoding pool rather than creating one each:
+            # only the threads of the two pools decode
+            assert len(decoding_threads) <= 2 + 2
+
+    asyncio.run(main())
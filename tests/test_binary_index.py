@@ -0,0 +1,66 @@
+import os
+import numpy as np
+import randomaccessbuffer as rab
+
+
+def create(filepath, binary_index=True):
+    rabuff = rab.RandomAccessBuffer()
+    names = ["zebra", "élan", "aardvark", "Mole", "dataset 10", "dataset 9"]
+    for i, name in enumerate(names):
+        rabuff.addDataset(name, data=np.arange(i + 1, dtype="int32"), metadata={"i": i})
+    rabuff.addDataset("text", data="hello there", compress="gzip")
+    rabuff.write(filepath, binary_index=binary_index)
+    return rabuff.listDatasets()
+
+
+def test():
+    filepath = "./tests/temp/binary_index.rab"
+    names = create(filepath)
+    assert os.path.exists(filepath + ".rabidx")
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath, binary_index=True)
+
+        # the header was not decoded
+        assert rabuff._binary_index is not None
+        assert rabuff._rab_index_by_name == {}
+
+        assert rabuff.listDatasets() == names
+        assert rabuff.hasDataset("élan")
+        assert not rabuff.hasDataset("elan")
+        assert rabuff.getDatasetType("text") == "text"
+        assert rabuff.getMetadata("aardvark") == {"i": 2}
+        assert (rabuff.getDataset("Mole")[0] == np.arange(4)).all()
+        assert rabuff.getDataset("text")[0] == "hello there"
+        assert rabuff.digNumericalDataset("zebra", 0) == 0
+        assert rabuff.getDataset("nope") is None
+
+        with rab.RandomAccessBufferReader() as rabuff_header:
+            rabuff_header.read(filepath)
+            assert rabuff.getTotalByteSize() == rabuff_header.getTotalByteSize()
+
+    # an index is stale once its file is modified, even if the size and the header
+    # length are the same
+    with open(filepath, "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        f.write(b"\x00")
+    stat = os.stat(filepath)
+    os.utime(filepath, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath, binary_index=True)
+        assert rabuff._binary_index is None
+        assert rabuff.listDatasets() == names
+
+    # rewriting the file without an index removes the stale one
+    create(filepath, binary_index=False)
+    assert not os.path.exists(filepath + ".rabidx")
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath, binary_index=True)
+        assert rabuff._binary_index is None
+        assert rabuff.listDatasets() == names
+
+
+if __name__ == "__main__":
+    test()
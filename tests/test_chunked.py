@@ -0,0 +1,51 @@
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+
+
+def create(filepath):
+    rabuff = rab.RandomAccessBuffer()
+
+    volume = np.arange(10 * 11 * 12, dtype="float32").reshape((10, 11, 12))
+    big_endian = (volume % 100).astype(">i2")
+
+    rabuff.addDataset("volume", data=volume, compress="gzip", chunks=(4, 4, 5))
+    rabuff.addDataset("big endian", data=big_endian, compress="gzip", chunks=3)
+
+    # chunking requires compression
+    with pytest.raises(ValueError):
+        rabuff.addDataset("not compressed", data=volume, chunks=(4, 4, 4))
+
+    rabuff.write(filepath)
+    return (volume, big_endian)
+
+
+def test():
+    filepath = "./tests/temp/chunked.rab"
+    (volume, big_endian) = create(filepath)
+
+    rabuff = rab.RandomAccessBuffer()
+    rabuff.read(filepath)
+
+    # 3 x 3 x 3 chunks
+    codec_meta = rabuff._getEntry("volume")["codecMeta"]
+    assert codec_meta["chunks"] == [4, 4, 5]
+    assert len(codec_meta["chunkByteOffsets"]) == 27
+
+    for name, data in [("volume", volume), ("big endian", big_endian)]:
+        data_out, _ = rabuff.getDataset(name)
+        assert data_out.dtype == data.dtype
+        assert (data_out == data).all()
+
+        assert rabuff.digNumericalDataset(name, [9, 10, 11]) == data[9, 10, 11]
+
+        positions = np.array([[0, 0, 0], [9, 3, 7], [4, 4, 5], [0, 0, 1]])
+        values = rabuff.digNumericalDatasetBatch(name, positions)
+        assert (values == data[tuple(positions.T)]).all()
+
+        for key in [(slice(2, 9), slice(None), 6), (Ellipsis, slice(None, None, -3)), (3,)]:
+            assert (rabuff.readSlice(name, key) == data[key]).all()
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,40 @@
+import os
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+
+
+def test():
+    filepath = "./tests/temp/context_manager.rab"
+    data = np.arange(1000, dtype="float64").reshape((10, 100))
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("array", data=data)
+        rabuff.addDataset("text", data="hello there")
+        rabuff.write(filepath)
+        working_dir = rabuff._working_dir
+
+    # the working dir is deleted when leaving the block
+    assert not os.path.exists(working_dir)
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.read(filepath)
+        f = rabuff._file
+
+        # all the reads go through the same file handle
+        for i in range(10):
+            assert rabuff.digNumericalDataset("array", [i, i]) == data[i, i]
+        assert (rabuff.readSlice("array", (slice(2, 4),)) == data[2:4]).all()
+        assert rabuff.getDataset("text")[0] == "hello there"
+        assert rabuff._file is f
+        assert not f.closed
+
+    assert f.closed
+
+    # the datasets cannot be read anymore once closed
+    with pytest.raises(ValueError):
+        rabuff.getDataset("array")
+
+
+if __name__ == "__main__":
+    test()
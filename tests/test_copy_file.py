@@ -0,0 +1,65 @@
+import os
+from randomaccessbuffer import Tools
+import pytest
+
+
+def copy(src_path, dst_path):
+    with open(src_path, "rb") as src_file, open(dst_path, "w+b") as dst_file:
+        dst_file.write(b"header")
+        copied = Tools.copyFileContent(src_file, dst_file, 1000, src_offset=10)
+        # the position is right after the copied content
+        dst_file.write(b"footer")
+        assert copied == 1000
+        assert dst_file.tell() == 1012
+
+        Tools.copyFileContent(src_file, dst_file)
+
+    return open(dst_path, "rb").read()
+
+
+def test(monkeypatch):
+    src_path = "./tests/input_files/young_hare.jpg"
+    dst_path = "./tests/temp/copy_file.bin"
+    src = open(src_path, "rb").read()
+    expected = b"header" + src[10:1010] + b"footer" + src
+
+    assert copy(src_path, dst_path) == expected
+
+    # without copy_file_range, then without sendfile either
+    monkeypatch.delattr(os, "copy_file_range", raising=False)
+    assert copy(src_path, dst_path) == expected
+
+    monkeypatch.delattr(os, "sendfile", raising=False)
+    assert copy(src_path, dst_path) == expected
+
+
+def test_buffered_source(monkeypatch):
+    """
+    The bytes still in the Python buffer of the source are copied by the kernel too.
+    """
+    if not hasattr(os, "copy_file_range") and not hasattr(os, "sendfile"):
+        pytest.skip("No kernel copy on this platform.")
+
+    kernel_copied = []
+    for fn_name in ["copy_file_range", "sendfile"]:
+        fn = getattr(os, fn_name, None)
+        if fn is not None:
+            # default arguments keep the function of each iteration
+            def spy(*args, fn=fn):
+                n = fn(*args)
+                kernel_copied.append(n)
+                return n
+
+            monkeypatch.setattr(os, fn_name, spy)
+
+    src_path = "./tests/temp/copy_file_buffered.bin"
+    dst_path = "./tests/temp/copy_file.bin"
+    data = os.urandom(1000)
+    with open(src_path, "w+b") as src_file, open(dst_path, "w+b") as dst_file:
+        # smaller than the buffer, nothing is written to the file yet
+        src_file.write(data)
+        assert Tools.copyFileContent(src_file, dst_file, len(data)) == len(data)
+        assert Tools.copyFileContent(src_file, dst_file) == len(data)
+
+    assert sum(kernel_copied) == 2 * len(data)
+    assert open(dst_path, "rb").read() == data + data
@@ -0,0 +1,134 @@
+import os
+import numpy as np
+import pandas as pd
+import randomaccessbuffer as rab
+from randomaccessbuffer.DatasetCache import isViewOfLargerBuffer
+import pytest
+
+
+def write(filepath, volume):
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("volume", data=volume, compress="gzip")
+        rabuff.addDataset("raw", data=np.arange(100))
+        rabuff.addDataset("object", data={"a": [1, 2]}, compress="gzip")
+        rabuff.addDataset(
+            "dataframe", data=pd.DataFrame({"x": [1, 2], "y": ["a", "b"]})
+        )
+        rabuff.addDataset("text", data="hello", compress="gzip")
+        rabuff.addDataset("bytes", data=b"hello")
+        rabuff.write(filepath)
+
+
+def test():
+    filepath = "./tests/temp/dataset_cache.rab"
+    volume = np.random.rand(20, 30)
+    write(filepath, volume)
+    cache = rab.DatasetCache()
+
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(filepath)
+        first = rabuff.getDataset("volume")[0]
+        second = rabuff.getDataset("volume")[0]
+        assert second is first
+        assert (second == volume).all()
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # arrays from the cache cannot be modified
+        assert not first.flags.writeable
+        with pytest.raises(ValueError):
+            first[0, 0] = 1
+
+        # mutable datasets are copies
+        obj = rabuff.getDataset("object")[0]
+        obj["a"].append(3)
+        assert rabuff.getDataset("object")[0] == {"a": [1, 2]}
+        df = rabuff.getDataset("dataframe")[0]
+        df["x"] = 0
+        assert rabuff.getDataset("dataframe")[0]["x"].tolist() == [1, 2]
+
+        # an output buffer bypasses the cache
+        out = np.empty((20, 30))
+        assert rabuff.getDataset("volume", out=out)[0] is out
+        assert out.flags.writeable
+
+        # getDatasets only reads what is not cached, and fills the cache
+        hits = cache.hits
+        names = rabuff.listDatasets()
+        datasets = rabuff.getDatasets(names)
+        assert cache.hits == hits + 3
+        assert datasets["volume"][0] is first
+        assert datasets["text"][0] == "hello"
+        assert rabuff.getDataset("bytes")[0] == b"hello"
+        assert cache.getStats()["nbDatasets"] == len(names)
+
+    # the same cache is shared by all the readers of the file
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(filepath)
+        assert rabuff.getDataset("volume")[0] is first
+
+    # a rewritten file is never served from the cache
+    os.remove(filepath)
+    write(filepath, volume * 2)
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(filepath)
+        assert (rabuff.getDataset("volume")[0] == volume * 2).all()
+
+    cache.invalidate()
+    assert cache.getStats()["byteSize"] == 0
+
+    # uncompressed datasets of a memory-mapped file are not cached
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(filepath, memory_map=True)
+        rabuff.getDataset("raw")
+        rabuff.getDataset("bytes")
+        assert cache.getStats()["nbDatasets"] == 0
+
+
+def test_eviction():
+    cache = rab.DatasetCache(max_byte_size=1000)
+    for i in range(5):
+        cache.put(("file", i), np.zeros(50))  # 400 bytes
+
+    assert cache.evictions == 3
+    assert cache.getStats()["byteSize"] == 800
+    with pytest.raises(KeyError):
+        cache.get(("file", 0))
+
+    # the least recently used is evicted first
+    cache.get(("file", 3))
+    cache.put(("file", 5), np.zeros(50))
+    cache.get(("file", 3))
+    with pytest.raises(KeyError):
+        cache.get(("file", 4))
+
+    # too large to be cached
+    big = cache.put(("file", 6), np.zeros(200))
+    assert not big.flags.writeable
+    with pytest.raises(KeyError):
+        cache.get(("file", 6))
+
+    cache.invalidate("file")
+    assert cache.getStats()["nbDatasets"] == 0
+
+
+def test_coalesced_reads():
+    filepath = "./tests/temp/dataset_cache_coalesced.rab"
+    arrays = [np.random.rand(100, 100) for _ in range(10)]
+    with rab.RandomAccessBuffer() as rabuff:
+        for i, arr in enumerate(arrays):
+            rabuff.addDataset("array {}".format(i), data=arr)
+        rabuff.write(filepath)
+
+    cache = rab.DatasetCache(max_byte_size=200000)
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(filepath)
+        names = ["array {}".format(i) for i in range(10)]
+        datasets = rabuff.getDatasets(names)
+        for i, name in enumerate(names):
+            assert (datasets[name][0] == arrays[i]).all()
+
+        # the cached arrays do not keep the whole read alive
+        for name in names[-2:]:
+            cached = cache.get((rabuff._file_identity, name))
+            assert not isViewOfLargerBuffer(cached)
+        assert cache.getStats()["byteSize"] == 160000
@@ -0,0 +1,59 @@
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+
+DTYPES = ["bool", "int8", "uint16", ">i4", "int64", "float16", ">f4", "float64", "complex64", "complex128"]
+
+
+def create(filepath):
+    rabuff = rab.RandomAccessBuffer()
+    arrays = {}
+
+    for dtype in DTYPES:
+        data = (np.arange(4 * 5 * 6) % 7).reshape((4, 5, 6)).astype(dtype)
+        if np.issubdtype(data.dtype, np.complexfloating):
+            data = data + 1j * data[::-1]
+        arrays[dtype] = data
+        rabuff.addDataset(dtype, data=data)
+
+    arrays["1D"] = np.linspace(0, 1000, num=1001, dtype="float32")
+    rabuff.addDataset("1D", data=arrays["1D"])
+
+    rabuff.write(filepath)
+    return arrays
+
+
+def test():
+    filepath = "./tests/temp/dig_batch.rab"
+    arrays = create(filepath)
+
+    rabuff = rab.RandomAccessBuffer()
+    rabuff.read(filepath)
+
+    positions = np.array([[3, 4, 5], [0, 0, 0], [2, 1, 3], [3, 4, 5], [1, 2, 0]])
+    for dtype in DTYPES:
+        values = rabuff.digNumericalDatasetBatch(dtype, positions)
+        expected = arrays[dtype][tuple(positions.T)]
+        assert values.dtype == expected.dtype
+        assert (values == expected).all()
+
+        # no coalescing at all gives the same result
+        values = rabuff.digNumericalDatasetBatch(dtype, positions, max_gap=0)
+        assert (values == expected).all()
+
+        # the single dig agrees too, including for float16 and complex types
+        assert rabuff.digNumericalDataset(dtype, [2, 1, 3]) == expected[2]
+
+    indices = [1000, 3, 300, 4]
+    values = rabuff.digNumericalDatasetBatch("1D", indices)
+    assert (values == arrays["1D"][indices]).all()
+
+    with pytest.raises(IndexError):
+        rabuff.digNumericalDatasetBatch("int8", [[4, 0, 0]])
+
+    with pytest.raises(IndexError):
+        rabuff.digNumericalDatasetBatch("int8", [[0, 0]])
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,127 @@
+import random
+import numpy as np
+import pandas as pd
+import randomaccessbuffer as rab
+import pytest
+from randomaccessbuffer.DatasetCache import isViewOfLargerBuffer
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+def compare(a, b):
+    if isinstance(a, np.ndarray):
+        return a.dtype == b.dtype and (a == b).all()
+    if isinstance(a, pd.DataFrame):
+        return a.equals(b)
+    return a == b
+
+
+def test():
+    filepath = "./tests/temp/get_datasets.rab"
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(100):
+            compress = "gzip" if i % 3 == 0 else None
+            rabuff.addDataset(
+                "array {}".format(i),
+                data=np.random.rand(10, 20).astype("float32"),
+                metadata={"i": i},
+                compress=compress,
+            )
+            rabuff.addDataset(
+                "text {}".format(i), data="text {}".format(i), compress=compress
+            )
+        rabuff.addDataset(
+            "chunked",
+            data=np.arange(1000).reshape((10, 100)),
+            compress="gzip",
+            chunks=(3, 30),
+        )
+        rabuff.addDataset("object", data={"a": [1, 2]})
+        rabuff.addDataset("bytes", data=b"hello", compress="gzip")
+        rabuff.addDataset(
+            "dataframe", data=pd.DataFrame({"x": [1, 2], "y": ["a", "b"]})
+        )
+        rabuff.write(filepath)
+
+    for memory_map in [False, True]:
+        with rab.RandomAccessBufferReader() as rabuff:
+            rabuff.read(filepath, memory_map=memory_map)
+            names = rabuff.listDatasets()
+
+            # count the reads
+            nb_reads = [0]
+            read_view = rabuff._readView
+
+            def counting_read_view(byte_offset, byte_length):
+                nb_reads[0] += 1
+                return read_view(byte_offset, byte_length)
+
+            rabuff._readView = counting_read_view
+
+            # all the datasets, in a single read
+            datasets = rabuff.getDatasets(names[::-1])
+            assert nb_reads[0] == 1
+            assert list(datasets.keys()) == names[::-1]
+            rabuff._readView = read_view
+
+            # the arrays kept do not keep the whole read alive
+            if not memory_map:
+                for i in range(1, 100, 3):
+                    array = datasets["array {}".format(i)][0]
+                    assert not isViewOfLargerBuffer(array)
+
+            for name in names:
+                (data, meta) = rabuff.getDataset(name)
+                assert compare(datasets[name][0], data)
+                assert datasets[name][1] == meta
+
+            # a random subset, with some duplicates
+            subset = random.sample(names, 50) + names[:3]
+            datasets = rabuff.getDatasets(subset, max_gap=0, workers=2)
+            assert set(datasets.keys()) == set(subset)
+            for name in subset:
+                assert compare(datasets[name][0], rabuff.getDataset(name)[0])
+
+            assert rabuff.getDatasets([]) == {}
+            with pytest.raises(KeyError):
+                rabuff.getDatasets(["text 0", "nope"])
+
+
+def test_executors():
+    filepath = "./tests/temp/get_datasets_executors.rab"
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(20):
+            compress = "gzip" if i % 2 else None
+            rabuff.addDataset(
+                "object {}".format(i),
+                data={"i": i, "words": ["word"] * i},
+                compress=compress,
+            )
+            rabuff.addDataset(
+                "array {}".format(i), data=np.arange(i * 10), compress=compress
+            )
+            rabuff.addDataset(
+                "dataframe {}".format(i),
+                data=pd.DataFrame({"x": np.arange(i + 1), "y": ["a"] * (i + 1)}),
+                compress=compress,
+            )
+        rabuff.write(filepath)
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        names = rabuff.listDatasets()
+        expected = {name: rabuff.getDataset(name)[0] for name in names}
+
+        with ProcessPoolExecutor(2) as process_pool:
+            with ThreadPoolExecutor(2) as thread_pool:
+                for executor in ["thread", "process", process_pool, thread_pool]:
+                    datasets = rabuff.getDatasets(names, executor=executor, workers=2)
+                    assert list(datasets.keys()) == names
+                    for name in names:
+                        assert compare(datasets[name][0], expected[name])
+
+                # the executors given are not shut down
+                assert process_pool.submit(abs, -1).result() == 1
+                assert thread_pool.submit(abs, -1).result() == 1
+
+        with pytest.raises(ValueError):
+            rabuff.getDatasets(names, executor="fiber")
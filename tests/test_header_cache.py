@@ -0,0 +1,73 @@
+import os
+import numpy as np
+import randomaccessbuffer as rab
+
+
+def write(filepath, value):
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("array", data=np.arange(10) * value, metadata={"v": value})
+        rabuff.write(filepath)
+
+
+def test():
+    filepath = "./tests/temp/header_cache.rab"
+    cache = rab.HeaderCache()
+    write(filepath, 1)
+
+    # count the headers decoded
+    nb_decoded = [0]
+    decode_header = rab.RandomAccessBufferReader._decodeHeader
+
+    def counting_decode_header(self, header_str):
+        nb_decoded[0] += 1
+        return decode_header(self, header_str)
+
+    rab.RandomAccessBufferReader._decodeHeader = counting_decode_header
+    try:
+        for _ in range(3):
+            with rab.RandomAccessBufferReader(header_cache=cache) as rabuff:
+                rabuff.read(filepath)
+                assert rabuff.getMetadata("array") == {"v": 1}
+                assert (rabuff.getDataset("array")[0] == np.arange(10)).all()
+        assert nb_decoded[0] == 1
+        assert (cache.hits, cache.misses) == (2, 1)
+
+        # a rewritten file is read again
+        write(filepath, 2)
+        with rab.RandomAccessBufferReader(header_cache=cache) as rabuff:
+            rabuff.read(filepath)
+            assert rabuff.getMetadata("array") == {"v": 2}
+            assert (rabuff.getDataset("array")[0] == np.arange(10) * 2).all()
+        assert nb_decoded[0] == 2
+
+        # without cache
+        with rab.RandomAccessBufferReader(header_cache=None) as rabuff:
+            rabuff.read(filepath)
+        assert nb_decoded[0] == 3
+    finally:
+        rab.RandomAccessBufferReader._decodeHeader = decode_header
+
+    cache.invalidate(filepath)
+    assert cache.getStats()["nbHeaders"] == 0
+
+
+def test_bounds():
+    filepaths = ["./tests/temp/header_cache_{}.rab".format(i) for i in range(3)]
+    for filepath in filepaths:
+        write(filepath, 1)
+
+    cache = rab.HeaderCache(max_nb_headers=2)
+    for filepath in filepaths:
+        with rab.RandomAccessBufferReader(header_cache=cache) as rabuff:
+            rabuff.read(filepath)
+    assert cache.getStats()["nbHeaders"] == 2
+
+    # the least recently used was evicted
+    with rab.RandomAccessBufferReader(header_cache=cache) as rabuff:
+        rabuff.read(filepaths[0])
+    assert cache.misses == 4
+
+    cache = rab.HeaderCache(max_byte_size=os.path.getsize(filepaths[0]) // 2)
+    with rab.RandomAccessBufferReader(header_cache=cache) as rabuff:
+        rabuff.read(filepaths[0])
+    assert cache.getStats()["nbHeaders"] == 0
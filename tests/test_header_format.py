@@ -0,0 +1,39 @@
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+
+
+def create(filepath, header_format):
+    rabuff = rab.RandomAccessBuffer()
+    rabuff.addDataset("array", data=np.arange(10, dtype="uint16"), metadata={"unit": "µm"})
+    rabuff.addDataset("text", data="hello there", metadata={"tags": ["a", "b"]}, compress="gzip")
+    rabuff.addDataset("object", data={"x": [1.5, 2.5], "y": None})
+    rabuff.write(filepath, header_format=header_format)
+    return rabuff
+
+
+def test():
+    for header_format in ["yaml", "json"]:
+        filepath = "./tests/temp/header_{}.rab".format(header_format)
+        rabuff_in = create(filepath, header_format)
+
+        with rab.RandomAccessBufferReader() as rabuff_out:
+            rabuff_out.read(filepath)
+            assert rabuff_out.listDatasets() == rabuff_in.listDatasets()
+            for name in rabuff_in.listDatasets():
+                assert rabuff_out.getMetadata(name) == rabuff_in.getMetadata(name)
+            assert (rabuff_out.getDataset("array")[0] == np.arange(10)).all()
+            assert rabuff_out.getDataset("text")[0] == "hello there"
+            assert rabuff_out.getDataset("object")[0] == {"x": [1.5, 2.5], "y": None}
+
+    # a JSON header has one dataset per line, to remain readable with less/more
+    header = open("./tests/temp/header_json.rab", "rb").read()
+    assert header[7:10] == b"\n[\n"
+    assert b'\n{"name": "text", ' in header
+
+    with pytest.raises(ValueError):
+        create("./tests/temp/header_xml.rab", "xml")
+
+
+if __name__ == "__main__":
+    test()
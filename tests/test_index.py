@@ -0,0 +1,44 @@
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+
+
+def test():
+    filepath = "./tests/temp/index.rab"
+
+    rabuff = rab.RandomAccessBuffer()
+    for i in range(100):
+        rabuff.addDataset("array {}".format(i), data=np.arange(i + 1, dtype="int32"))
+
+    assert rabuff.hasDataset("array 42")
+    assert not rabuff.hasDataset("array 100")
+
+    # a name can only be used once
+    with pytest.raises(KeyError):
+        rabuff.addDataset("array 42", data=np.arange(3, dtype="int32"))
+
+    # deleting frees the name and keeps the order of the other datasets
+    rabuff.deleteDataset("array 42")
+    assert not rabuff.hasDataset("array 42")
+    assert len(rabuff.listDatasets()) == 99
+    rabuff.addDataset("array 42", data=np.arange(3, dtype="int32"))
+    assert rabuff.listDatasets()[-1] == "array 42"
+
+    with pytest.raises(KeyError):
+        rabuff.deleteDataset("not there")
+
+    rabuff.write(filepath)
+
+    rabuff_out = rab.RandomAccessBuffer()
+    rabuff_out.read(filepath)
+
+    assert rabuff_out.listDatasets() == rabuff.listDatasets()
+    assert rabuff_out.getDatasetType("array 7") == "int32"
+    data, _ = rabuff_out.getDataset("array 7")
+    assert (data == np.arange(8, dtype="int32")).all()
+    data, _ = rabuff_out.getDataset("array 42")
+    assert (data == np.arange(3, dtype="int32")).all()
+
+
+if __name__ == "__main__":
+    test()
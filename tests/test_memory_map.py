@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import randomaccessbuffer as rab
+import pytest
+
+
+def create(filepath):
+    rabuff = rab.RandomAccessBuffer()
+    data = {
+        "volume": np.arange(4 * 5 * 6, dtype=">f4").reshape((4, 5, 6)),
+        "compressed volume": np.arange(50, dtype="int16"),
+        "chunked volume": np.arange(100, dtype="uint8").reshape((10, 10)),
+        "buffer": open("./tests/input_files/rhinoceros.jpg", "rb").read(),
+        "text": "hello there é ï",
+        "object": {"a": 1, "b": [1, 2, 3]},
+        "dataframe": pd.DataFrame({"x": [1, 2, 3], "y": ["a", "bb", "ccc"]}),
+    }
+
+    for name, d in data.items():
+        if name == "compressed volume":
+            rabuff.addDataset(name, data=d, compress="gzip")
+        elif name == "chunked volume":
+            rabuff.addDataset(name, data=d, compress="gzip", chunks=(3, 4))
+        else:
+            rabuff.addDataset(name, data=d)
+
+    rabuff.write(filepath)
+    return data
+
+
+def test():
+    filepath = "./tests/temp/memory_map.rab"
+    data = create(filepath)
+
+    rabuff = rab.RandomAccessBuffer()
+    rabuff.read(filepath, memory_map=True)
+
+    # uncompressed numerical datasets are read-only views of the mapping
+    volume, _ = rabuff.getDataset("volume")
+    assert (volume == data["volume"]).all()
+    assert not volume.flags.writeable
+    with pytest.raises(ValueError):
+        volume[0, 0, 0] = 12
+
+    buffer, _ = rabuff.getDataset("buffer")
+    assert isinstance(buffer, memoryview)
+    assert buffer.readonly
+    assert buffer == data["buffer"]
+
+    for name in ["compressed volume", "chunked volume"]:
+        arr, _ = rabuff.getDataset(name)
+        assert (arr == data[name]).all()
+
+    assert rabuff.getDataset("text")[0] == data["text"]
+    assert rabuff.getDataset("object")[0] == data["object"]
+    assert rabuff.getDataset("dataframe")[0].equals(data["dataframe"])
+
+    assert rabuff.digNumericalDataset("volume", [3, 2, 1]) == data["volume"][3, 2, 1]
+    positions = [[0, 0, 0], [3, 4, 5], [1, 1, 1]]
+    values = rabuff.digNumericalDatasetBatch("volume", positions)
+    assert (values == data["volume"][tuple(np.array(positions).T)]).all()
+    assert (rabuff.readSlice("volume", (Ellipsis, 2)) == data["volume"][..., 2]).all()
+    assert rabuff.digInBuffer("buffer", 10, 20) == data["buffer"][10:30]
+
+    # views returned earlier stay valid once the reader is gone
+    del rabuff
+    assert (volume == data["volume"]).all()
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,68 @@
+import os
+import numpy as np
+import randomaccessbuffer as rab
+
+
+def add_all(rabuff):
+    data = {
+        "small": np.arange(100, dtype="int16"),
+        "large": np.random.rand(200, 100),
+        "medium": np.random.rand(50, 100).astype("float32"),
+        "compressed": np.zeros(10000, dtype="int32"),
+        "text": "hello there é ï",
+    }
+    for name, d in data.items():
+        rabuff.addDataset(name, data=d, compress="gzip" if name == "compressed" else None)
+    rabuff.addDataset("rhino", filepath="./tests/input_files/rhinoceros.jpg")
+    data["rhino"] = open("./tests/input_files/rhinoceros.jpg", "rb").read()
+    return data
+
+
+def check(filepath, data):
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        assert rabuff.listDatasets() == list(data.keys())
+        for name, d in data.items():
+            d_out, _ = rabuff.getDataset(name)
+            if isinstance(d, np.ndarray):
+                assert (d_out == d).all()
+            else:
+                assert d_out == d
+
+
+def test():
+    filepath = "./tests/temp/memory_staging.rab"
+
+    # everything fits in memory, no temporary file at all
+    with rab.RandomAccessBuffer(memory_budget=1024 * 1024) as rabuff:
+        data = add_all(rabuff)
+        assert rabuff._working_dir is None
+        rabuff.write(filepath)
+    check(filepath, data)
+
+    # the largest datasets are moved to a single scratch file
+    with rab.RandomAccessBuffer(memory_budget=10000) as rabuff:
+        data = add_all(rabuff)
+        assert os.listdir(rabuff._working_dir) == ["scratch"]
+        assert "large" not in rabuff._staged_in_memory
+        assert "medium" not in rabuff._staged_in_memory
+        assert "small" in rabuff._staged_in_memory
+        assert rabuff._staged_byte_length <= 10000
+
+        rabuff.deleteDataset("small")
+        del data["small"]
+        rabuff.write(filepath)
+        check(filepath, data)
+
+        # more datasets can be added, the file is written again
+        data["more"] = np.random.rand(100, 100)
+        rabuff.addDataset("more", data=data["more"])
+        rabuff.write(filepath)
+        check(filepath, data)
+
+    # everything goes to the scratch file, encoded by workers
+    with rab.RandomAccessBuffer(workers=4, memory_budget=0) as rabuff:
+        data = add_all(rabuff)
+        rabuff.write(filepath)
+        assert rabuff._staged_in_memory == {}
+    check(filepath, data)
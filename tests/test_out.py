@@ -0,0 +1,99 @@
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+
+NB_TIMESTEPS = 5
+
+
+def write(filepath):
+    timesteps = [np.random.rand(20, 30).astype("float32") for _ in range(NB_TIMESTEPS)]
+    big_endian = np.arange(12, dtype=">i2").reshape((3, 4))
+
+    with rab.RandomAccessBuffer() as rabuff:
+        for i, t in enumerate(timesteps):
+            rabuff.addDataset("raw {}".format(i), data=t)
+            rabuff.addDataset("gzip {}".format(i), data=t, compress="gzip")
+            rabuff.addDataset(
+                "chunked {}".format(i), data=t, compress="gzip", chunks=(7, 7)
+            )
+        rabuff.addDataset("big endian", data=big_endian)
+        rabuff.addDataset("bytes", data=b"hello there")
+        rabuff.addDataset("bytes gzip", data=b"hello there", compress="gzip")
+        rabuff.addDataset("text", data="hello there")
+        rabuff.write(filepath)
+
+    return (timesteps, big_endian)
+
+
+def test():
+    filepath = "./tests/temp/out.rab"
+    (timesteps, big_endian) = write(filepath)
+
+    for memory_map in [False, True]:
+        with rab.RandomAccessBufferReader() as rabuff:
+            rabuff.read(filepath, memory_map=memory_map)
+
+            # the same buffer is reused for every timestep
+            out = np.empty((20, 30), dtype="float32")
+            flat_out = np.empty(600, dtype="float32")
+            for kind in ["raw", "gzip", "chunked"]:
+                for i, t in enumerate(timesteps):
+                    data, _ = rabuff.getDataset("{} {}".format(kind, i), out=out)
+                    assert data is out
+                    assert (out == t).all()
+
+                    # only the number of elements has to match
+                    data, _ = rabuff.getDataset("{} {}".format(kind, i), out=flat_out)
+                    assert data is flat_out
+                    assert (flat_out == t.ravel()).all()
+
+            out = np.empty(12, dtype=">i2")
+            rabuff.getDataset("big endian", out=out)
+            assert (out == big_endian.ravel()).all()
+
+            for name in ["bytes", "bytes gzip"]:
+                out = bytearray(11)
+                data, _ = rabuff.getDataset(name, out=out)
+                assert data is out
+                assert out == b"hello there"
+
+                out = np.empty(11, dtype=np.uint8)
+                rabuff.getDataset(name, out=out)
+                assert out.tobytes() == b"hello there"
+
+
+def test_errors():
+    filepath = "./tests/temp/out_errors.rab"
+    write(filepath)
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+
+        for name in ["raw 0", "gzip 0", "chunked 0"]:
+            # wrong dtype, including the endianness
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=np.empty((20, 30), dtype="float64"))
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=np.empty((20, 30), dtype=">f4"))
+            # wrong size
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=np.empty((20, 31), dtype="float32"))
+            # read-only or not contiguous
+            out = np.empty((20, 30), dtype="float32")
+            out.flags.writeable = False
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=out)
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=np.empty((30, 20), dtype="float32").T)
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=bytearray(2400))
+
+        for name in ["bytes", "bytes gzip"]:
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=bytearray(10))
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=bytearray(12))
+            with pytest.raises(ValueError):
+                rabuff.getDataset(name, out=b"hello there")
+
+        with pytest.raises(ValueError):
+            rabuff.getDataset("text", out=bytearray(11))
@@ -0,0 +1,181 @@
+import array
+import zlib
+import numpy as np
+import randomaccessbuffer as rab
+from randomaccessbuffer import Tools
+import pytest
+
+
+def test_pieces():
+    arr = np.arange(7 * 5 * 3, dtype=">i4").reshape((7, 5, 3))
+    for order in ["C", "F"]:
+        pieces = list(Tools.iterArrayPieces(arr, order, piece_byte_size=100))
+        assert len(pieces) > 1
+        assert b"".join(pieces) == arr.tobytes(order=order)
+        compressed = b"".join(Tools.compressPieces(pieces))
+        assert zlib.decompress(compressed) == arr.tobytes(order=order)
+
+
+def test():
+    filepath = "./tests/temp/out_of_core.rab"
+    memmap_path = "./tests/temp/out_of_core.npy"
+    memmap = np.lib.format.open_memmap(
+        memmap_path, mode="w+", dtype="float32", shape=(300, 40)
+    )
+    memmap[:] = np.random.rand(300, 40)
+    memmap.flush()
+
+    full = np.arange(100 * 30, dtype="int16").reshape((100, 30))
+
+    def pieces():
+        for start in range(0, 100, 7):
+            yield full[start : start + 7]
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("memmap", data=memmap)
+        rabuff.addDataset("memmap gzip", data=memmap, compress="gzip")
+        rabuff.addDataset("array.array", data=array.array("d", [1.5, 2.5, 3.5]))
+        rabuff.addDataset("memoryview", data=memoryview(full))
+        rabuff.addDataset("bytearray", data=bytearray(b"hello"))
+        rabuff.addDataset("pieces", data=pieces(), shape=full.shape, dtype="int16")
+        rabuff.addDataset(
+            "pieces gzip",
+            data=pieces(),
+            shape=full.shape,
+            dtype="int16",
+            compress="gzip",
+        )
+        rabuff.addDataset(
+            "pieces chunked",
+            data=pieces(),
+            shape=full.shape,
+            dtype="int16",
+            compress="gzip",
+            chunks=(16, 8),
+        )
+        # pieces of a 1D array given as lists
+        rabuff.addDataset(
+            "lists", data=iter([[1, 2], [3], [4, 5, 6]]), shape=[6], dtype="uint8"
+        )
+        rabuff.write(filepath)
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        for name in ["memmap", "memmap gzip"]:
+            assert (rabuff.getDataset(name)[0] == memmap).all()
+        assert rabuff.getDataset("array.array")[0].tolist() == [1.5, 2.5, 3.5]
+        assert rabuff.getDatasetType("memoryview") == "int16"
+        assert (rabuff.getDataset("memoryview")[0] == full).all()
+        assert rabuff.getDataset("bytearray")[0] == b"hello"
+        for name in ["pieces", "pieces gzip", "pieces chunked"]:
+            assert (rabuff.getDataset(name)[0] == full).all()
+        for name in ["pieces", "pieces chunked"]:
+            assert rabuff.digNumericalDataset(name, [42, 17]) == full[42, 17]
+            sliced = rabuff.readSlice(name, (slice(20, 60), 3))
+            assert (sliced == full[20:60, 3]).all()
+        assert rabuff.getDataset("lists")[0].tolist() == [1, 2, 3, 4, 5, 6]
+
+    # the same with the stream writer and with memory staging
+    for writer in [
+        lambda: rab.RandomAccessBufferStreamWriter(filepath),
+        lambda: rab.RandomAccessBuffer(memory_budget=1000),
+    ]:
+        with writer() as rabuff:
+            rabuff.addDataset("memmap", data=memmap, compress="gzip")
+            rabuff.addDataset("small", data=np.arange(10))
+            with pytest.raises(ValueError):
+                rabuff.addDataset(
+                    "too many", data=pieces(), shape=(50, 30), dtype="int16"
+                )
+            rabuff.addDataset("pieces", data=pieces(), shape=full.shape, dtype="int16")
+            if isinstance(rabuff, rab.RandomAccessBufferStreamWriter):
+                assert rabuff._working_dir is None
+            else:
+                assert "memmap" not in rabuff._staged_in_memory
+                assert "small" in rabuff._staged_in_memory
+                rabuff.write(filepath)
+
+        with rab.RandomAccessBufferReader() as rabuff:
+            rabuff.read(filepath)
+            assert rabuff.listDatasets() == ["memmap", "small", "pieces"]
+            assert (rabuff.getDataset("memmap")[0] == memmap).all()
+            assert (rabuff.getDataset("small")[0] == np.arange(10)).all()
+            assert (rabuff.getDataset("pieces")[0] == full).all()
+
+
+def test_strides():
+    filepath = "./tests/temp/out_of_core_strides.rab"
+    memmap_path = "./tests/temp/out_of_core_strides.npy"
+    memmap = np.lib.format.open_memmap(
+        memmap_path, mode="w+", dtype="int32", shape=(4, 6)
+    )
+    memmap[:] = np.arange(24).reshape((4, 6))
+    memmap.flush()
+
+    # views whose strides are not those of the bytes written
+    transposed = np.arange(12).reshape((3, 4)).T
+    strided = memmap[:, ::2]
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("transposed", data=transposed)
+        rabuff.addDataset("strided", data=strided)
+        rabuff.write(filepath)
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        for (name, arr) in [("transposed", transposed), ("strided", strided)]:
+            assert (rabuff.getDataset(name)[0] == arr).all()
+            for position in np.ndindex(*arr.shape):
+                assert rabuff.digNumericalDataset(name, list(position)) == arr[position]
+            for key in [1, (slice(None), 1), (slice(None, None, -1), slice(1, None))]:
+                assert (rabuff.readSlice(name, key) == arr[key]).all()
+
+        assert rabuff.digNumericalDataset("transposed", [1, 0]) == 1
+        assert rabuff.readSlice("strided", 1).tolist() == [6, 8, 10]
+
+
+def test_fortran_order():
+    filepath = "./tests/temp/out_of_core_fortran.rab"
+    arr = np.arange(6).reshape((2, 3))
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("f", data=arr, order="F")
+        rabuff.addDataset("f gzip", data=arr, order="F", compress="gzip")
+        rabuff.write(filepath)
+
+    for memory_map in [False, True]:
+        with rab.RandomAccessBufferReader() as rabuff:
+            rabuff.read(filepath, memory_map=memory_map)
+            for name in ["f", "f gzip"]:
+                data = rabuff.getDataset(name)[0]
+                assert (data == arr).all()
+                assert data[0, 1] == 1
+
+                out = np.empty(6, dtype=data.dtype)
+                assert rabuff.getDataset(name, out=out)[0] is out
+                assert (out.reshape(arr.shape) == arr).all()
+
+            assert rabuff.getDataset("f")[0][0, 1] == rabuff.digNumericalDataset(
+                "f", [0, 1]
+            )
+            assert (rabuff.readSlice("f", 1) == rabuff.getDataset("f")[0][1]).all()
+
+
+def test_errors():
+    full = np.zeros((10, 3))
+    with rab.RandomAccessBuffer() as rabuff:
+        with pytest.raises(ValueError):
+            rabuff.addNumericalDataset("a", [full], shape=full.shape)
+        with pytest.raises(ValueError):
+            rabuff.addNumericalDataset(
+                "a", [full], shape=full.shape, dtype="float64", order="F"
+            )
+        with pytest.raises(ValueError):
+            rabuff.addNumericalDataset(
+                "a", [full[:, :2]], shape=full.shape, dtype="float64"
+            )
+        with pytest.raises(ValueError):
+            rabuff.addNumericalDataset("a", [full[:5]], shape=full.shape, dtype="float64")
+        with pytest.raises(ValueError):
+            rabuff.addNumericalDataset("a", 12)
+        assert rabuff.listDatasets() == []
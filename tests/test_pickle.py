@@ -0,0 +1,125 @@
+import os
+import pickle
+import threading
+import numpy as np
+import randomaccessbuffer as rab
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import pytest
+
+FILEPATH = "./tests/temp/pickle.rab"
+
+
+def get_sum(reader, dataset_name):
+    # runs in a worker process
+    return float(np.sum(reader.getDataset(dataset_name)[0]))
+
+
+def write(filepath, nb_datasets):
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(nb_datasets):
+            rabuff.addDataset(
+                "array {}".format(i),
+                data=np.arange(100).reshape((10, 10)) * i,
+                metadata={"i": i, "description": "some array"},
+                compress="gzip" if i % 2 else None,
+            )
+        rabuff.write(filepath)
+
+
+def test():
+    write(FILEPATH, 200)
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(FILEPATH, memory_map=True)
+
+        # the token without the index is small, whatever the size of the header
+        token = rabuff.getToken()
+        assert len(pickle.dumps(rab.RandomAccessBufferReader.fromToken(token))) < 500
+
+        # a reader is pickled with its index, the header is not decoded
+        unpickled = pickle.loads(pickle.dumps(rabuff))
+        assert unpickled._token["index"] is not None
+        unpickled._decodeHeader = None
+        assert unpickled._file is None
+        assert unpickled.getMetadata("array 3") == {"i": 3, "description": "some array"}
+        assert unpickled._mmap is not None
+        assert unpickled.listDatasets() == rabuff.listDatasets()
+        assert unpickled.digNumericalDataset("array 2", [3, 4]) == 68
+        sliced = unpickled.readSlice("array 4", (slice(2, 5), 1))
+        assert (sliced == [84, 124, 164]).all()
+        unpickled.close()
+
+        # with the index, the header is not decoded
+        token = rabuff.getToken(include_index=True)
+        reader = rab.RandomAccessBufferReader.fromToken(token)
+        reader._decodeHeader = None
+        for i in range(200):
+            (data, meta) = reader.getDataset("array {}".format(i))
+            assert meta["i"] == i
+            assert (data == np.arange(100).reshape((10, 10)) * i).all()
+        assert pickle.loads(pickle.dumps(token)) == token
+        reader.close()
+
+        # fan out to worker processes
+        with ProcessPoolExecutor(2) as executor:
+            names = ["array {}".format(i) for i in range(10)]
+            sums = list(executor.map(get_sum, [rabuff] * len(names), names))
+            assert sums == [4950.0 * i for i in range(10)]
+
+    # the file was modified in the meantime
+    os.remove(FILEPATH)
+    write(FILEPATH, 3)
+    for reader in [
+        pickle.loads(pickle.dumps(rabuff)),
+        rab.RandomAccessBufferReader.fromToken(token),
+    ]:
+        with pytest.raises(ValueError):
+            reader.getDataset("array 0")
+
+    # with a binary index, the workers read the sidecar rather than the pickled index
+    filepath = "./tests/temp/pickle_binary_index.rab"
+    with rab.RandomAccessBuffer() as rabuff:
+        for i in range(200):
+            rabuff.addDataset("array {}".format(i), data=np.arange(100) * i)
+        rabuff.write(filepath, binary_index=True)
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath, binary_index=True)
+        data = pickle.dumps(rabuff)
+        assert len(data) < 500
+        unpickled = pickle.loads(data)
+        unpickled._decodeHeader = None
+        assert (unpickled.getDataset("array 7")[0] == np.arange(100) * 7).all()
+        assert unpickled._binary_index is not None
+        unpickled.close()
+
+    # a RandomAccessBuffer that was not read from a file has no token
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("a", data=np.arange(3))
+        with pytest.raises(ValueError):
+            pickle.dumps(rabuff)
+
+
+def test_threads():
+    filepath = "./tests/temp/pickle_threads.rab"
+    write(filepath, 50)
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        tokens = [rabuff.getToken(), rabuff.getToken(include_index=True)]
+
+    # the first use opens the file, while the other threads wait for the index
+    for token in tokens:
+        for _ in range(10):
+            rab.HEADER_CACHE.invalidate()
+            reader = rab.RandomAccessBufferReader.fromToken(token)
+            barrier = threading.Barrier(8)
+
+            def get(i):
+                barrier.wait()
+                return reader.getDataset("array {}".format(i))
+
+            with ThreadPoolExecutor(8) as executor:
+                results = list(executor.map(get, range(8)))
+            for i, result in enumerate(results):
+                assert result is not None
+                assert (result[0] == np.arange(100).reshape((10, 10)) * i).all()
+            reader.close()
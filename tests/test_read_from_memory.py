@@ -0,0 +1,135 @@
+import io
+import os
+import builtins
+import numpy as np
+import pandas as pd
+import randomaccessbuffer as rab
+import pytest
+
+
+def write(filepath):
+    data = {
+        "raw": np.arange(200, dtype="float32").reshape((10, 20)),
+        "gzip": np.arange(50, dtype=">i2"),
+        "chunked": np.arange(400).reshape((20, 20)),
+        "text": "hello there",
+        "object": {"a": [1, 2]},
+        "dataframe": pd.DataFrame({"x": [1, 2], "y": ["a", "b"]}),
+        "bytes": b"some bytes",
+    }
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("raw", data=data["raw"])
+        rabuff.addDataset("gzip", data=data["gzip"], compress="gzip")
+        rabuff.addDataset(
+            "chunked", data=data["chunked"], compress="gzip", chunks=(6, 7)
+        )
+        for name in ["text", "object", "dataframe", "bytes"]:
+            rabuff.addDataset(name, data=data[name])
+        rabuff.write(filepath)
+    return data
+
+
+class FileLike:
+    # a seekable file object that is not a regular file
+    def __init__(self, payload):
+        self._bytes_io = io.BytesIO(payload)
+        self.read = self._bytes_io.read
+        self.readinto = self._bytes_io.readinto
+        self.seek = self._bytes_io.seek
+
+
+def check(rabuff, data):
+    for name, expected in data.items():
+        value = rabuff.getDataset(name)[0]
+        if isinstance(expected, np.ndarray):
+            assert value.dtype == expected.dtype and (value == expected).all()
+        elif isinstance(expected, pd.DataFrame):
+            assert value.equals(expected)
+        else:
+            assert value == expected
+
+    assert rabuff.digNumericalDataset("raw", [3, 4]) == 64
+    assert rabuff.digNumericalDataset("chunked", [13, 8]) == 268
+    values = rabuff.digNumericalDatasetBatch("raw", [[0, 1], [9, 19]])
+    assert list(values) == [1, 199]
+    sliced = rabuff.readSlice("chunked", (slice(2, 9), 5))
+    assert (sliced == data["chunked"][2:9, 5]).all()
+    assert (rabuff.readSlice("raw", (1, slice(None))) == data["raw"][1]).all()
+    assert rabuff.digInBuffer("bytes", 5, 5) == b"bytes"
+
+    out = np.empty((10, 20), dtype="float32")
+    assert (rabuff.getDataset("raw", out=out)[0] == data["raw"]).all()
+    out = bytearray(10)
+    assert rabuff.getDataset("bytes", out=out)[0] == data["bytes"]
+
+    for executor in ["thread", "process"]:
+        datasets = rabuff.getDatasets(rabuff.listDatasets(), executor=executor)
+        assert (datasets["chunked"][0] == data["chunked"]).all()
+        assert datasets["object"][0] == data["object"]
+
+
+def test():
+    filepath = "./tests/temp/read_from_memory.rab"
+    data = write(filepath)
+    with open(filepath, "rb") as f:
+        payload = f.read()
+
+    sources = [
+        lambda: payload,
+        lambda: bytearray(payload),
+        lambda: memoryview(payload),
+        lambda: np.frombuffer(payload, dtype=np.uint8),
+        lambda: io.BytesIO(payload),
+        lambda: FileLike(payload),
+    ]
+    for source in sources:
+        with rab.RandomAccessBufferReader() as rabuff:
+            rabuff.readFrom(source())
+            check(rabuff, data)
+
+    # the buffer is not copied
+    with rab.RandomAccessBufferReader() as rabuff:
+        payload_array = bytearray(payload)
+        rabuff.readFrom(payload_array)
+        raw = rabuff.getDataset("raw")[0]
+        assert not raw.flags.writeable
+        assert np.shares_memory(raw, np.frombuffer(payload_array, dtype=np.uint8))
+
+    # nothing is read from the disk
+    def no_open(*args, **kwargs):
+        raise AssertionError("no file should be opened")
+
+    builtins_open = builtins.open
+    builtins.open = no_open
+    try:
+        for source in sources:
+            with rab.RandomAccessBufferReader() as rabuff:
+                rabuff.readFrom(source())
+                rabuff.getDataset("chunked")
+                rabuff.readSlice("raw", (slice(2, 4), 3))
+    finally:
+        builtins.open = builtins_open
+
+    # a file object given to readFrom() is not closed
+    with open(filepath, "rb") as f:
+        with rab.RandomAccessBufferReader() as rabuff:
+            rabuff.readFrom(f, memory_map=True)
+            check(rabuff, data)
+        assert not f.closed
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        with pytest.raises(ValueError):
+            rabuff.readFrom(b"not a rab")
+        with pytest.raises(ValueError):
+            rabuff.readFrom(12)
+        with pytest.raises(TypeError):
+            rabuff.read(payload_array)
+        rabuff.readFrom(payload)
+        with pytest.raises(ValueError):
+            rabuff.getToken()
+
+    # bytes given to read() are a path, as they always were
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath.encode(), binary_index=True)
+        check(rabuff, data)
+        assert rabuff.getToken()["fileIdentity"][0] == os.path.abspath(filepath)
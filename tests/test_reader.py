@@ -0,0 +1,44 @@
+import os
+import tempfile
+import numpy as np
+import randomaccessbuffer as rab
+
+
+def list_working_dirs():
+    return set(d for d in os.listdir(tempfile.gettempdir()) if d.startswith("_RAB_"))
+
+
+def test():
+    filepath = "./tests/temp/reader.rab"
+    data = np.arange(24, dtype="int16").reshape((2, 3, 4))
+
+    rabuff = rab.RandomAccessBuffer()
+    assert rabuff._working_dir is None
+    rabuff.addDataset("array", data=data, metadata={"unit": "mm"})
+    assert os.path.isdir(rabuff._working_dir)
+    rabuff.write(filepath)
+    rabuff.clean()
+
+    working_dirs_before = list_working_dirs()
+
+    # a RandomAccessBuffer used for reading only does not create a working dir
+    rabuff = rab.RandomAccessBuffer()
+    rabuff.read(filepath)
+    assert (rabuff.getDataset("array")[0] == data).all()
+    rabuff.close()
+
+    # neither does the dedicated reader
+    with rab.RandomAccessBufferReader() as reader:
+        reader.read(filepath)
+        assert reader.listDatasets() == ["array"]
+        assert reader.getMetadata("array") == {"unit": "mm"}
+        assert (reader.getDataset("array")[0] == data).all()
+        assert reader.digNumericalDataset("array", [1, 2, 3]) == data[1, 2, 3]
+        assert (reader.readSlice("array", (Ellipsis, 0)) == data[..., 0]).all()
+        assert not hasattr(reader, "addDataset")
+
+    assert list_working_dirs() == working_dirs_before
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,178 @@
+import os
+import time
+import importlib
+import multiprocessing
+import numpy as np
+import randomaccessbuffer as rab
+from randomaccessbuffer.SharedDatasetCache import getBlockName, _openBlock, _createBlock
+from concurrent.futures import ProcessPoolExecutor
+import pytest
+
+# the module, which the package hides behind the class of the same name
+shared_module = importlib.import_module("randomaccessbuffer.SharedDatasetCache")
+
+FILEPATH = "./tests/temp/shared_dataset_cache.rab"
+
+
+def read_in_process(names):
+    # runs in another process, with its own cache
+    with rab.SharedDatasetCache() as cache:
+        with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+            rabuff.read(FILEPATH)
+            sums = [float(np.sum(rabuff.getDataset(name)[0])) for name in names]
+            return (sums, cache.getStats())
+
+
+def test():
+    table = np.random.rand(100, 50)
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("table", data=table, compress="gzip")
+        rabuff.addDataset("fortran", data=np.asfortranarray(table[:10]))
+        rabuff.addDataset("bytes", data=b"hello there", compress="gzip")
+        rabuff.addDataset("object", data={"a": 1})
+        rabuff.write(FILEPATH)
+
+    cache = rab.SharedDatasetCache()
+    with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+        rabuff.read(FILEPATH)
+        shared_table = rabuff.getDataset("table")[0]
+        assert (shared_table == table).all()
+        assert not shared_table.flags.writeable
+        with pytest.raises(ValueError):
+            shared_table[0, 0] = 1
+
+        shared_bytes = rabuff.getDataset("bytes")[0]
+        assert shared_bytes.readonly and shared_bytes == b"hello there"
+        assert rabuff.getDataset("object")[0] == {"a": 1}
+        assert cache.getStats()["publications"] == 2
+
+        # the other processes map the published datasets instead of decoding them
+        with ProcessPoolExecutor(2) as executor:
+            jobs = [executor.submit(read_in_process, ["table", "bytes"]) for _ in "ab"]
+            for job in jobs:
+                (sums, stats) = job.result()
+                assert sums[0] == pytest.approx(table.sum())
+                assert stats["hits"] == 2 and stats["publications"] == 0
+
+        # a dataset that no process uses anymore is published again
+        (sums, stats) = read_in_process(["fortran"])
+        assert stats["publications"] == 1
+        assert (rabuff.getDataset("fortran")[0] == table[:10]).all()
+        assert cache.getStats()["publications"] == 3
+        identity = rabuff._file_identity
+
+    # arrays keep their order
+    shared_fortran = cache.put(("no file", "fortran"), np.asfortranarray(table))
+    assert shared_fortran.flags.f_contiguous
+    assert (shared_fortran == table).all()
+
+    # the blocks are freed once the last process released them
+    _openBlock(getBlockName((identity, "table"))).close()
+    cache.close()
+    with pytest.raises(FileNotFoundError):
+        _openBlock(getBlockName((identity, "table")))
+
+    # the arrays remain valid
+    assert (shared_table == table).all()
+
+
+def create_block(name):
+    # runs in another process, which exits without making the block ready
+    _createBlock(name, {"dtype": None, "byteLength": 10}, 10)
+
+
+def test_abandoned(monkeypatch):
+    filepath = "./tests/temp/shared_dataset_cache_abandoned.rab"
+    table = np.random.rand(100, 50)
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("table", data=table, compress="gzip")
+        rabuff.addDataset("slow", data=table, compress="gzip")
+        rabuff.write(filepath)
+
+    with rab.SharedDatasetCache() as cache:
+        with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+            rabuff.read(filepath)
+            identity = rabuff._file_identity
+
+            # the process publishing the table was killed
+            process = multiprocessing.Process(
+                target=create_block, args=(getBlockName((identity, "table")),)
+            )
+            process.start()
+            process.join()
+
+            start = time.monotonic()
+            assert (rabuff.getDataset("table")[0] == table).all()
+            assert time.monotonic() - start < shared_module.PUBLISH_TIMEOUT
+            assert cache.getStats()["publications"] == 1
+
+            # this process is still publishing, the dataset is kept in private
+            monkeypatch.setattr(shared_module, "PUBLISH_TIMEOUT", 0.1)
+            name = getBlockName((identity, "slow"))
+            block = _createBlock(name, {"dtype": None, "byteLength": 10}, 10)
+            try:
+                slow = rabuff.getDataset("slow")[0]
+                assert (slow == table).all()
+                start = time.monotonic()
+                assert rabuff.getDataset("slow")[0] is slow
+                assert time.monotonic() - start < 0.1
+                assert cache.getStats()["publications"] == 1
+            finally:
+                block.unlink()
+                block.close()
+
+    # a block that cannot be filled is freed
+    def copyto(dst, src):
+        raise MemoryError()
+
+    monkeypatch.setattr(np, "copyto", copyto)
+    with rab.SharedDatasetCache() as cache:
+        with pytest.raises(MemoryError):
+            cache.put(("no file", "failing"), table)
+    with pytest.raises(FileNotFoundError):
+        _openBlock(getBlockName(("no file", "failing")))
+
+
+def test_contention(monkeypatch):
+    _posixshmem = pytest.importorskip("_posixshmem")
+    filepath = "./tests/temp/shared_dataset_cache_contention.rab"
+    table = np.random.rand(100, 50)
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("table", data=table, compress="gzip")
+        rabuff.addDataset("denied", data=table, compress="gzip")
+        rabuff.addDataset("locked", data=table, compress="gzip")
+        rabuff.write(filepath)
+
+    monkeypatch.setattr(shared_module, "PUBLISH_TIMEOUT", 0.1)
+    with rab.SharedDatasetCache() as cache:
+        with rab.RandomAccessBufferReader(cache=cache) as rabuff:
+            rabuff.read(filepath)
+            identity = rabuff._file_identity
+
+            # another process created the block but did not size it yet
+            name = getBlockName((identity, "table"))
+            _posixshmem.shm_open("/" + name, os.O_CREAT | os.O_EXCL | os.O_RDWR, 0o600)
+            try:
+                assert (rabuff.getDataset("table")[0] == table).all()
+                assert (rabuff.getDataset("table")[0] == table).all()
+            finally:
+                _posixshmem.shm_unlink("/" + name)
+            assert cache.getStats()["publications"] == 0
+
+            # blocks and lock files of another user
+            def denied(*args, **kwargs):
+                raise PermissionError()
+
+            with monkeypatch.context() as m:
+                m.setattr(shared_module.shared_memory, "SharedMemory", denied)
+                assert (rabuff.getDataset("denied")[0] == table).all()
+
+            with monkeypatch.context() as m:
+                m.setattr(shared_module.fcntl, "flock", denied)
+                assert (rabuff.getDataset("locked")[0] == table).all()
+            with pytest.raises(FileNotFoundError):
+                _openBlock(getBlockName((identity, "locked")))
+
+            # the private copies are kept
+            assert cache.getStats()["nbDatasets"] == 3
+            assert cache.getStats()["publications"] == 0
@@ -0,0 +1,63 @@
+import numpy as np
+import randomaccessbuffer as rab
+import pytest
+
+KEYS = [
+    (slice(1, 4), slice(None), 2),
+    (2,),
+    (Ellipsis, 3),
+    (slice(None, None, -2), slice(1, 5, 3), slice(4, 0, -1)),
+    (-1, -1, -1),
+    (slice(None), 0, slice(None)),
+]
+
+
+def create(filepath):
+    rabuff = rab.RandomAccessBuffer()
+
+    volume = np.arange(5 * 6 * 7, dtype="float32").reshape((5, 6, 7))
+    big_endian = volume.astype(">i2")
+
+    rabuff.addDataset("volume", data=volume)
+    rabuff.addDataset("big endian", data=big_endian)
+    rabuff.write(filepath)
+
+    return (volume, big_endian)
+
+
+def test():
+    filepath = "./tests/temp/slice.rab"
+    (volume, big_endian) = create(filepath)
+
+    rabuff = rab.RandomAccessBuffer()
+    rabuff.read(filepath)
+
+    for key in KEYS:
+        for max_gap in [0, 4096, 1 << 30]:
+            out = rabuff.readSlice("volume", key, max_gap=max_gap)
+            assert out.shape == volume[key].shape
+            assert (out == volume[key]).all()
+
+            out = rabuff.readSlice("big endian", key, max_gap=max_gap)
+            assert out.dtype == big_endian.dtype
+            assert (out == big_endian[key]).all()
+
+    # a whole dataset is a single run, read straight into the result
+    assert (rabuff.readSlice("volume", Ellipsis) == volume).all()
+
+    mapped = rab.RandomAccessBuffer()
+    mapped.read(filepath, memory_map=True)
+    for key in KEYS:
+        assert (mapped.readSlice("volume", key) == volume[key]).all()
+        assert (mapped.readSlice("big endian", key) == big_endian[key]).all()
+    mapped.close()
+
+    with pytest.raises(IndexError):
+        rabuff.readSlice("volume", (5,))
+
+    with pytest.raises(IndexError):
+        rabuff.readSlice("volume", (0, 0, 0, 0))
+
+
+if __name__ == "__main__":
+    test()
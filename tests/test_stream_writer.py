@@ -0,0 +1,65 @@
+import os
+import numpy as np
+import pandas as pd
+import randomaccessbuffer as rab
+import pytest
+
+
+def add_all(rabuff):
+    data = {
+        "array": np.arange(1000, dtype="float32").reshape((10, 100)),
+        "compressed": np.arange(500, dtype=">i8"),
+        "text": "hello there é ï",
+        "object": {"a": 1},
+        "dataframe": pd.DataFrame({"x": [1.5, 2.5], "y": ["a", "bb"]}),
+    }
+    for name, d in data.items():
+        rabuff.addDataset(name, data=d, metadata={"name": name}, compress="gzip" if name == "compressed" else None)
+    rabuff.addDataset("rhino", filepath="./tests/input_files/rhinoceros.jpg")
+    data["rhino"] = open("./tests/input_files/rhinoceros.jpg", "rb").read()
+    return data
+
+
+def check(filepath, data):
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        assert rabuff.listDatasets() == list(data.keys())
+        for name, d in data.items():
+            d_out, meta = rabuff.getDataset(name)
+            if isinstance(d, np.ndarray):
+                assert (d_out == d).all()
+            elif isinstance(d, pd.DataFrame):
+                assert d_out.equals(d.astype({"x": "float32"}))
+            else:
+                assert d_out == d
+        assert rabuff.digNumericalDataset("array", [3, 4]) == data["array"][3, 4]
+
+
+def test():
+    # the header fits in the reserved space
+    filepath = "./tests/temp/stream_writer.rab"
+    with rab.RandomAccessBufferStreamWriter(filepath, binary_index=True) as rabuff:
+        data = add_all(rabuff)
+        # nothing is staged
+        assert rabuff._working_dir is None
+        with pytest.raises(ValueError):
+            rabuff.write(filepath)
+    check(filepath, data)
+    assert os.path.exists(filepath + ".rabidx")
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath, binary_index=True)
+        assert rabuff._binary_index is not None
+        assert rabuff.getDataset("text")[0] == data["text"]
+
+    # the header does not fit, the datasets are moved
+    filepath = "./tests/temp/stream_writer_small_reserve.rab"
+    rabuff = rab.RandomAccessBufferStreamWriter(filepath, header_reserve=16, header_format="yaml")
+    data = add_all(rabuff)
+    rabuff.close()
+    check(filepath, data)
+    assert not os.path.exists(filepath + ".tmp")
+
+
+if __name__ == "__main__":
+    test()
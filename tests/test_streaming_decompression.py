@@ -0,0 +1,55 @@
+import zlib
+import tracemalloc
+import numpy as np
+import randomaccessbuffer as rab
+from randomaccessbuffer import Tools
+import pytest
+
+
+def test():
+    filepath = "./tests/temp/streaming_decompression.rab"
+    # random data barely compresses, so the compressed dataset is as large as the array
+    volume = np.random.rand(64, 64, 256)
+    small = np.arange(10, dtype=">i2")
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("volume", data=volume, compress="gzip")
+        rabuff.addDataset("small", data=small, compress="gzip")
+        rabuff.write(filepath)
+
+    for memory_map in [False, True]:
+        with rab.RandomAccessBufferReader() as rabuff:
+            rabuff.read(filepath, memory_map=memory_map)
+
+            tracemalloc.start()
+            volume_out = rabuff.getDataset("volume")[0]
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            assert (volume_out == volume).all()
+            assert volume_out.flags.writeable
+            # only the array and a few decompressed blocks were allocated
+            assert peak < volume.nbytes + 4 * Tools.DECOMPRESS_BLOCK_SIZE
+
+            small_out = rabuff.getDataset("small")[0]
+            assert small_out.dtype == small.dtype
+            assert (small_out == small).all()
+
+
+def test_decompress_into():
+    data = bytes(range(256)) * 1000
+    compressed = zlib.compress(data)
+    pieces = [compressed[i : i + 100] for i in range(0, len(compressed), 100)]
+
+    out = bytearray(len(data))
+    assert Tools.decompressInto(pieces, out, block_size=64) == len(data)
+    assert out == data
+
+    # the size of the output must match the decompressed data
+    with pytest.raises(ValueError):
+        Tools.decompressInto(pieces, bytearray(len(data) - 1))
+    with pytest.raises(ValueError):
+        Tools.decompressInto(pieces, bytearray(len(data) + 1))
+    # truncated stream
+    with pytest.raises(ValueError):
+        Tools.decompressInto(pieces[:-1], bytearray(len(data)))
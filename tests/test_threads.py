@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import randomaccessbuffer as rab
+
+NB_QUERIES = 2000
+
+
+def test():
+    filepath = "./tests/temp/threads.rab"
+    volume = np.random.rand(20, 30, 40).astype("float32")
+    text = "hello there " * 100
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.addDataset("volume", data=volume)
+        rabuff.addDataset("text", data=text, compress="gzip")
+        rabuff.write(filepath)
+
+    positions = np.stack(
+        [np.random.randint(0, size, NB_QUERIES) for size in volume.shape], axis=1
+    )
+
+    with rab.RandomAccessBuffer() as rabuff:
+        rabuff.read(filepath)
+
+        # a single instance shared by all the threads
+        def query(i):
+            p = positions[i]
+            ok = rabuff.digNumericalDataset("volume", p.tolist()) == volume[tuple(p)]
+            ok = ok and (rabuff.readSlice("volume", p[0]) == volume[p[0]]).all()
+            ok = ok and rabuff.getDataset("text")[0] == text
+            return ok
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(query, range(NB_QUERIES)))
+
+    assert all(results)
+
+
+if __name__ == "__main__":
+    test()
@@ -0,0 +1,167 @@
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+import randomaccessbuffer as rab
+import pytest
+
+
+def add_all(rabuff):
+    data = {}
+    for i in range(20):
+        data["array {}".format(i)] = np.random.rand(100, 50).astype("float32")
+    data["chunked"] = np.arange(10000, dtype="int32").reshape((100, 100))
+    data["text"] = "hello there é ï " * 100
+    data["object"] = {"a": [1, 2, 3]}
+    data["buffer"] = b"\x00\x01" * 1000
+    data["dataframe"] = pd.DataFrame({"x": [1.5, 2.5], "y": ["a", "bb"]})
+
+    for name, d in data.items():
+        rabuff.addDataset(
+            name,
+            data=d,
+            metadata={"name": name},
+            compress="gzip",
+            chunks=(30, 30) if name == "chunked" else None,
+        )
+    return data
+
+
+def check(filepath, data):
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        # the order of the additions is kept
+        assert rabuff.listDatasets() == list(data.keys())
+        for name, d in data.items():
+            d_out, meta = rabuff.getDataset(name)
+            assert meta == {"name": name}
+            if isinstance(d, np.ndarray):
+                assert (d_out == d).all()
+            elif isinstance(d, pd.DataFrame):
+                assert d_out.equals(d.astype({"x": "float32"}))
+            else:
+                assert d_out == d
+        assert rabuff.digNumericalDataset("chunked", [42, 17]) == 4217
+
+
+def test():
+    filepath = "./tests/temp/workers.rab"
+    with rab.RandomAccessBuffer(workers=4) as rabuff:
+        data = add_all(rabuff)
+        # a dataset being encoded is already known
+        with pytest.raises(KeyError):
+            rabuff.addDataset("text", data="again")
+        rabuff.write(filepath)
+    check(filepath, data)
+
+    # same file without workers
+    sync_filepath = "./tests/temp/workers_sync.rab"
+    with rab.RandomAccessBuffer() as rabuff:
+        add_all(rabuff)
+        rabuff.write(sync_filepath)
+    with rab.RandomAccessBufferReader() as a, rab.RandomAccessBufferReader() as b:
+        a.read(filepath)
+        b.read(sync_filepath)
+        for name in data:
+            assert a.getMetadata(name) == b.getMetadata(name)
+
+    # the stream writer
+    with rab.RandomAccessBufferStreamWriter(filepath, workers=4) as rabuff:
+        data = add_all(rabuff)
+        rabuff.deleteDataset("text")
+        del data["text"]
+    check(filepath, data)
+
+
+def test_error():
+    filepath = "./tests/temp/workers_error.rab"
+    with rab.RandomAccessBuffer(workers=2) as rabuff:
+        rabuff.addDataset("text", data="hello")
+        rabuff.addObject("object", {"not encodable": object()})
+        # the encoding error is raised by write() and the dataset is dropped
+        with pytest.raises(Exception):
+            rabuff.write(filepath)
+        assert rabuff.listDatasets() == ["text"]
+        rabuff.write(filepath)
+
+    with rab.RandomAccessBufferReader() as rabuff:
+        rabuff.read(filepath)
+        assert rabuff.getDataset("text")[0] == "hello"
+
+
+def test_drop():
+    """
+    A writer dropped while its datasets are encoded is destroyed in a thread of the
+    pool, once the last job releases it.
+    """
+    filepath = "./tests/temp/workers_drop.rab"
+    arr = np.arange(1000, dtype="int32").reshape((100, 10))
+    errors = []
+    hook = sys.unraisablehook
+    sys.unraisablehook = errors.append
+
+    try:
+        for (writer, is_stream) in [
+            (lambda: rab.RandomAccessBuffer(workers=2), False),
+            (lambda: rab.RandomAccessBufferStreamWriter(filepath, workers=2), True),
+        ]:
+            release = threading.Event()
+            done = threading.Event()
+            destroyed_in = []
+
+            def pieces():
+                release.wait()
+                yield arr
+
+            rabuff = writer()
+            rabuff.onDone(
+                lambda: (destroyed_in.append(threading.current_thread()), done.set())
+            )
+            working_dir = rabuff._getWorkingDir()
+            rabuff.addDataset("text", data="hello")
+            rabuff.addDataset("array", data=pieces(), shape=arr.shape, dtype="int32")
+            del rabuff
+
+            release.set()
+            assert done.wait(10)
+            assert destroyed_in[0] is not threading.main_thread()
+            assert not os.path.exists(working_dir)
+
+            if is_stream:
+                with rab.RandomAccessBufferReader() as reader:
+                    reader.read(filepath)
+                    assert reader.getDataset("text")[0] == "hello"
+                    assert (reader.getDataset("array")[0] == arr).all()
+    finally:
+        sys.unraisablehook = hook
+
+    assert errors == []
+
+
+def test_clean():
+    """
+    Cleaning a stream writer cancels the datasets waiting to be encoded, which are
+    left out of its header.
+    """
+    filepath = "./tests/temp/workers_clean.rab"
+    started = threading.Event()
+    release = threading.Event()
+
+    def pieces():
+        started.set()
+        release.wait()
+        yield np.arange(10)
+
+    rabuff = rab.RandomAccessBufferStreamWriter(filepath, workers=1)
+    rabuff.addDataset("blocked", data=pieces(), shape=(10,), dtype="int64")
+    rabuff.addDataset("waiting", data="hello")
+    assert started.wait(10)
+    threading.Timer(0.1, release.set).start()
+    rabuff.clean()
+    rabuff.close()
+
+    with rab.RandomAccessBufferReader() as reader:
+        reader.read(filepath)
+        assert reader.listDatasets() == ["blocked"]
+        assert reader.getDataset("blocked")[0].tolist() == list(range(10))